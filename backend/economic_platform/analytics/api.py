@@ -0,0 +1,108 @@
+"""
+Plumbing shared by the DRF views and their async (ASGI) variants.
+
+DRF views are synchronous, so the async endpoints are plain Django async views wrapped
+in `@async_api_view`: they authenticate with the session as SessionAuthentication does
+(`await request.auser()`), answer with DRF's JSON encoder, and map InvalidRequest and
+unexpected errors to the same bodies as the sync views.
+"""
+import functools
+
+from django.http import Http404, HttpResponse, HttpResponseBase, JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class InvalidRequest(Exception):
+    """A client error, answered with {'error': message} and `status_code`."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def int_param(params, name):
+    """Query parameter `name` as an int, None if absent or empty."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidRequest(f'Invalid {name} format.')
+
+
+def year_range(params):
+    """{'start_year': ..., 'end_year': ...} with the parameters that were given."""
+    years = {param: int_param(params, param) for param in ('start_year', 'end_year')}
+    return {param: year for param, year in years.items() if year is not None}
+
+
+async def alist(queryset):
+    """Evaluates `queryset` through the async ORM."""
+    return [row async for row in queryset]
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return JsonResponse(data, status=status_code, safe=False, encoder=JSONEncoder)
+
+
+def negotiated(request, renderer_classes):
+    """
+    Selects the renderer for `request` among `renderer_classes` as DRF does (Accept,
+    ?format=), records it as request.accepted_renderer and returns a response function
+    like json_response that renders with it.
+    """
+    renderer, media_type = DefaultContentNegotiation().select_renderer(
+        Request(request), [renderer_class() for renderer_class in renderer_classes],
+    )
+    request.accepted_renderer, request.accepted_media_type = renderer, media_type
+    content_type = f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+
+    def respond(data, status_code=status.HTTP_200_OK):
+        return HttpResponse(renderer.render(data, media_type), status=status_code, content_type=content_type)
+    return respond
+
+
+def async_api_view(methods, renderer_classes=None):
+    """
+    Turns `async def view(request, ...) -> data` into an authenticated JSON endpoint
+    accepting `methods` (HEAD is accepted with GET). A view may also return a response
+    (e.g. a streamed one), which is passed through. With `renderer_classes`, the format
+    is negotiated (analytics.renderers) and errors are rendered in it too.
+    """
+    allowed = set(methods) | ({'HEAD'} if 'GET' in methods else set())
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # Authentication first, as in DRF's dispatch
+            user = await request.auser()
+            if not user.is_authenticated:
+                return json_response({'detail': 'Authentication credentials were not provided.'}, status.HTTP_403_FORBIDDEN)
+            if request.method not in allowed:
+                response = json_response({'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+                response['Allow'] = ', '.join(sorted(allowed))
+                return response
+            respond = json_response
+            if renderer_classes:
+                try:
+                    respond = negotiated(request, renderer_classes)
+                except NotAcceptable as e:
+                    return json_response({'detail': e.detail}, status.HTTP_406_NOT_ACCEPTABLE)
+                except Http404:  # ?format= names no renderer
+                    return json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+            try:
+                data = await view(request, *args, **kwargs)
+                return data if isinstance(data, HttpResponseBase) else respond(data)
+            except InvalidRequest as e:
+                return respond({'error': e.message}, e.status_code)
+            except Exception as e:
+                print(f"Error in {view.__module__}.{view.__name__}: {e}")
+                return respond({'error': 'An unexpected error occurred.'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return wrapper
+    return decorator
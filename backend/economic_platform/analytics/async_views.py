@@ -0,0 +1,120 @@
+"""
+Async variants of the analytics read endpoints, for ASGI deployments (under
+/api/analytics/async/). They answer with the same JSON as the DRF views, built by the
+same payload functions; their queries go through the async ORM, so the event loop keeps
+serving other requests while one waits on the database. Django runs a request's queries
+one after another in its database thread, so awaiting them together would not overlap them.
+"""
+from asgiref.sync import sync_to_async
+
+from . import versioning
+from .api import alist, async_api_view
+from .caching import async_cached_response
+from .cube import aget_cube
+from .governorates import (
+    LABOR_MARKET_SERIES, REAL_ESTATE_SERIES, assemble_bundle, dashboard_bundle_queries, governorate_series_rows,
+    group_series,
+)
+from .pagination import streamed
+from .pca import get_model as get_pca_model
+from .renderers import ASYNC_TIME_SERIES_RENDERERS, columnar
+from .search import get_search_index
+from .views import (
+    HAPPINESS_PREDICTIONS, batch_trend_filters, bundle_top, correlation_payload, country_detail_payload,
+    global_dashboard_payload, governorate_trends_payload, happiness_prediction_rows, inflation_trends_payload,
+    latest_happiness_rows, pca_payload,
+)
+
+
+@async_api_view(['GET'])
+@async_cached_response([versioning.COUNTRIES])
+async def global_dashboard_data(request):
+    return global_dashboard_payload(await alist(latest_happiness_rows()))
+
+
+@async_api_view(['GET'])
+async def search_countries(request):
+    query = request.GET.get('q')
+    if not query:
+        return []
+    index = await sync_to_async(get_search_index)()
+    return index.search(query, limit=10)
+
+
+@async_api_view(['GET'], renderer_classes=ASYNC_TIME_SERIES_RENDERERS)
+@async_cached_response([versioning.COUNTRIES])
+async def country_detail_data(request, country_name):
+    return country_detail_payload(await aget_cube(), country_name, columnar(request))
+
+
+@async_api_view(['GET'], renderer_classes=ASYNC_TIME_SERIES_RENDERERS)
+@async_cached_response([versioning.COUNTRIES])
+async def inflation_trends(request):
+    return inflation_trends_payload(await aget_cube(), request.GET, columnar(request))
+
+
+@async_api_view(['GET'])
+@async_cached_response([versioning.COUNTRIES])
+async def correlation_analysis(request):
+    cube = await aget_cube()
+    return correlation_payload(cube, await sync_to_async(get_pca_model)(cube), request.GET)
+
+
+@async_api_view(['GET'])
+@async_cached_response([versioning.COUNTRIES])
+async def pca_results(request):
+    cube = await aget_cube()
+    return pca_payload(cube, await sync_to_async(get_pca_model)(cube), request.GET)
+
+
+@async_api_view(['GET'])
+@async_cached_response([versioning.COUNTRIES])
+async def happiness_predictions(request):
+    # The cube is only needed to resolve a country filter
+    cube = await aget_cube() if request.GET.get('country') else None
+    rows = happiness_prediction_rows(cube, request.GET)
+    if streamed(request.GET):
+        return HAPPINESS_PREDICTIONS.astream(rows)
+    return await HAPPINESS_PREDICTIONS.adata(rows, request.GET)
+
+
+async def governorate_trends(relation, series, governorate_id):
+    rows = await alist(governorate_series_rows(relation, series, [governorate_id]))
+    return governorate_trends_payload(group_series(rows, series), governorate_id)
+
+
+@async_api_view(['GET'], renderer_classes=ASYNC_TIME_SERIES_RENDERERS)
+@async_cached_response([versioning.TUNISIA])
+async def real_estate_price_trends_api(request, governorate_id):
+    return await governorate_trends('real_estate_prices', REAL_ESTATE_SERIES, governorate_id)
+
+
+@async_api_view(['GET'], renderer_classes=ASYNC_TIME_SERIES_RENDERERS)
+@async_cached_response([versioning.TUNISIA])
+async def labor_market_trends_api(request, governorate_id):
+    return await governorate_trends('labor_market_data', LABOR_MARKET_SERIES, governorate_id)
+
+
+async def batch_governorate_trends(request, relation, series):
+    governorate_ids, years = batch_trend_filters(request.GET)
+    rows = await alist(governorate_series_rows(relation, series, governorate_ids, **years))
+    return {'filters': years, 'governorates': group_series(rows, series)}
+
+
+@async_api_view(['GET'], renderer_classes=ASYNC_TIME_SERIES_RENDERERS)
+@async_cached_response([versioning.TUNISIA])
+async def real_estate_price_trends_batch_api(request):
+    return await batch_governorate_trends(request, 'real_estate_prices', REAL_ESTATE_SERIES)
+
+
+@async_api_view(['GET'], renderer_classes=ASYNC_TIME_SERIES_RENDERERS)
+@async_cached_response([versioning.TUNISIA])
+async def labor_market_trends_batch_api(request):
+    return await batch_governorate_trends(request, 'labor_market_data', LABOR_MARKET_SERIES)
+
+
+@async_api_view(['GET'])
+@async_cached_response([versioning.TUNISIA])
+async def tunisia_dashboard_bundle_api(request):
+    governorates, ranked = [await alist(queryset) for queryset in dashboard_bundle_queries(bundle_top(request.GET))]
+    return assemble_bundle(governorates, ranked)
@@ -0,0 +1,175 @@
+"""
+Endpoint benchmarks.
+
+Every URL pattern of the analytics, countries and tunisia apps is requested through
+Django's test client against the current database (e.g. after generate_synthetic_data),
+with path arguments and query parameters filled in from the data. Per endpoint the
+p50/p95 latency, the queries per request, the peak Python memory of one request
+(tracemalloc) and the response size are reported, so regressions show up as numbers.
+
+Warm runs measure the cached path (after warm-up requests); cold runs clear the
+response cache and invalidate the in-memory structures (cube, search index, score
+matrix) before every request.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+from countries.models import Country
+from tunisia.models import TunisiaGovernorate
+from tunisia.scoring import SECTORS
+
+from . import versioning
+from .prediction import HAPPINESS_FEATURES
+
+BENCHMARKED_URLCONFS = ('analytics.urls', 'countries.urls', 'tunisia.urls')
+
+# Countries/governorates named in list parameters
+SAMPLE_SIZE = 10
+
+
+class Endpoint:
+    def __init__(self, name, route, method='get', kwargs=None, params=None, data=None):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.kwargs = kwargs or {}
+        self.params = params or {}
+        self.data = data
+
+    @property
+    def path(self):
+        return reverse(self.name, kwargs=self.kwargs)
+
+    def request(self, client):
+        if self.method == 'post':
+            return client.post(self.path, self.data, format='json')
+        return client.get(self.path, self.params)
+
+
+def url_patterns():
+    """(qualified URL name, route) for every named pattern of the benchmarked URLconfs."""
+    found = []
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver) or getattr(resolver.urlconf_module, '__name__', None) not in BENCHMARKED_URLCONFS:
+            continue
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                name = f'{resolver.namespace}:{pattern.name}' if resolver.namespace else pattern.name
+                found.append((name, f'{resolver.pattern}{pattern.pattern}'))
+    return found
+
+
+def sample_request_arguments():
+    """Path arguments and parameters taken from the data: countries and governorates that have rows."""
+    countries = list(
+        Country.objects.filter(latest_indicator__isnull=False).order_by('name').values_list('name', flat=True)[:SAMPLE_SIZE]
+    )
+    governorates = list(
+        TunisiaGovernorate.objects.filter(real_estate_prices__isnull=False).distinct()
+        .order_by('id').values_list('id', flat=True)[:SAMPLE_SIZE]
+    )
+    country = countries[0] if countries else 'Tunisia'
+    governorate = governorates[0] if governorates else 1
+    return {
+        'kwargs': {'country_name': country, 'governorate_id': governorate},
+        'params': {
+            'analytics_api:search_countries': {'q': country[:3]},
+            'analytics_api:inflation_trends': {'country': country},
+            'analytics_api:happiness_predictions': {'country': country},
+            'analytics_api:real_estate_price_trends_batch_api': {'governorates': ','.join(map(str, governorates or [governorate]))},
+            'analytics_api:labor_market_trends_batch_api': {'governorates': ','.join(map(str, governorates or [governorate]))},
+            'countries_api:country_comparison_api': {'countries': ','.join(countries or [country])},
+            'api_investment_advisor': {'sector': SECTORS[0]},
+            'api_investment_ranking': {'sectors': ','.join(SECTORS[:2])},
+        },
+        'data': {
+            'analytics_api:predict_happiness': {'rows': [dict.fromkeys(HAPPINESS_FEATURES, 1.0)] * 100},
+        },
+    }
+
+
+def endpoints():
+    arguments = sample_request_arguments()
+    found = []
+    for name, route in url_patterns():
+        kwargs = {key: value for key, value in arguments['kwargs'].items() if f':{key}>' in route}
+        # Async variants take the parameters of their sync counterparts
+        sync_name = name.replace(':async_', ':')
+        data = arguments['data'].get(sync_name)
+        found.append(Endpoint(
+            name, route, method='post' if data is not None else 'get', kwargs=kwargs,
+            params=arguments['params'].get(sync_name), data=data,
+        ))
+    return found
+
+
+def _invalidate():
+    cache.clear()
+    versioning.touch(versioning.COUNTRIES)
+    versioning.touch(versioning.TUNISIA)
+
+
+def measure(client, endpoint, iterations=20, warmup=2, cold=False):
+    for _ in range(0 if cold else warmup):
+        endpoint.request(client)
+
+    latencies, query_counts = [], []
+    for _ in range(iterations):
+        if cold:
+            _invalidate()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = endpoint.request(client)
+            latencies.append(time.perf_counter() - start)
+        query_counts.append(len(queries))
+
+    # Separate run: tracemalloc slows allocation-heavy code down too much to time it as well
+    if cold:
+        _invalidate()
+    tracemalloc.start()
+    try:
+        endpoint.request(client)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    return {
+        'endpoint': endpoint.name,
+        'method': endpoint.method.upper(),
+        'path': endpoint.path,
+        'status': response.status_code,
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'queries': max(query_counts),
+        'peak_memory_kib': round(peak / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+def run_benchmarks(iterations=20, warmup=2, cold=False, only=None):
+    """
+    Results of `measure` for every endpoint (or those whose URL name contains one of
+    `only`). Requests run as a session user (the async views authenticate through the
+    session only) created in a transaction that is rolled back, so nothing is kept.
+    """
+    client = APIClient()
+    results = []
+    with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+        user = get_user_model().objects.create_user(
+            email='benchmark@example.com', username='benchmark', password=None, first_name='Benchmark', last_name='User'
+        )
+        client.force_login(user)
+        for endpoint in endpoints():
+            if only and not any(part in endpoint.name for part in only):
+                continue
+            results.append(measure(client, endpoint, iterations=iterations, warmup=warmup, cold=cold))
+        transaction.set_rollback(True)
+    return results
@@ -0,0 +1,108 @@
+"""
+Server-side result cache for the read APIs.
+
+`@cached_response(scopes)` stores a view's successful response data in Django's cache
+under the view name, the version tokens of the dataset scopes it reads, its URL kwargs
+and its normalized query parameters. An import bumps the versions, so its entries
+become unreachable at once and the LRU-bounded backend (settings.CACHES) evicts them.
+Hits and misses are counted per view, per process. `@async_cached_response` does the
+same for the async views.
+"""
+import functools
+import hashlib
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.http import HttpResponseBase
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versioning
+
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+def normalized_params(query_params):
+    """Sorted (name, value) pairs without empty values, so equivalent query strings share a key."""
+    return sorted((name, value) for name, values in query_params.lists() for value in values if value != '')
+
+
+def cache_key(view_name, scopes, request, kwargs):
+    parts = repr((
+        [versioning.current(scope) for scope in scopes],
+        sorted(kwargs.items()),
+        normalized_params(request.GET),
+        request.accepted_renderer.format if getattr(request, 'accepted_renderer', None) else None,
+    ))
+    return f'response:{view_name}:' + hashlib.blake2b(parts.encode(), digest_size=16).hexdigest()
+
+
+def _count(view_name, outcome):
+    with _stats_lock:
+        _stats[view_name][outcome] += 1
+
+
+def cached_response(scopes, timeout=None):
+    """
+    Caches 200 responses of a DRF function view (below @api_view) or APIView method.
+    `scopes` are the dataset scopes (analytics.versioning) the view reads.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__qualname__}'
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[0] if hasattr(args[0], 'query_params') else args[1]
+            key = cache_key(view_name, scopes, request, kwargs)
+            data = cache.get(key)
+            if data is not None:
+                _count(view_name, 'hits')
+                return Response(data)
+
+            _count(view_name, 'misses')
+            response = view(*args, **kwargs)
+            # Streamed responses are never materialized (analytics.pagination)
+            if response.status_code == status.HTTP_200_OK and not response.streaming:
+                cache.set(key, response.data, timeout=timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def async_cached_response(scopes, timeout=None):
+    """cached_response for async views returning response data (analytics.api.async_api_view)."""
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__qualname__}'
+
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            key = cache_key(view_name, scopes, request, kwargs)
+            data = await cache.aget(key)
+            if data is not None:
+                _count(view_name, 'hits')
+                return data
+
+            _count(view_name, 'misses')
+            data = await view(request, *args, **kwargs)
+            if not isinstance(data, HttpResponseBase):
+                await cache.aset(key, data, timeout=timeout)
+            return data
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """{view: {'hits', 'misses', 'hit_ratio'}} for this process."""
+    with _stats_lock:
+        stats = {name: dict(counts) for name, counts in _stats.items()}
+    for counts in stats.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / total, 4) if total else None
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -62,8 +62,8 @@ CHART_CONFIGURATIONS = {
     'pca_analysis': {
         'title': 'PCA of Economic Indicators',
         'type': 'scatter', # Typically for showing PC1 vs PC2
-        # Data source might be a specific API endpoint that returns pre-calculated PCA results
-        'data_source': 'api/analytics/pca_results/',
+        # Returns the fitted loadings, explained variance and per-country PC1/PC2 points
+        'data_source': 'api/analytics/pca-results/',
         'params': {
             'components': ['PC1', 'PC2'], # Which components to plot
         },
@@ -82,22 +82,7 @@ CHART_CONFIGURATIONS = {
                 }
             }
         },
-        # Static data that would come from Jupyter output, as per instructions
-        'explained_variance_ratio': [0.45, 0.25], # Example: PC1 explains 45%, PC2 explains 25%
-        'components_loading': { # Example structure for factor loadings
-            'PC1': {
-                'gdp_per_capita': 0.85,
-                'social_support': 0.70,
-                'healthy_life_expectancy_at_birth': 0.75,
-                'headline_consumer_price_inflation': -0.30
-            },
-            'PC2': {
-                'freedom_to_make_life_choices': 0.60,
-                'generosity': 0.40,
-                'perceptions_of_corruption': -0.55,
-                'headline_consumer_price_inflation': 0.20
-            }
-        },
+        # explained_variance_ratio and components_loading are fitted from the live data and served by pca_results
         'insights': [
             "PC1 is strongly correlated with GDP, social support, and life expectancy.",
             "PC2 seems to capture aspects of freedom, generosity, and corruption perception.",
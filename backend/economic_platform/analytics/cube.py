@@ -0,0 +1,184 @@
+"""
+Process-wide, read-only NumPy view of the EconomicIndicator table.
+
+Indicators are held as a dense float cube `values[country, year, metric]` (NaN where a
+value is missing) plus `present[country, year]` for rows that exist, with country
+metadata in parallel arrays. The cube is loaded lazily with two queries and rebuilt
+when the 'countries' dataset version changes, so dashboard reads are array slicing
+and reductions instead of SQL.
+"""
+import threading
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from countries.models import Country, EconomicIndicator, INDICATOR_FIELDS
+
+from . import versioning
+
+COUNTRY_FIELDS = ('id', 'name', 'code', 'continent', 'region', 'latitude', 'longitude', 'population')
+
+
+def _float_array(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _python(value):
+    """NumPy scalar -> JSON-friendly Python value, NaN -> None."""
+    value = value.item() if hasattr(value, 'item') else value
+    return None if isinstance(value, float) and value != value else value
+
+
+class IndicatorCube:
+    metrics = INDICATOR_FIELDS
+
+    def __init__(self, version, countries, indicators):
+        self.version = version
+        self.metric_index = {name: i for i, name in enumerate(self.metrics)}
+
+        countries = list(countries)
+        self.country_ids = np.array([c[0] for c in countries], dtype=np.int64)
+        self.names = np.array([c[1] for c in countries], dtype=object)
+        self.codes = np.array([c[2] for c in countries], dtype=object)
+        self.continents = np.array([c[3] or '' for c in countries], dtype=object)
+        self.regions = np.array([c[4] or '' for c in countries], dtype=object)
+        self.latitudes = _float_array(c[5] for c in countries)
+        self.longitudes = _float_array(c[6] for c in countries)
+        self.populations = [c[7] for c in countries]
+        self.continents_lower = np.array([c.lower() for c in self.continents], dtype=object)
+        self.names_lower = np.array([n.lower() for n in self.names], dtype=object)
+        self.codes_lower = np.array([c.lower() for c in self.codes], dtype=object)
+        self.by_name = {name.lower(): i for i, name in enumerate(self.names)}
+        self.by_code = {code.lower(): i for i, code in enumerate(self.codes)}
+
+        rows = np.array(indicators, dtype=float).reshape(-1, 2 + len(self.metrics))
+        order = np.argsort(self.country_ids)
+        row_countries = order[np.searchsorted(self.country_ids, rows[:, 0].astype(np.int64), sorter=order)]
+        self.years = np.unique(rows[:, 1].astype(np.int64))
+        row_years = np.searchsorted(self.years, rows[:, 1].astype(np.int64))
+
+        self.values = np.full((len(countries), len(self.years), len(self.metrics)), np.nan)
+        self.values[row_countries, row_years] = rows[:, 2:]
+        self.present = np.zeros((len(countries), len(self.years)), dtype=bool)
+        self.present[row_countries, row_years] = True
+
+    @staticmethod
+    def querysets():
+        """The two independent queries the cube is built from: countries, indicator rows."""
+        # np.array(..., dtype=float) turns the None of SQL NULLs into NaN
+        return (
+            Country.objects.order_by('name').values_list(*COUNTRY_FIELDS),
+            EconomicIndicator.objects.order_by().values_list('country_id', 'year', *INDICATOR_FIELDS),
+        )
+
+    @classmethod
+    def load(cls, version):
+        countries, indicators = cls.querysets()
+        return cls(version, countries, list(indicators))
+
+    @property
+    def latest_year(self):
+        return int(self.years[-1]) if len(self.years) else None
+
+    def metric(self, name):
+        """(country, year) matrix for one metric."""
+        return self.values[:, :, self.metric_index[name]]
+
+    def find_country(self, name_or_code):
+        """Index of the country whose name or code matches case-insensitively; names win over codes."""
+        key = name_or_code.lower()
+        index = self.by_name.get(key)
+        return self.by_code.get(key) if index is None else index
+
+    def country_info(self, index):
+        return {
+            'name': self.names[index],
+            'code': self.codes[index],
+            'continent': self.continents[index],
+            'region': self.regions[index],
+            'population': self.populations[index],
+            'latitude': _python(self.latitudes[index]),
+            'longitude': _python(self.longitudes[index]),
+        }
+
+    def country_series(self, index):
+        """Per-year indicator dicts for one country, ordered by year."""
+        year_indices = np.flatnonzero(self.present[index])
+        values = self.values[index, year_indices].astype(object)
+        values[np.isnan(self.values[index, year_indices])] = None
+        return [
+            {'year': int(self.years[y]), **dict(zip(self.metrics, row))}
+            for y, row in zip(year_indices, values.tolist())
+        ]
+
+    def country_columns(self, index):
+        """country_series as {'years': [...], metric: [...]} columns, straight from the arrays."""
+        year_indices = np.flatnonzero(self.present[index])
+        block = self.values[index, year_indices]
+        values = block.astype(object)
+        values[np.isnan(block)] = None
+        return {'years': self.years[year_indices].tolist(), **dict(zip(self.metrics, values.T.tolist()))}
+
+    def country_mask(self, continent=None, country=None):
+        """Boolean mask over countries for the optional (case-insensitive) continent and name/code filters."""
+        mask = np.ones(len(self.names), dtype=bool)
+        if continent:
+            mask &= self.continents_lower == continent.lower()
+        if country:
+            key = country.lower()
+            mask &= (self.names_lower == key) | (self.codes_lower == key)
+        return mask
+
+    def year_mask(self, start_year=None, end_year=None):
+        mask = np.ones(len(self.years), dtype=bool)
+        if start_year is not None:
+            mask &= self.years >= start_year
+        if end_year is not None:
+            mask &= self.years <= end_year
+        return mask
+
+    def yearly_means(self, metrics, country_mask, year_mask):
+        """
+        {metric: per-year mean over the selected countries} for years that have at least
+        one selected row; like SQL AVG, missing values are ignored and an all-missing year
+        gives None. Returns (years, {metric: list}).
+        """
+        keep = self.present[country_mask][:, year_mask].any(axis=0)
+        years = self.years[year_mask][keep]
+        means = {}
+        for name in metrics:
+            block = self.metric(name)[country_mask][:, year_mask][:, keep]
+            counts = np.sum(~np.isnan(block), axis=0)
+            sums = np.nansum(block, axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = sums / counts
+            means[name] = [None if count == 0 else float(m) for m, count in zip(mean, counts)]
+        return [int(y) for y in years], means
+
+
+_cube = None
+_lock = threading.Lock()
+
+
+def get_cube():
+    """The current cube, (re)loaded when the 'countries' dataset version has changed."""
+    global _cube
+    version = versioning.current(versioning.COUNTRIES)
+    cube = _cube
+    if cube is not None and cube.version == version:
+        return cube
+    with _lock:
+        if _cube is None or _cube.version != version:
+            _cube = IndicatorCube.load(version)
+        return _cube
+
+
+async def aget_cube():
+    """
+    get_cube for async views: a current cube is returned without leaving the event loop,
+    a stale one is reloaded by get_cube (under its lock, so overlapping requests load it
+    once and an older load never replaces a newer cube) in the request's database thread.
+    """
+    cube = _cube
+    if cube is not None and cube.version == versioning.current(versioning.COUNTRIES):
+        return cube
+    return await sync_to_async(get_cube)()
@@ -0,0 +1,142 @@
+"""
+Columnar per-governorate data for the Tunisia trend and dashboard endpoints.
+
+All requested governorates are read with their yearly rows in one query: a LEFT JOIN
+from TunisiaGovernorate to the data table (year range applied in the join condition,
+so governorates without rows in range still come back, with empty series), ordered by
+governorate and year and grouped in memory.
+"""
+from django.db.models import F, FilteredRelation, OuterRef, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+from tunisia.models import InvestmentScore, RealEstatePrices, TunisiaGovernorate
+
+from .models import LaborMarketData
+
+# Response key -> RealEstatePrices field
+REAL_ESTATE_SERIES = {
+    'residential_prices': 'residential_price_per_m2',
+    'commercial_prices': 'commercial_price_per_m2',
+    'land_prices': 'land_price_per_m2',
+}
+
+# Response key -> analytics.LaborMarketData field
+LABOR_MARKET_SERIES = {
+    field: field for field in (
+        'unemployment_rate', 'youth_unemployment', 'female_unemployment',
+        'labor_force_participation', 'average_wage', 'job_creation_rate',
+    )
+}
+
+
+def governorate_series_rows(relation, series, governorate_ids=None, start_year=None, end_year=None):
+    """The single query behind governorate_series, for sync or async evaluation."""
+    condition = Q()
+    if start_year is not None:
+        condition &= Q(**{f'{relation}__year__gte': start_year})
+    if end_year is not None:
+        condition &= Q(**{f'{relation}__year__lte': end_year})
+
+    governorates = TunisiaGovernorate.objects.annotate(series_row=FilteredRelation(relation, condition=condition))
+    if governorate_ids is not None:
+        governorates = governorates.filter(pk__in=governorate_ids)
+    return governorates.order_by('name', 'pk', 'series_row__year').values_list(
+        'pk', 'name', 'series_row__year', *(f'series_row__{field}' for field in series.values())
+    )
+
+
+def group_series(rows, series):
+    """Groups the rows of governorate_series_rows into one columnar dict per governorate."""
+    result = []
+    current = None
+    for governorate_id, name, year, *values in rows:
+        if current is None or current['governorate_id'] != governorate_id:
+            current = {'governorate_id': governorate_id, 'governorate_name': name, 'years': []}
+            current.update({key: [] for key in series})
+            result.append(current)
+        if year is None:  # LEFT JOIN found no row in range
+            continue
+        current['years'].append(year)
+        for key, value in zip(series, values):
+            current[key].append(value)
+    return result
+
+
+def governorate_series(relation, series, governorate_ids=None, start_year=None, end_year=None):
+    """
+    [{'governorate_id', 'governorate_name', 'years': [...], <key>: [...], ...}, ...] ordered by
+    governorate name, for the governorates in `governorate_ids` (all if None).
+    `relation` is the reverse accessor of the data table on TunisiaGovernorate.
+    """
+    return group_series(governorate_series_rows(relation, series, governorate_ids, start_year, end_year), series)
+
+
+# TunisiaGovernorate fields sent in the dashboard bundle
+BUNDLE_GOVERNORATE_FIELDS = (
+    'id', 'name', 'arabic_name', 'latitude', 'longitude', 'population_2024', 'area_km2',
+    'unemployment_rate', 'population_density', 'coastal_access',
+)
+
+# Investment scores per sector in the dashboard bundle
+BUNDLE_TOP_SCORES = 5
+
+
+def latest_values(model, fields, prefix):
+    """
+    Annotations for TunisiaGovernorate: `prefix + field` is the governorate's value of each
+    of `fields` in its latest `model` row. Each is a correlated subquery that seeks the
+    (governorate, year) index, so reading them never scans the data table.
+    """
+    return {
+        f'{prefix}{field}': Subquery(model.objects.filter(governorate=OuterRef('pk')).order_by('-year').values(field)[:1])
+        for field in fields
+    }
+
+
+LABOR_BUNDLE_FIELDS = ('year',) + tuple(LABOR_MARKET_SERIES.values())
+REAL_ESTATE_BUNDLE_FIELDS = ('year',) + tuple(REAL_ESTATE_SERIES.values())
+
+
+def dashboard_bundle_queries(top=BUNDLE_TOP_SCORES):
+    """The two independent queries behind dashboard_bundle: governorates with latest figures, top scores."""
+    latest = {
+        **latest_values(LaborMarketData, LABOR_BUNDLE_FIELDS, 'labor_'),
+        **latest_values(RealEstatePrices, REAL_ESTATE_BUNDLE_FIELDS, 'real_estate_'),
+    }
+    governorates = TunisiaGovernorate.objects.annotate(**latest).order_by('name').values_list(*BUNDLE_GOVERNORATE_FIELDS, *latest)
+    ranked = InvestmentScore.objects.annotate(
+        rank=Window(RowNumber(), partition_by=F('sector'), order_by=(F('overall_score').desc(), F('governorate_id').asc())),
+    ).filter(rank__lte=top).order_by('sector', 'rank').values_list('sector', 'governorate_id', 'overall_score')
+    return governorates, ranked
+
+
+def assemble_bundle(governorates, ranked):
+    """The bundle from the rows of the two dashboard_bundle_queries."""
+    width = len(BUNDLE_GOVERNORATE_FIELDS) + len(LABOR_BUNDLE_FIELDS) + len(REAL_ESTATE_BUNDLE_FIELDS)
+    columns = list(zip(*governorates)) or [()] * width
+    columns = [list(column) for column in columns]
+    governorate_columns = columns[:len(BUNDLE_GOVERNORATE_FIELDS)]
+    labor_columns = columns[len(BUNDLE_GOVERNORATE_FIELDS):len(BUNDLE_GOVERNORATE_FIELDS) + len(LABOR_BUNDLE_FIELDS)]
+    real_estate_columns = columns[len(BUNDLE_GOVERNORATE_FIELDS) + len(LABOR_BUNDLE_FIELDS):]
+
+    investment = {}
+    for sector, governorate_id, score in ranked:
+        columns = investment.setdefault(sector, {'governorate_id': [], 'overall_score': []})
+        columns['governorate_id'].append(governorate_id)
+        columns['overall_score'].append(score)
+
+    return {
+        'governorates': dict(zip(BUNDLE_GOVERNORATE_FIELDS, governorate_columns)),
+        'latest_labor_market': dict(zip(LABOR_BUNDLE_FIELDS, labor_columns)),
+        'latest_real_estate': dict(zip(REAL_ESTATE_BUNDLE_FIELDS, real_estate_columns)),
+        'top_investment_scores': investment,
+    }
+
+
+def dashboard_bundle(top=BUNDLE_TOP_SCORES):
+    """
+    Everything the Tunisia dashboard renders, as columns: governorate metadata, each
+    governorate's latest labor and real-estate figures (aligned with the governorate
+    columns) and the `top` investment scores per sector. Two queries.
+    """
+    governorates, ranked = dashboard_bundle_queries(top)
+    return assemble_bundle(list(governorates), list(ranked))
@@ -0,0 +1,275 @@
+"""
+Declarative, set-based ingestion shared by the import/populate commands.
+
+A dataset declares how file columns map onto model fields (with dtypes), its natural
+key and, optionally, foreign-key lookups and a fingerprint column. The layer then
+coerces whole columns at once with pandas and writes with batched
+INSERT ... ON CONFLICT upserts, so a new dataset gets the fast path by declaring a
+`Dataset` rather than writing another row loop.
+"""
+import pandas as pd
+from django.db import connections, models, router
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from . import versioning
+
+DTYPES = ('int', 'float', 'bool', 'str')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+# Key values per `__in` lookup; keeps us under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# DataFrame.attrs key under which read_frames records the fields the file provides
+PRESENT_FIELDS = 'present_fields'
+
+
+class Column:
+    """One source column: header in the file, target field name, dtype and fill value for missing cells."""
+
+    def __init__(self, source, field, dtype='float', required=False, default=None):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype '{dtype}' for column '{source}'.")
+        self.source = source
+        self.field = field
+        self.dtype = dtype
+        self.required = required
+        self.default = default
+
+
+def coerce_series(series, dtype):
+    """Vectorized replacement for the per-cell to_int_or_none/to_float_or_none helpers."""
+    if dtype == 'float':
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+    if dtype == 'int':
+        numbers = pd.to_numeric(series, errors='coerce')
+        # Non-integral values become missing, as int('1.5') used to
+        return numbers.where(numbers == numbers.round()).astype('Int64')
+    text = series.astype('string').str.strip()
+    if dtype == 'bool':
+        return text.str.lower().isin(TRUE_VALUES).fillna(False).astype(bool)
+    return text.mask(text == '')
+
+
+def read_frames(path, spec, chunksize=None):
+    """
+    Reads `path` and yields DataFrames whose columns are the spec's field names, already
+    coerced. `spec` is a list of (source, field, dtype, default) tuples so it can be sent to worker
+    processes that have no Django setup. Headers are matched case-insensitively; columns
+    absent from the file come back as all-missing (or filled with their default), and
+    `frame.attrs[PRESENT_FIELDS]` lists the fields the file actually provides, those
+    with a default included.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    by_normalized = {str(name).strip().lower(): name for name in header}
+    present = {}
+    for source, field, dtype, _ in spec:
+        actual = by_normalized.get(source.strip().lower())
+        if actual is not None:
+            present[actual] = (field, dtype)
+
+    text_columns = {source: str for source, (_, dtype) in present.items() if dtype in ('str', 'bool')}
+    reader = pd.read_csv(path, usecols=list(present) or None, dtype=text_columns, chunksize=chunksize)
+    for raw in ([reader] if chunksize is None else reader):
+        frame = pd.DataFrame(index=raw.index)
+        for source, field, dtype, default in spec:
+            actual = by_normalized.get(source.strip().lower())
+            values = raw[actual] if actual is not None else pd.Series(pd.NA, index=raw.index, dtype=object)
+            values = coerce_series(values, dtype)
+            frame[field] = values if default is None else values.fillna(default)
+        frame.attrs[PRESENT_FIELDS] = [
+            field for source, field, _, default in spec
+            if default is not None or source.strip().lower() in by_normalized
+        ]
+        yield frame
+
+
+def parse_file(path, spec):
+    """Whole-file read_frames(); a module-level function so process pools can run it."""
+    return next(read_frames(path, spec))
+
+
+def present_fields(frame):
+    """The fields read_frames found in the file; every column for frames built otherwise."""
+    return set(frame.attrs.get(PRESENT_FIELDS, frame.columns))
+
+
+def missing_to_none(frame, fields):
+    """Returns the rows of `frame[fields]` as lists of Python values with None for missing cells."""
+    columns = [frame[field].astype(object).where(frame[field].notna(), None).tolist() for field in fields]
+    return [list(row) for row in zip(*columns)]
+
+
+def upsert_rows(model, fields, rows, unique_fields, batch_size=1000):
+    """
+    INSERT ... ON CONFLICT(unique_fields) DO UPDATE through one executemany per batch.
+
+    Equivalent to bulk_create(update_conflicts=True) but without per-cell model field
+    preparation, which dominates at millions of rows. auto_now/auto_now_add columns are
+    filled in here (only auto_now ones are refreshed on conflict).
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    ops = connection.ops
+    meta = model._meta
+
+    now = timezone.now()
+    timestamps = []
+    for field in meta.concrete_fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            if isinstance(field, models.DateTimeField):
+                timestamps.append((field, ops.adapt_datetimefield_value(now)))
+            else:
+                timestamps.append((field, ops.adapt_datefield_value(now.date())))
+
+    columns = [meta.get_field(name).column for name in fields] + [field.column for field, _ in timestamps]
+    update_columns = [meta.get_field(name).column for name in fields if name not in unique_fields]
+    update_columns += [field.column for field, _ in timestamps if field.auto_now]
+    on_conflict = ops.on_conflict_suffix_sql(
+        [],
+        OnConflict.UPDATE if update_columns else OnConflict.IGNORE,
+        update_columns,
+        [meta.get_field(name).column for name in unique_fields],
+    )
+    sql = 'INSERT INTO %s (%s) VALUES (%s) %s' % (
+        ops.quote_name(meta.db_table),
+        ', '.join(ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+        on_conflict,
+    )
+    timestamp_values = [value for _, value in timestamps]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, [[*row, *timestamp_values] for row in rows[start:start + batch_size]])
+
+
+class Dataset:
+    """
+    Declarative description of a flat file loaded into `model`.
+
+    - `columns`: list of Column. Fields that are not model fields (e.g. a raw
+      "Continent/Region") are parsed but not written.
+    - `natural_key`: field names of the unique constraint used for the upsert.
+    - `lookups`: {fk_field: description}; the frame carries natural values (e.g. a
+      governorate name) that `sync` maps to ids with a caller-supplied dict.
+    - `fingerprint_field`/`fingerprint_fields`: when set, rows whose fingerprint
+      (model.compute_fingerprint over `fingerprint_fields`) matches the stored one are
+      not written at all.
+    """
+
+    def __init__(self, model, columns, natural_key, lookups=None,
+                 fingerprint_field=None, fingerprint_fields=None):
+        self.model = model
+        self.columns = columns
+        self.natural_key = tuple(natural_key)
+        self.lookups = lookups or {}
+        self.fingerprint_field = fingerprint_field
+        self.fingerprint_fields = tuple(fingerprint_fields or ())
+
+        model_fields = {field.name for field in model._meta.concrete_fields}
+        self.write_fields = [c.field for c in columns if c.field in model_fields]
+        self.value_fields = [f for f in self.write_fields if f not in self.natural_key]
+        self.required_fields = list(dict.fromkeys(
+            [c.field for c in columns if c.required] + list(self.natural_key)
+        ))
+
+    def __str__(self):
+        return self.model._meta.label
+
+    def spec(self, fields=None):
+        """Picklable (source, field, dtype, default) tuples, optionally restricted to `fields`."""
+        return [(c.source, c.field, c.dtype, c.default) for c in self.columns if fields is None or c.field in fields]
+
+    def read_csv(self, path, chunksize=None, fields=None):
+        return read_frames(path, self.spec(fields), chunksize=chunksize)
+
+    def read_frame(self, path):
+        return parse_file(path, self.spec())
+
+    def missing_columns(self, path):
+        """Columns whose source header does not appear in the file."""
+        header = {str(name).strip().lower() for name in pd.read_csv(path, nrows=0).columns}
+        return [c for c in self.columns if c.source.strip().lower() not in header]
+
+    def existing(self, frame, fields=()):
+        """
+        {natural key: (fingerprint, *values of `fields`)} for rows already stored (without
+        the fingerprint when the dataset has none), fetched in chunks of the first key field.
+        """
+        meta = self.model._meta
+        key_attnames = [meta.get_field(name).attname for name in self.natural_key]
+        values = ([self.fingerprint_field] if self.fingerprint_field else []) + list(fields)
+        first_values = frame[self.natural_key[0]].dropna().unique().tolist()
+
+        stored = {}
+        for start in range(0, len(first_values), LOOKUP_CHUNK_SIZE):
+            chunk = first_values[start:start + LOOKUP_CHUNK_SIZE]
+            rows = self.model.objects.filter(**{f'{key_attnames[0]}__in': chunk}).values_list(*key_attnames, *values)
+            for row in rows:
+                key = row[:len(key_attnames)]
+                stored[key] = row[len(key_attnames):]
+        return stored
+
+    def sync(self, frame, lookups=None, batch_size=1000):
+        """
+        Upserts the rows of a coerced frame. `lookups` maps each lookup field to a
+        {natural value: id} dict. Returns counts plus human-readable skip messages.
+
+        Only the fields the file provides are written, so stored values of a column the
+        file lacks are kept; the fingerprint is computed over those stored values.
+        """
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'messages': []}
+        present = present_fields(frame)
+        value_fields = [field for field in self.value_fields if field in present]
+        kept_fields = [field for field in self.fingerprint_fields if field not in present]
+        frame = frame.copy()
+
+        for field in self.lookups:
+            mapping = (lookups or {}).get(field, {})
+            natural = frame[field]
+            frame[field] = natural.map(mapping).astype('Int64')
+            unknown = natural[natural.notna() & frame[field].isna()].unique().tolist()
+            if unknown:
+                result['messages'].append(
+                    f"{self.lookups[field]} not found for {self}: {', '.join(map(str, unknown[:20]))}"
+                    f"{'...' if len(unknown) > 20 else ''}"
+                )
+
+        valid = frame[self.required_fields].notna().all(axis=1)
+        result['skipped'] = int((~valid).sum())
+        frame = frame.loc[valid].drop_duplicates(subset=list(self.natural_key), keep='last')
+        if frame.empty:
+            return result
+
+        stored = self.existing(frame, kept_fields if self.fingerprint_field else ())
+        key_count = len(self.natural_key)
+        fields = list(self.natural_key) + value_fields
+        rows = missing_to_none(frame, fields)
+        if self.fingerprint_field:
+            # Fingerprint values come from the row, then from the stored (fingerprint, *kept) values
+            positions = [
+                fields.index(name) if name in fields else len(fields) + 1 + kept_fields.index(name)
+                for name in self.fingerprint_fields
+            ]
+            not_stored = (None,) * (1 + len(kept_fields))
+            fields.append(self.fingerprint_field)
+
+        to_write = []
+        for row in rows:
+            key = tuple(row[:key_count])
+            if self.fingerprint_field:
+                values = row + list(stored.get(key, not_stored))
+                fingerprint = self.model.compute_fingerprint([values[i] for i in positions])
+                if key in stored and stored[key][0] == fingerprint:
+                    result['unchanged'] += 1
+                    continue
+                row.append(fingerprint)
+            result['updated' if key in stored else 'inserted'] += 1
+            to_write.append(row)
+
+        upsert_rows(self.model, fields, to_write, self.natural_key, batch_size=batch_size)
+        if to_write:
+            versioning.bump(versioning.scope_for(self.model))
+        return result
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from analytics.benchmarks import run_benchmarks
+
+COLUMNS = (
+    ('endpoint', 'Endpoint', '<'), ('status', 'Status', '>'), ('p50_ms', 'p50 ms', '>'), ('p95_ms', 'p95 ms', '>'),
+    ('queries', 'Queries', '>'), ('peak_memory_kib', 'Peak KiB', '>'), ('response_bytes', 'Bytes', '>'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests every analytics, countries and tunisia endpoint through the test client against the '
+        'current database and reports p50/p95 latency, queries, peak memory and response size per endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint (default: 20).')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per endpoint first (default: 2).')
+        parser.add_argument('--cold', action='store_true',
+                            help='Clear the response cache and in-memory datasets before every request.')
+        parser.add_argument('--only', type=str, default=None,
+                            help='Comma-separated parts of URL names to benchmark, e.g. "inflation,ranking".')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['warmup'] < 0:
+            raise CommandError('--iterations must be at least 1 and --warmup at least 0.')
+        only = [part.strip() for part in options['only'].split(',') if part.strip()] if options['only'] else None
+        results = run_benchmarks(options['iterations'], options['warmup'], options['cold'], only)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        widths = [max(len(title), *(len(str(row[key])) for row in results)) for key, title, _ in COLUMNS]
+        self.stdout.write('  '.join(f'{title:{align}{width}}' for (_, title, align), width in zip(COLUMNS, widths)))
+        for row in results:
+            self.stdout.write('  '.join(f'{row[key]!s:{align}{width}}' for (key, _, align), width in zip(COLUMNS, widths)))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from analytics import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic countries/indicators and Tunisia governorates with their yearly data, '
+        'statistically similar to the real files, for scale testing. Synthetic rows are named '
+        f'"{synthetic.SYNTHETIC_PREFIX} ..." and can be removed with --clear.'
+    )
+
+    def add_arguments(self, parser):
+        # settings.BASE_DIR is backend/economic_platform/
+        repo_root = settings.BASE_DIR.parent.parent
+        parser.add_argument('--countries', type=int, default=200, help='Synthetic countries (default: 200).')
+        parser.add_argument('--years', type=int, default=20, help='Indicator years per country (default: 20).')
+        parser.add_argument('--start-year', type=int, default=2000, help='First indicator year (default: 2000).')
+        parser.add_argument('--governorates', type=int, default=0, help='Synthetic governorates (default: none).')
+        parser.add_argument('--governorate-years', type=int, default=5,
+                            help='Real estate and labor market years per governorate (default: 5).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--reference-file', type=str, default=str(repo_root / 'WHI_Inflation.csv'),
+                            help='WHI_Inflation.csv the indicator distributions are fitted to.')
+        parser.add_argument('--tunisia-data-dir', type=str, default=str(repo_root / 'newdata'),
+                            help='Directory with the Tunisia files the governorate distributions are fitted to.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk INSERT statement.')
+        parser.add_argument('--clear', action='store_true', help='Delete all synthetic rows instead of generating.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            countries, governorates = synthetic.clear_synthetic(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {countries} synthetic countries and {governorates} synthetic governorates with their data.'
+            ))
+            return
+
+        try:
+            if options['countries']:
+                rows = synthetic.generate_countries(
+                    options['reference_file'], options['countries'], options['years'], options['start_year'],
+                    seed=options['seed'], batch_size=options['batch_size'],
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{options['countries']} synthetic countries with {rows} indicator rows written."
+                ))
+            if options['governorates']:
+                synthetic.generate_governorates(
+                    options['tunisia_data_dir'], options['governorates'], options['governorate_years'],
+                    seed=options['seed'], batch_size=options['batch_size'],
+                )
+                self.stdout.write(self.style.SUCCESS(f"{options['governorates']} synthetic governorates written."))
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
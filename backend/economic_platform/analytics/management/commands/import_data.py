@@ -1,43 +1,66 @@
 import pandas as pd
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from countries.models import Country, EconomicIndicator # Assuming these are the final model names
+from countries.models import Country, INDICATOR_FIELDS
+from countries.datasets import WHI_INFLATION
+from countries.snapshots import refresh_latest_indicators
+from analytics import prediction, versioning
 from django.conf import settings # To construct file path
+import itertools
 import os
+import string
 import numpy as np # For mean calculation
 
-# Define expected CSV columns based on the model (after refinement)
-# These are the names as they appear in the CSV file.
-CSV_COLUMN_MAPPING = {
-    'Country': 'country_name', # Special handling: used to find/create Country object
-    'Year': 'year',
-    'Headline Consumer Price Inflation': 'headline_consumer_price_inflation',
-    'Energy Consumer Price Inflation': 'energy_consumer_price_inflation',
-    'Food Consumer Price Inflation': 'food_consumer_price_inflation',
-    'Official Core Consumer Price Inflation': 'official_core_consumer_price_inflation',
-    'Producer Price Inflation': 'producer_price_inflation',
-    'GDP Deflator Index Growth Rate': 'gdp_deflator_index_growth_rate',
-    'Score': 'happiness_score',
-    'GDP per Capita': 'gdp_per_capita',
-    'Social Support': 'social_support',
-    'Healthy Life Expectancy at Birth': 'healthy_life_expectancy_at_birth',
-    'Freedom to Make Life Choices': 'freedom_to_make_life_choices',
-    'Generosity': 'generosity',
-    'Perceptions of Corruption': 'perceptions_of_corruption',
-    # 'Continent/Region' is associated with Country model, not directly imported into EconomicIndicator here.
-    # It will be used to create/update Country.continent if not already set.
-    'Continent/Region': 'continent_region'
-}
-
-# Define which columns are numeric and might need cleaning/mean imputation
-NUMERIC_COLUMNS = [
+# Column mapping, dtypes and natural key live in the declarative WHI_INFLATION dataset.
+# Numeric columns are cleaned here (mean imputation) before the dataset writes them.
+NUMERIC_COLUMNS = list(INDICATOR_FIELDS)
+
+INFLATION_COLUMNS = [
     'headline_consumer_price_inflation', 'energy_consumer_price_inflation',
     'food_consumer_price_inflation', 'official_core_consumer_price_inflation',
-    'producer_price_inflation', 'gdp_deflator_index_growth_rate', 'happiness_score',
-    'gdp_per_capita', 'social_support', 'healthy_life_expectancy_at_birth',
-    'freedom_to_make_life_choices', 'generosity', 'perceptions_of_corruption'
+    'producer_price_inflation'
 ]
 
+# Rows per INSERT statement. Django further caps this to the backend's
+# parameter limit (e.g. 999 bound variables on SQLite).
+DEFAULT_BATCH_SIZE = 2000
+
+# CSV rows held in memory at once in --stream mode
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def split_continent_region(value):
+    """Splits "Continent / Region" into (continent, region); region is '' when absent."""
+    if value is None or pd.isna(value):
+        return None
+    parts = [p.strip() for p in str(value).split('/', 1)]
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+
+def derive_country_code(name, taken):
+    """
+    Country.code is unique but the CSV carries no ISO code, so new countries get a
+    3-character code derived from their name that does not collide with `taken`.
+    """
+    letters = ''.join(ch for ch in name.upper() if ch.isalpha()) or 'X'
+    alphabet = string.ascii_uppercase + string.digits
+
+    def candidates():
+        yield letters[:3]
+        for i, j in itertools.combinations(range(1, len(letters)), 2):
+            yield letters[0] + letters[i] + letters[j]
+        for a, b in itertools.product(alphabet, repeat=2):
+            yield letters[0] + a + b
+        for a, b, c in itertools.product(alphabet, repeat=3):
+            yield a + b + c
+
+    for candidate in candidates():
+        if len(candidate) == 3 and candidate not in taken:
+            taken.add(candidate)
+            return candidate
+    raise ValueError(f"Could not derive a unique country code for '{name}'.")
+
+
 class Command(BaseCommand):
     help = 'Imports economic data from WHI_Inflation.csv into the database.'
 
@@ -48,153 +71,221 @@ class Command(BaseCommand):
             help='Optional: The absolute path to the CSV file.',
                 default=os.path.join(settings.BASE_DIR, 'data', 'WHI_Inflation.csv') # Corrected path
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows per bulk INSERT statement (default: {DEFAULT_BATCH_SIZE}).'
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Read the CSV in chunks so memory stays flat regardless of file size.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'CSV rows per chunk in --stream mode (default: {DEFAULT_CHUNK_SIZE}).'
+        )
 
     @transaction.atomic
     def handle(self, *args, **options):
         file_path = options['file_path']
+        self.batch_size = options['batch_size']
         self.stdout.write(self.style.SUCCESS(f'Starting data import from {file_path}'))
 
         # Counters for logging
-        rows_processed = 0
-        countries_created = 0
-        countries_updated = 0
-        indicators_created = 0
-        indicators_updated = 0
-        errors = 0
-        # duplicates_skipped = 0 # Or how you define duplicates, current implementation updates
+        self.stats = {
+            'rows_processed': 0,
+            'countries_created': 0,
+            'countries_updated': 0,
+            'indicators_created': 0,
+            'indicators_updated': 0,
+            'indicators_unchanged': 0,
+            'predictions_refreshed': 0,
+            'errors': 0,
+        }
 
         try:
-            # 1. Read WHI_Inflation.csv using pandas
-            df = pd.read_csv(file_path)
-            rows_processed = len(df)
-            self.stdout.write(self.style.SUCCESS(f'Successfully read {rows_processed} rows from CSV.'))
-
-            # Rename columns to match model fields for easier processing
-            df_renamed = df.rename(columns=CSV_COLUMN_MAPPING)
-
-            # 2. Clean and validate data
-            # Handle missing values with column means for specified numeric columns
-            for col_model_name in NUMERIC_COLUMNS:
-                if col_model_name in df_renamed.columns:
-                    # Convert column to numeric, coercing errors to NaN
-                    df_renamed[col_model_name] = pd.to_numeric(df_renamed[col_model_name], errors='coerce')
-                    if df_renamed[col_model_name].isnull().any():
-                        mean_val = df_renamed[col_model_name].mean()
-                        df_renamed[col_model_name].fillna(mean_val, inplace=True)
-                        self.stdout.write(f"Filled NaN in '{col_model_name}' with mean: {mean_val:.2f}")
-                else:
-                    self.stdout.write(self.style.WARNING(f"Numeric column '{col_model_name}' (mapped from CSV) not found in DataFrame after renaming."))
-
-
-            # Validate data ranges (simple example for inflation)
-            inflation_cols = [
-                'headline_consumer_price_inflation', 'energy_consumer_price_inflation',
-                'food_consumer_price_inflation', 'official_core_consumer_price_inflation',
-                'producer_price_inflation'
-            ]
-            for col in inflation_cols:
-                if col in df_renamed.columns:
-                    if (df_renamed[col] < -50).any() or (df_renamed[col] > 200).any():
-                         self.stdout.write(self.style.WARNING(f"Warning: Column '{col}' contains values outside typical range (-50% to 200%)."))
-
-
-            # 3. Create/update Country records & EconomicIndicator records
-            for index, row in df_renamed.iterrows():
-                try:
-                    country_name = row.get('country_name')
-                    year_val = row.get('year') # Keep as year_val to avoid conflict with year column name
-                    continent_region = row.get('continent_region')
-
-                    if not country_name or pd.isna(country_name):
-                        self.stdout.write(self.style.ERROR(f"Skipping row {index+2} due to missing country name."))
-                        errors += 1
-                        continue
-
-                    if year_val is None or pd.isna(year_val):
-                        self.stdout.write(self.style.ERROR(f"Skipping row {index+2} for country {country_name} due to missing year."))
-                        errors += 1
-                        continue
-                    year_int = int(year_val)
-
-
-                    country_defaults = {}
-                    if continent_region and not pd.isna(continent_region):
-                        # Simple split: assumes "Continent / Region" or "Continent"
-                        parts = [p.strip() for p in continent_region.split('/', 1)]
-                        country_defaults['continent'] = parts[0]
-                        if len(parts) > 1:
-                            country_defaults['region'] = parts[1]
-                        else:
-                            # If no '/' is present, use the whole string for continent and leave region blank or as per model default
-                            country_defaults['region'] = '' # Or handle as needed by Country model (e.g. allow blank)
-
-
-                    country, created = Country.objects.update_or_create(
-                        name=country_name,
-                        defaults=country_defaults
-                    )
-                    if created:
-                        countries_created += 1
-                        # self.stdout.write(f"Created new country: {country_name}") # Less verbose
-                    else:
-                        updated_fields = False
-                        for key, value in country_defaults.items():
-                            if getattr(country, key) != value:
-                                setattr(country, key, value)
-                                updated_fields = True
-                        if updated_fields:
-                            country.save()
-                            countries_updated +=1
-                            # self.stdout.write(f"Updated existing country: {country_name}") # Less verbose
-
-
-                    # Prepare data for EconomicIndicator
-                    indicator_data = {} # Changed from {'country': country, 'year': year_int} to build dynamically
-                    for csv_col_header, model_field_name in CSV_COLUMN_MAPPING.items():
-                        # model_field_name is the key in df_renamed (already mapped)
-                        # We need to check if this model_field_name is one of the target fields for EconomicIndicator
-                        # (i.e., it's in NUMERIC_COLUMNS or other specific fields like 'year')
-                        if model_field_name in NUMERIC_COLUMNS: # Check against the list of numeric fields for the indicator
-                            if model_field_name in row and not pd.isna(row[model_field_name]):
-                                indicator_data[model_field_name] = row[model_field_name]
-
-                    # Create or update EconomicIndicator
-                    indicator, ei_created = EconomicIndicator.objects.update_or_create(
-                        country=country,
-                        year=year_int,
-                        defaults=indicator_data
-                    )
-                    if ei_created:
-                        indicators_created += 1
-                    else:
-                        indicators_updated += 1
-
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error processing row {index+2} for country '{row.get('country_name')}': {e}"))
-                    errors += 1
-                    continue
+            if options['stream']:
+                self.import_stream(file_path, options['chunk_size'])
+            else:
+                self.import_in_memory(file_path)
 
             self.stdout.write(self.style.SUCCESS('Data import process completed.'))
 
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f"Error: The file {file_path} was not found."))
             self.stdout.write(self.style.WARNING(f"Please ensure WHI_Inflation.csv is in 'backend/economic_platform/data/', or specify the correct path with --file-path."))
-            errors +=1
+            self.stats['errors'] += 1
         except pd.errors.EmptyDataError:
             self.stdout.write(self.style.ERROR(f"Error: The file {file_path} is empty or not valid CSV."))
-            errors +=1
+            self.stats['errors'] += 1
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"An unexpected error occurred: {e}"))
             self.stdout.write(self.style.ERROR(f"Error type: {type(e).__name__}"))
             import traceback
             self.stdout.write(self.style.ERROR(f"Traceback: {traceback.format_exc()}"))
-            errors +=1
+            self.stats['errors'] += 1
         finally:
             self.stdout.write("--- Import Statistics ---")
-            self.stdout.write(f"Total rows in CSV read: {rows_processed}")
-            self.stdout.write(f"Countries created: {countries_created}")
-            self.stdout.write(f"Countries updated: {countries_updated}")
-            self.stdout.write(f"Economic Indicators created: {indicators_created}")
-            self.stdout.write(f"Economic Indicators updated (or found existing): {indicators_updated}")
-            self.stdout.write(f"Rows with errors/skipped: {errors}")
+            self.stdout.write(f"Total rows in CSV read: {self.stats['rows_processed']}")
+            self.stdout.write(f"Countries created: {self.stats['countries_created']}")
+            self.stdout.write(f"Countries updated: {self.stats['countries_updated']}")
+            self.stdout.write(f"Economic Indicators created: {self.stats['indicators_created']}")
+            self.stdout.write(f"Economic Indicators updated: {self.stats['indicators_updated']}")
+            self.stdout.write(f"Economic Indicators unchanged (skipped): {self.stats['indicators_unchanged']}")
+            self.stdout.write(f"Happiness predictions refreshed: {self.stats['predictions_refreshed']}")
+            self.stdout.write(f"Rows with errors/skipped: {self.stats['errors']}")
             self.stdout.write("-------------------------")
+
+    def import_in_memory(self, file_path):
+        # 1. Read WHI_Inflation.csv; columns come back renamed to model fields and type-coerced
+        numeric_cols = self.present_numeric_columns(file_path)
+        df = WHI_INFLATION.read_frame(file_path)
+        self.stats['rows_processed'] = len(df)
+        self.stdout.write(self.style.SUCCESS(f'Successfully read {len(df)} rows from CSV.'))
+
+        # 2. Clean and validate data
+        # Handle missing values with column means for specified numeric columns
+        means = {col: df[col].mean() for col in numeric_cols if df[col].isnull().any()}
+        self.report_means(means)
+        self.fill_missing(df, means)
+        self.warn_out_of_range({col: (df[col].min(), df[col].max()) for col in numeric_cols})
+
+        # 3. Create/update Country records & EconomicIndicator records in bulk
+        self.write_frame(df)
+
+    def import_stream(self, file_path, chunk_size):
+        """
+        Two passes over the file with chunked readers, so memory is bounded by `chunk_size`:
+        the first pass only parses numeric columns to collect the imputation means and value
+        ranges, the second cleans each chunk and writes it through the bulk path.
+        """
+        numeric_cols = self.present_numeric_columns(file_path)
+
+        # Pass 1: global statistics
+        sums = pd.Series(0.0, index=numeric_cols)
+        counts = pd.Series(0, index=numeric_cols)
+        mins = pd.Series(np.nan, index=numeric_cols)
+        maxs = pd.Series(np.nan, index=numeric_cols)
+        total_rows = 0
+        for chunk in WHI_INFLATION.read_csv(file_path, chunksize=chunk_size, fields=numeric_cols):
+            total_rows += len(chunk)
+            sums += chunk[numeric_cols].sum()
+            counts += chunk[numeric_cols].count()
+            mins = np.fmin(mins, chunk[numeric_cols].min())
+            maxs = np.fmax(maxs, chunk[numeric_cols].max())
+
+        self.stats['rows_processed'] = total_rows
+        self.stdout.write(self.style.SUCCESS(f'Scanned {total_rows} rows from CSV (streaming, chunk size {chunk_size}).'))
+        means = {col: sums[col] / counts[col] if counts[col] else np.nan
+                 for col in numeric_cols if counts[col] < total_rows}
+        self.report_means(means)
+        self.warn_out_of_range({col: (mins[col], maxs[col]) for col in numeric_cols})
+
+        # Pass 2: clean and write chunk by chunk
+        for chunk in WHI_INFLATION.read_csv(file_path, chunksize=chunk_size):
+            self.fill_missing(chunk, means)
+            self.write_frame(chunk)
+
+    def present_numeric_columns(self, file_path):
+        missing = {column.field for column in WHI_INFLATION.missing_columns(file_path)}
+        if {'country', 'year'} & missing:
+            raise ValueError("CSV must contain 'Country' and 'Year' columns.")
+        present = []
+        for col_model_name in NUMERIC_COLUMNS:
+            if col_model_name not in missing:
+                present.append(col_model_name)
+            else:
+                self.stdout.write(self.style.WARNING(f"Numeric column '{col_model_name}' (mapped from CSV) not found in DataFrame after renaming."))
+        return present
+
+    def report_means(self, means):
+        for col, mean_val in means.items():
+            self.stdout.write(f"Filled NaN in '{col}' with mean: {mean_val:.2f}")
+
+    def fill_missing(self, df, means):
+        if means:
+            df.fillna(value=means, inplace=True)
+
+    def warn_out_of_range(self, ranges):
+        # Validate data ranges (simple example for inflation)
+        for col in INFLATION_COLUMNS:
+            if col in ranges:
+                low, high = ranges[col]
+                if low < -50 or high > 200:
+                    self.stdout.write(self.style.WARNING(f"Warning: Column '{col}' contains values outside typical range (-50% to 200%)."))
+
+    def write_frame(self, df):
+        df_valid = self.drop_invalid_rows(df)
+        country_ids = self.resolve_countries(df_valid)
+        self.upsert_indicators(df_valid, country_ids)
+
+    def drop_invalid_rows(self, df):
+        """Drops rows without a country name or year and de-duplicates on (country, year), last row wins."""
+        valid = df['country'].notna() & df['year'].notna()
+
+        invalid_rows = df.index[~valid]
+        if len(invalid_rows):
+            preview = ', '.join(str(i + 2) for i in invalid_rows[:10])
+            self.stdout.write(self.style.ERROR(
+                f"Skipping {len(invalid_rows)} row(s) with missing country name or year (CSV rows: {preview}{'...' if len(invalid_rows) > 10 else ''})."
+            ))
+            self.stats['errors'] += len(invalid_rows)
+
+        return df.loc[valid].drop_duplicates(subset=['country', 'year'], keep='last')
+
+    def resolve_countries(self, df):
+        """Creates missing countries and syncs continent/region in bulk. Returns {name: country_id}."""
+        # groupby().last() skips NaN, so each country keeps its most recent non-empty region
+        regions = df.groupby('country', sort=False)['continent_region'].last()
+
+        names = list(regions.index)
+        existing = Country.objects.in_bulk(names, field_name='name')
+
+        to_create = []
+        to_update = []
+        taken_codes = None
+        for name, continent_region in regions.items():
+            parsed = split_continent_region(continent_region)
+            country = existing.get(name)
+            if country is None:
+                if taken_codes is None:
+                    taken_codes = set(Country.objects.values_list('code', flat=True))
+                continent, region = parsed or ('', '')
+                to_create.append(Country(
+                    name=name,
+                    code=derive_country_code(name, taken_codes),
+                    continent=continent,
+                    region=region,
+                ))
+            elif parsed and (country.continent, country.region) != parsed:
+                country.continent, country.region = parsed
+                to_update.append(country)
+
+        if to_create:
+            Country.objects.bulk_create(to_create, batch_size=self.batch_size)
+            self.stats['countries_created'] += len(to_create)
+            existing.update(Country.objects.in_bulk([c.name for c in to_create], field_name='name'))
+        if to_update:
+            Country.objects.bulk_update(to_update, ['continent', 'region'], batch_size=self.batch_size)
+            self.stats['countries_updated'] += len(to_update)
+        if to_create or to_update:
+            versioning.bump(versioning.COUNTRIES)
+
+        return {name: country.pk for name, country in existing.items()}
+
+    def upsert_indicators(self, df, country_ids):
+        """Writes new and changed indicator rows; rows whose fingerprint is unchanged are skipped."""
+        if df.empty:
+            return
+        result = WHI_INFLATION.sync(df, lookups={'country': country_ids}, batch_size=self.batch_size)
+        self.stats['indicators_created'] += result['inserted']
+        self.stats['indicators_updated'] += result['updated']
+        self.stats['indicators_unchanged'] += result['unchanged']
+        if result['inserted'] or result['updated']:
+            touched = [country_ids[name] for name in df['country'].unique()]
+            refresh_latest_indicators(touched, batch_size=self.batch_size)
+            self.stats['predictions_refreshed'] += prediction.refresh(touched, batch_size=self.batch_size)
@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from analytics import prediction
+
+
+class Command(BaseCommand):
+    help = (
+        'Fits the happiness-score model on the stored economic indicators, saves it for the '
+        'web workers and precomputes a prediction for every indicator row.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str,
+                            help=f'Model file to write (default: {prediction.model_path()}); requires --skip-precompute '
+                                 'unless it is that file, since the workers only serve that model.')
+        parser.add_argument('--skip-training', action='store_true',
+                            help='Only refresh the stored predictions with the current persisted model.')
+        parser.add_argument('--skip-precompute', action='store_true', help='Only train and save the model.')
+        parser.add_argument('--chunk-size', type=int, default=prediction.PRECOMPUTE_CHUNK_SIZE,
+                            help='Indicator rows predicted per chunk.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if output and os.path.abspath(output) != os.path.abspath(prediction.model_path()) and not options['skip_precompute']:
+            raise CommandError(
+                f"Predictions are only precomputed with the model the web workers serve ({prediction.model_path()}). "
+                f"Use --skip-precompute to write a model elsewhere."
+            )
+        try:
+            if options['skip_training']:
+                model = prediction.get_model()
+                self.stdout.write(f"Using persisted model {model.version}.")
+            else:
+                model = prediction.train(options['output'])
+                r2 = f"{model.r2:.4f}" if model.r2 is not None else 'n/a'
+                self.stdout.write(self.style.SUCCESS(
+                    f"Trained {model.version} on {model.n_samples} rows (in-sample R²: {r2}); "
+                    f"saved to {options['output'] or prediction.model_path()}."
+                ))
+        except prediction.ModelNotAvailable as e:
+            raise CommandError(str(e))
+
+        if not options['skip_precompute']:
+            with transaction.atomic():
+                count = prediction.precompute(model, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Stored predictions for {count} indicator rows."))
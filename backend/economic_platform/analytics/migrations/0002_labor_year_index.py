@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('tunisia', '0003_ranking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='labormarketdata',
+            index=models.Index(fields=['year', 'governorate'], name='labor_year_gov_idx'),
+        ),
+    ]
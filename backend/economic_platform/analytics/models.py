@@ -14,6 +14,10 @@ class LaborMarketData(models.Model):
     class Meta:
         unique_together = ['governorate', 'year']
         verbose_name_plural = "Labor Market Data"
+        indexes = [
+            # Year ranges across governorates
+            models.Index(fields=['year', 'governorate'], name='labor_year_gov_idx'),
+        ]
 
     def __str__(self):
         return f"{self.governorate.name} - {self.year} Labor Data"
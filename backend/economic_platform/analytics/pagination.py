@@ -0,0 +1,164 @@
+"""
+Cursor pagination and streamed JSON for the list endpoints that grow with the data.
+
+?limit=N (optionally with ?cursor=) answers {'results': [...], 'next_cursor': ...}:
+one page in the listing's order, selected with a keyset condition (rows after the
+last one returned) instead of an offset, so deep pages do not re-read the rows before
+them and rows written meanwhile are neither skipped nor repeated. next_cursor is
+passed back as ?cursor= and is null on the last page.
+
+?stream=1 answers the whole list as a JSON array written while the rows are read with
+QuerySet.iterator(chunk_size), so memory is bounded by the chunk rather than the
+result. The body is produced after the view has returned: its queries are not in
+Server-Timing or the request metrics, and it is not cached.
+
+Without these parameters the endpoints answer the plain list, as before.
+
+Only the listings that grow with the number of countries use this module: the country
+list (keyed on name) and the happiness predictions (keyed on country, year).
+country_detail_data and inflation_trends build no queryset: they answer at most one
+row per year, sliced or averaged from the in-memory indicator cube, so their size does
+not grow with the country count and there is nothing to page through or stream.
+"""
+import base64
+import binascii
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .api import InvalidRequest, alist, int_param
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched from the database and encoded per chunk of a streamed response
+STREAM_CHUNK_SIZE = 2000
+
+STREAM_PARAM = 'stream'
+ENABLED_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """The ordering values in `cursor`; InvalidRequest unless it holds `length` scalars."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise InvalidRequest('Invalid cursor.')
+    if not isinstance(values, list) or len(values) != length \
+            or not all(isinstance(value, (str, int, float)) for value in values):
+        raise InvalidRequest('Invalid cursor.')
+    return values
+
+
+def after(ordering, values):
+    """Q for the rows strictly after `values` in `ordering` (ascending fields)."""
+    condition = Q(**{f'{ordering[-1]}__gt': values[-1]})
+    for field, value in zip(reversed(ordering[:-1]), reversed(values[:-1])):
+        condition = Q(**{f'{field}__gt': value}) | Q(**{field: value}) & condition
+    return condition
+
+
+def _json(item):
+    # As DRF's JSONRenderer writes it
+    return json.dumps(item, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+
+class Listing:
+    """
+    A paginated, streamable list endpoint: `ordering` is a unique ascending order of its
+    queryset, `key(row)` a row's values of those fields and `to_items(rows)` the
+    response items of some rows.
+    """
+
+    def __init__(self, ordering, key, to_items):
+        self.ordering = tuple(ordering)
+        self.key = key
+        self.to_items = to_items
+
+    def page_request(self, params):
+        """(limit, cursor values or None) asked for by ?limit and ?cursor; None for the plain list."""
+        limit, cursor = int_param(params, 'limit'), params.get('cursor')
+        if limit is None and not cursor:
+            return None
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise InvalidRequest(f'limit must be between 1 and {MAX_PAGE_SIZE}.')
+        return limit, decode_cursor(cursor, len(self.ordering)) if cursor else None
+
+    def page_queryset(self, queryset, limit, values):
+        """The page's rows plus one, which tells whether another page follows."""
+        if values is not None:
+            try:
+                queryset = queryset.filter(after(self.ordering, values))
+            except (TypeError, ValueError, ValidationError):
+                raise InvalidRequest('Invalid cursor.')
+        return queryset.order_by(*self.ordering)[:limit + 1]
+
+    def page(self, rows, limit):
+        rows = list(rows)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {'results': self.to_items(rows), 'next_cursor': encode_cursor(list(self.key(rows[-1]))) if more else None}
+
+    def data(self, queryset, params):
+        """The response data: one page, or the whole list."""
+        request = self.page_request(params)
+        if request is None:
+            return self.to_items(queryset)
+        limit, values = request
+        return self.page(self.page_queryset(queryset, limit, values), limit)
+
+    async def adata(self, queryset, params):
+        request = self.page_request(params)
+        if request is None:
+            return self.to_items(await alist(queryset))
+        limit, values = request
+        return self.page(await alist(self.page_queryset(queryset, limit, values)), limit)
+
+    def stream(self, queryset, chunk_size=None):
+        return StreamingHttpResponse(self._chunks(queryset, chunk_size or STREAM_CHUNK_SIZE), content_type='application/json')
+
+    def astream(self, queryset, chunk_size=None):
+        return StreamingHttpResponse(self._achunks(queryset, chunk_size or STREAM_CHUNK_SIZE), content_type='application/json')
+
+    def _encode(self, rows, first):
+        return ('' if first else ',') + ','.join(map(_json, self.to_items(rows)))
+
+    def _chunks(self, queryset, chunk_size):
+        yield '['
+        rows = queryset.iterator(chunk_size=chunk_size)
+        first = True
+        while chunk := list(islice(rows, chunk_size)):
+            yield self._encode(chunk, first)
+            first = False
+        yield ']'
+
+    async def _achunks(self, queryset, chunk_size):
+        # Not QuerySet.aiterator(): it starts values()/values_list() queries on the event
+        # loop, which raises SynchronousOnlyOperation. The iterator is lazy, so every
+        # fetch, the first included, runs in the request's database thread here.
+        rows = queryset.iterator(chunk_size=chunk_size)
+        next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+        yield '['
+        first = True
+        while chunk := await next_chunk():
+            yield self._encode(chunk, first)
+            first = False
+        yield ']'
+
+
+def streamed(params):
+    """Whether ?stream= asks for a streamed response; it cannot be combined with pagination."""
+    if params.get(STREAM_PARAM, '').lower() not in ENABLED_VALUES:
+        return False
+    if params.get('limit') or params.get('cursor'):
+        raise InvalidRequest('stream cannot be combined with limit or cursor.')
+    return True
@@ -0,0 +1,151 @@
+"""
+Principal component analysis of the indicator cube.
+
+The standardization and components are fitted once per 'countries' dataset version and
+saved under settings.VAR_DIR, so other workers and restarts load them instead of
+refitting; serving projections is then a matrix multiply.
+"""
+import glob
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+from countries.models import INDICATOR_FIELDS
+
+from .cube import get_cube
+
+# Happiness is what the components are used to explain, so it is not an input
+PCA_FEATURES = tuple(f for f in INDICATOR_FIELDS if f != 'happiness_score')
+N_COMPONENTS = 2
+
+# Fitted models kept on disk (older versions are removed)
+KEEP_VERSIONS = 3
+
+
+class PCAModel:
+    def __init__(self, version, features, mean, scale, components, explained_variance_ratio, n_samples):
+        self.version = version
+        self.features = tuple(features)
+        self.mean = mean
+        self.scale = scale
+        self.components = components
+        self.explained_variance_ratio = explained_variance_ratio
+        self.n_samples = int(n_samples)
+
+    @classmethod
+    def fit(cls, cube, features=PCA_FEATURES, n_components=N_COMPONENTS):
+        """Fits on every stored (country, year) row that has all `features`."""
+        observations = cube.values[cube.present][:, [cube.metric_index[f] for f in features]]
+        observations = observations[~np.isnan(observations).any(axis=1)]
+        n_components = min(n_components, *observations.shape) if len(observations) else 0
+
+        if n_components == 0:
+            empty = np.zeros((0, len(features)))
+            return cls(cube.version, features, np.zeros(len(features)), np.ones(len(features)), empty, np.zeros(0), 0)
+
+        mean = observations.mean(axis=0)
+        scale = observations.std(axis=0)
+        scale[scale == 0] = 1.0
+        _, singular_values, components = np.linalg.svd((observations - mean) / scale, full_matrices=False)
+        # Deterministic signs: the largest loading of each component is positive
+        signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+        components *= signs[:, None]
+        variance = singular_values ** 2
+        ratio = variance / variance.sum() if variance.sum() else np.zeros_like(variance)
+        return cls(cube.version, features, mean, scale, components[:n_components], ratio[:n_components], len(observations))
+
+    def transform(self, values):
+        """Projects rows of `values` (in `features` order) onto the fitted components."""
+        return ((values - self.mean) / self.scale) @ self.components.T
+
+    def loadings(self):
+        return {
+            f'PC{i + 1}': {feature: round(float(v), 4) for feature, v in zip(self.features, component)}
+            for i, component in enumerate(self.components)
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as handle:
+            np.savez(
+                handle, features=np.array(self.features), mean=self.mean, scale=self.scale,
+                components=self.components, explained_variance_ratio=self.explained_variance_ratio,
+                n_samples=self.n_samples,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, version):
+        with np.load(path) as data:
+            return cls(
+                version, data['features'].tolist(), data['mean'], data['scale'], data['components'],
+                data['explained_variance_ratio'], data['n_samples'],
+            )
+
+
+def _model_path(version):
+    return os.path.join(settings.VAR_DIR, 'pca', f'{version}.npz')
+
+
+def _prune(directory, keep):
+    paths = sorted(glob.glob(os.path.join(directory, '*.npz')), key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_model = None
+_lock = threading.Lock()
+
+
+def get_model(cube=None):
+    """The PCA model for the current dataset version: in memory, else from disk, else fitted and saved."""
+    global _model
+    cube = cube or get_cube()
+    model = _model
+    if model is not None and model.version == cube.version:
+        return model
+    with _lock:
+        if _model is None or _model.version != cube.version:
+            path = _model_path(cube.version)
+            try:
+                _model = PCAModel.load(path, cube.version)
+            except (FileNotFoundError, OSError, KeyError, ValueError):
+                _model = PCAModel.fit(cube)
+                _model.save(path)
+                _prune(os.path.dirname(path), KEEP_VERSIONS)
+        return _model
+
+
+def project_countries(cube, model, year=None):
+    """
+    PC coordinates per country, from the country's latest row with every feature (or
+    its row for `year`). Returns a list of dicts ordered by country name.
+    """
+    features = cube.values[:, :, [cube.metric_index[f] for f in model.features]]
+    complete = cube.present & ~np.isnan(features).any(axis=2)
+    if year is not None:
+        complete &= (cube.years == year)[None, :]
+
+    countries = np.flatnonzero(complete.any(axis=1))
+    if not len(countries) or not len(model.components):
+        return []
+    # Last complete year per country
+    years = complete.shape[1] - 1 - complete[countries, ::-1].argmax(axis=1)
+    scores = model.transform(features[countries, years])
+
+    points = []
+    for i, (country, year_index) in enumerate(zip(countries, years)):
+        point = {
+            'country': cube.names[country],
+            'code': cube.codes[country],
+            'continent': cube.continents[country],
+            'year': int(cube.years[year_index]),
+        }
+        point.update({f'pc{k + 1}': round(float(v), 4) for k, v in enumerate(scores[i])})
+        points.append(point)
+    return points
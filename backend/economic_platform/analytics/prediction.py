@@ -0,0 +1,190 @@
+"""
+Happiness-score prediction.
+
+The notebook's best model is an ordinary least-squares LinearRegression over the
+socio-economic indicators; it is refitted here with NumPy (same estimator, no
+scikit-learn at serving time) by `manage.py train_happiness_model` and saved as .npz.
+A pickled estimator exported from the notebook can be used instead by pointing
+settings.HAPPINESS_MODEL_PATH at a .pkl file; it must take the features in
+HAPPINESS_FEATURES order.
+
+Each worker loads the model once (again only if the file is replaced) and predicts
+whole batches with one vectorized call. The stored predictions always come from that
+same model: the import commands refresh them for the countries they wrote (`refresh`).
+"""
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+from django.conf import settings
+from countries.models import EconomicIndicator, HappinessPrediction, INDICATOR_FIELDS
+
+from . import versioning
+from .ingestion import upsert_rows
+
+TARGET = 'happiness_score'
+HAPPINESS_FEATURES = tuple(f for f in INDICATOR_FIELDS if f != TARGET)
+
+# Indicator rows read per chunk when precomputing predictions
+PRECOMPUTE_CHUNK_SIZE = 50000
+
+
+class ModelNotAvailable(Exception):
+    pass
+
+
+class LinearHappinessModel:
+    """OLS with an intercept. Missing inputs are imputed with the training means."""
+
+    def __init__(self, coef, intercept, fill_values, n_samples=0, r2=None):
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = float(intercept)
+        self.fill_values = np.asarray(fill_values, dtype=float)
+        self.n_samples = int(n_samples)
+        self.r2 = None if r2 is None or np.isnan(r2) else float(r2)
+        digest = hashlib.blake2b(np.r_[self.coef, self.intercept].tobytes(), digest_size=8).hexdigest()
+        self.version = f'linear-{digest}'
+
+    @classmethod
+    def fit(cls, features, target):
+        features = np.asarray(features, dtype=float)
+        target = np.asarray(target, dtype=float)
+        present = ~np.isnan(features)
+        counts = present.sum(axis=0)
+        # Column means over present values; 0 for columns that are entirely missing
+        fill_values = np.divide(np.where(present, features, 0.0).sum(axis=0), counts,
+                                out=np.zeros(features.shape[1]), where=counts > 0)
+        filled = np.where(np.isnan(features), fill_values, features)
+
+        design = np.column_stack([filled, np.ones(len(filled))])
+        solution = np.linalg.lstsq(design, target, rcond=None)[0]
+        residual = target - design @ solution
+        total = ((target - target.mean()) ** 2).sum()
+        r2 = 1 - (residual ** 2).sum() / total if total else np.nan
+        return cls(solution[:-1], solution[-1], fill_values, len(target), r2)
+
+    def predict(self, features):
+        features = np.asarray(features, dtype=float)
+        return np.where(np.isnan(features), self.fill_values, features) @ self.coef + self.intercept
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as handle:
+            np.savez(handle, features=np.array(HAPPINESS_FEATURES), coef=self.coef, intercept=self.intercept,
+                     fill_values=self.fill_values, n_samples=self.n_samples,
+                     r2=np.nan if self.r2 is None else self.r2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if tuple(data['features'].tolist()) != HAPPINESS_FEATURES:
+                raise ModelNotAvailable(f'{path} was trained on different features; retrain it.')
+            return cls(data['coef'], data['intercept'], data['fill_values'], data['n_samples'], data['r2'])
+
+
+class PickledEstimator:
+    """Adapter for an estimator with a scikit-learn style predict(), e.g. exported from the notebook."""
+
+    def __init__(self, estimator, version):
+        self.estimator = estimator
+        self.n_samples = 0
+        self.r2 = None
+        self.version = version
+
+    def predict(self, features):
+        return np.asarray(self.estimator.predict(np.asarray(features, dtype=float)), dtype=float)
+
+
+def model_path():
+    return str(getattr(settings, 'HAPPINESS_MODEL_PATH', None) or os.path.join(settings.VAR_DIR, 'models', 'happiness_linear.npz'))
+
+
+def load_model(path):
+    if path.endswith('.pkl'):
+        with open(path, 'rb') as handle:
+            payload = handle.read()
+        return PickledEstimator(pickle.loads(payload), 'pickle-' + hashlib.blake2b(payload, digest_size=8).hexdigest())
+    return LinearHappinessModel.load(path)
+
+
+_loaded = (None, None)  # ((path, mtime), model)
+_lock = threading.Lock()
+
+
+def get_model():
+    """The persisted model, loaded once per worker and reloaded only when its file changes."""
+    global _loaded
+    path = model_path()
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        raise ModelNotAvailable('No happiness model has been trained yet. Run "manage.py train_happiness_model".')
+    if _loaded[0] == key:
+        return _loaded[1]
+    with _lock:
+        if _loaded[0] != key:
+            _loaded = (key, load_model(path))
+        return _loaded[1]
+
+
+def train(path=None):
+    """Fits the linear model on every indicator row with a happiness score and saves it."""
+    rows = EconomicIndicator.objects.exclude(**{f'{TARGET}__isnull': True}).values_list(*HAPPINESS_FEATURES, TARGET)
+    data = np.array(list(rows), dtype=float).reshape(-1, len(HAPPINESS_FEATURES) + 1)
+    if not len(data):
+        raise ModelNotAvailable('No indicator rows with a happiness score to train on.')
+    model = LinearHappinessModel.fit(data[:, :-1], data[:, -1])
+    model.save(path or model_path())
+    return model
+
+
+def precompute(model, chunk_size=PRECOMPUTE_CHUNK_SIZE, batch_size=2000, country_ids=None):
+    """
+    Predicts every EconomicIndicator row (of `country_ids` if given) in chunks and upserts
+    HappinessPrediction. Returns the row count.
+    """
+    rows = EconomicIndicator.objects.order_by()
+    if country_ids is not None:
+        rows = rows.filter(country_id__in=list(country_ids))
+    rows = rows.values_list('id', *HAPPINESS_FEATURES).iterator(chunk_size=chunk_size)
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            total += _store_predictions(model, chunk, batch_size)
+            chunk = []
+    total += _store_predictions(model, chunk, batch_size)
+    versioning.bump(versioning.COUNTRIES)
+    return total
+
+
+def refresh(country_ids=None, batch_size=2000):
+    """
+    Re-predicts the indicator rows of `country_ids` (all if None) with the model the
+    workers serve, after an import inserted or changed them. Returns the row count;
+    0 while no model has been trained.
+    """
+    try:
+        model = get_model()
+    except ModelNotAvailable:
+        return 0
+    return precompute(model, batch_size=batch_size, country_ids=country_ids)
+
+
+def _store_predictions(model, chunk, batch_size):
+    if not chunk:
+        return 0
+    data = np.array(chunk, dtype=float)
+    predictions = model.predict(data[:, 1:])
+    ids = [row[0] for row in chunk]
+    upsert_rows(
+        HappinessPrediction, ['indicator', 'predicted_score', 'model_version'],
+        [[i, float(p), model.version] for i, p in zip(ids, predictions)],
+        unique_fields=('indicator',), batch_size=batch_size,
+    )
+    return len(chunk)
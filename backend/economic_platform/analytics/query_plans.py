@@ -0,0 +1,63 @@
+"""
+Query-plan inspection for regression tests.
+
+`full_scans(queries)` runs EXPLAIN on captured queries (CaptureQueriesContext) and
+returns the ones that read some table without an index. SQLite ("SCAN <table>" in
+EXPLAIN QUERY PLAN) and PostgreSQL ("Seq Scan on <table>") are understood; other
+backends report nothing.
+"""
+import re
+
+from django.db import connection as default_connection
+
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)$')
+# Derived tables (subqueries in FROM, CTEs) are scanned by design; their base tables get their own lines
+_SQLITE_DERIVED = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\S+)')
+_POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\S+)')
+# FROM/JOIN "table" alias: the ORM aliases tables in subqueries (U0, U1, ...) and plans name the alias
+_TABLE_ALIAS = re.compile(r'(?:FROM|JOIN) "([^"]+)" "?(\w+)"?')
+
+
+def explain(sql, params=(), connection=default_connection):
+    """The backend's plan for `sql` as a list of lines."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [row[0] for row in cursor.fetchall()]
+    return []
+
+
+def scanned_tables(plan, vendor, sql=''):
+    """Tables that `plan` (of `sql`) reads in full, without any index."""
+    pattern = _SQLITE_FULL_SCAN if vendor == 'sqlite' else _POSTGRES_FULL_SCAN
+    derived = {match.group(1) for match in map(_SQLITE_DERIVED.search, plan) if match}
+    aliases = {alias: table for table, alias in _TABLE_ALIAS.findall(sql) if alias.upper() not in ('ON', 'WHERE')}
+    tables = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if match:
+            name = match.group(1).strip('"')
+            if name not in derived and not name.startswith('('):
+                tables.append(aliases.get(name, name))
+    return tables
+
+
+def full_scans(queries, allowed_tables=(), connection=default_connection):
+    """
+    [(sql, scanned tables, plan)] for the captured `queries` that scan a table outside
+    `allowed_tables` (e.g. tables an endpoint deliberately loads whole). Only SELECTs
+    are explained; captured SQL has its parameters inlined, so each is explained as run.
+    """
+    offenders = []
+    for query in queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        plan = explain(sql, connection=connection)
+        tables = [t for t in scanned_tables(plan, connection.vendor, sql) if t not in allowed_tables]
+        if tables:
+            offenders.append((sql, tables, plan))
+    return offenders
@@ -0,0 +1,70 @@
+"""
+Response formats of the time-series endpoints.
+
+Besides the default JSON, those endpoints can answer in a columnar shape, one list per
+field under 'years' and the metric names (as the governorate trends already do), in
+place of one object per year repeating every field name:
+
+    Accept: application/vnd.columnar+json     or ?format=columnar
+    Accept: application/msgpack               or ?format=msgpack (columnar, MessagePack)
+
+MessagePack is optional: the format is offered only when the msgpack package is
+installed. Views ask `columnar(request)` which shape to build, so columns are taken
+straight from the cube's arrays or the query rows rather than transposed afterwards.
+"""
+import datetime
+import decimal
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+    columnar = True
+
+
+def _msgpack_default(value):
+    # The types DRF's JSONEncoder handles that appear in the payloads
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'Cannot serialize {type(value).__name__} to MessagePack.')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+# Renderers of the time-series endpoints, the defaults first so plain JSON stays the default
+TIME_SERIES_RENDERERS = [
+    *api_settings.DEFAULT_RENDERER_CLASSES,
+    ColumnarJSONRenderer,
+    *([MessagePackRenderer] if msgpack is not None else []),
+]
+# The async variants have no browsable API
+ASYNC_TIME_SERIES_RENDERERS = [renderer for renderer in TIME_SERIES_RENDERERS if renderer.format != 'api']
+
+# Media types of API responses derived from the datasets (economic_platform.middleware tags them)
+DATA_MEDIA_TYPES = ('application/json', ColumnarJSONRenderer.media_type, MessagePackRenderer.media_type)
+
+
+def columnar(request):
+    """Whether the renderer negotiated for `request` wants the columnar shape."""
+    return getattr(getattr(request, 'accepted_renderer', None), 'columnar', False)
@@ -0,0 +1,101 @@
+"""
+In-memory country search index.
+
+Every suffix of every lower-cased country name is kept in one sorted list, so the
+names containing a query (what `icontains` matched) are a contiguous range found by
+bisection, and a match at suffix offset 0 is a name-prefix match. Results carry the
+happiness score of the latest dataset year, read with the countries from the
+LatestEconomicIndicator snapshot in one query when the index is (re)built.
+"""
+import heapq
+import threading
+from bisect import bisect_left
+
+import numpy as np
+from countries.models import Country
+
+from . import versioning
+
+DEFAULT_LIMIT = 10
+
+
+class CountrySearchIndex:
+    def __init__(self, version, countries):
+        """`countries`: (name, code, continent, region, latest year, happiness score, year of the score) tuples."""
+        self.version = version
+        countries = list(countries)
+        latest_year = max((c[4] for c in countries if c[4] is not None), default=None)
+        self.records = [
+            {
+                'name': name,
+                'code': code,
+                'continent': continent,
+                'region': region,
+                # Score for the latest year in the dataset; None if the country has none that year
+                'happiness_score': score if score_year == latest_year else None,
+            }
+            for name, code, continent, region, _, score, score_year in countries
+        ]
+
+        # Final tie-break of the ranking: Python string order of the name
+        self.name_rank = np.empty(len(self.records), dtype=np.int64)
+        self.name_rank[sorted(range(len(self.records)), key=lambda i: self.records[i]['name'])] = np.arange(len(self.records))
+        self.by_code = {record['code'].lower(): i for i, record in enumerate(self.records)}
+
+        suffixes = sorted(
+            (name[offset:], i, offset)
+            for i, name in enumerate(record['name'].lower() for record in self.records)
+            for offset in range(len(name))
+        )
+        self.suffix_keys = [suffix for suffix, _, _ in suffixes]
+        self.suffix_countries = [i for _, i, _ in suffixes]
+        self.suffix_offsets = [offset for _, _, offset in suffixes]
+
+    @classmethod
+    def load(cls, version):
+        countries = Country.objects.order_by('name').values_list(
+            'name', 'code', 'continent', 'region', 'latest_indicator__year', 'latest_indicator__happiness_score',
+            'latest_indicator__happiness_score_year',
+        )
+        return cls(version, countries)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Countries whose name contains `query` or whose code equals it (case-insensitive),
+        ranked exact code first, then name prefix, then name; only the top `limit` are ordered.
+        """
+        query = query.lower()
+        starts_with = {}
+        start = bisect_left(self.suffix_keys, query)
+        for position in range(start, len(self.suffix_keys)):
+            if not self.suffix_keys[position].startswith(query):
+                break
+            country = self.suffix_countries[position]
+            starts_with[country] = starts_with.get(country, False) or self.suffix_offsets[position] == 0
+
+        code_match = self.by_code.get(query)
+        if code_match is not None:
+            starts_with.setdefault(code_match, False)
+
+        top = heapq.nsmallest(
+            limit, starts_with,
+            key=lambda i: (i != code_match, not starts_with[i], self.name_rank[i]),
+        )
+        return [self.records[i] for i in top]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_search_index():
+    """The index for the current 'countries' dataset version, rebuilt when it changes."""
+    global _index
+    version = versioning.current(versioning.COUNTRIES)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = CountrySearchIndex.load(version)
+        return _index
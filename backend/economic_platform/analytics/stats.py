@@ -0,0 +1,119 @@
+"""
+Vectorized statistics over observation matrices (rows = observations, columns =
+metrics, NaN = missing).
+"""
+import numpy as np
+import pandas as pd
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+
+# Fewer complete pairs than this gives no coefficient (None)
+MIN_PERIODS = 3
+
+
+def pairwise_pearson(values, min_periods=MIN_PERIODS):
+    """
+    Pairwise-complete Pearson correlation of the columns of `values`: each pair uses the
+    rows where both columns are present, like DataFrame.corr(), but computed with a few
+    matrix products instead of a loop over pairs. Returns (matrix, pair counts).
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    weights = valid.astype(float)
+    # Centering on the column means first keeps the sums of squares well conditioned
+    column_counts = weights.sum(axis=0)
+    means = np.divide(np.where(valid, values, 0.0).sum(axis=0), column_counts,
+                      out=np.zeros(values.shape[1]), where=column_counts > 0)
+    centered = np.where(valid, values - means, 0.0)
+
+    counts = weights.T @ weights
+    sums = centered.T @ weights            # sums[i, j]: sum of column i over rows where j is present
+    squares = (centered ** 2).T @ weights
+    products = centered.T @ centered
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = products - sums * sums.T / counts
+        variance = squares - sums ** 2 / counts
+        corr = covariance / np.sqrt(variance * variance.T)
+    # A column that is constant over the pair's rows has no defined coefficient
+    constant = ~(variance > 1e-12 * squares)
+    corr[(counts < min_periods) | constant | constant.T] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return corr, counts.astype(int)
+
+
+class _SortedColumn:
+    """One column sorted once, so its average ranks within any row subset are a cumulative sum away."""
+
+    def __init__(self, column, valid):
+        rows = np.flatnonzero(valid)
+        self.order = rows[np.argsort(column[rows], kind='stable')]
+        ordered = column[self.order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]]) if len(ordered) else np.array([], dtype=int)
+        self.group_starts = starts
+        self.group_ends = np.r_[starts[1:], len(ordered)] - 1
+        self.group_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(ordered)]))
+
+    def ranks_within(self, subset, size):
+        """Average (tie-aware) ranks of the column among the rows in boolean `subset`, scattered into a length-`size` array."""
+        member = subset[self.order]
+        seen = np.cumsum(member)
+        in_group = np.add.reduceat(member, self.group_starts) if len(self.group_starts) else np.array([])
+        end = seen[self.group_ends] if len(self.group_ends) else np.array([])
+        average = (end - in_group + 1 + end) / 2
+        ranks = np.full(size, np.nan)
+        ranks[self.order[member]] = average[self.group_of[member]]
+        return ranks
+
+
+def _pearson_pair(x, y):
+    x = x - x.mean()
+    y = y - y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    return (x * y).sum() / denominator if denominator > 0 else np.nan
+
+
+def pairwise_spearman(values, min_periods=MIN_PERIODS):
+    """
+    Pairwise-complete Spearman correlation. Columns are ranked once and correlated with
+    pairwise_pearson; that is exact for pairs whose columns are missing on the same rows.
+    The remaining pairs are re-ranked over their common rows from each column's single
+    sort (a cumulative count per pair, no re-sorting).
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    ranks = pd.DataFrame(values).rank().to_numpy()
+    corr, counts = pairwise_pearson(ranks, min_periods)
+
+    # Two columns are missing on the same rows iff their common count equals both of their counts
+    column_counts = valid.sum(axis=0)
+    differs = (counts != column_counts[:, None]) | (counts != column_counts[None, :])
+    pairs = [(i, j) for i, j in zip(*np.nonzero(np.triu(differs, 1))) if counts[i, j] >= min_periods]
+    sorted_columns = {}
+    for i, j in pairs:
+        for k in (i, j):
+            if k not in sorted_columns:
+                sorted_columns[k] = _SortedColumn(values[:, k], valid[:, k])
+        both = valid[:, i] & valid[:, j]
+        x = sorted_columns[i].ranks_within(both, len(values))[both]
+        y = sorted_columns[j].ranks_within(both, len(values))[both]
+        corr[i, j] = corr[j, i] = np.clip(_pearson_pair(x, y), -1.0, 1.0)
+    return corr, counts
+
+
+def correlation_matrix(values, method='pearson', min_periods=MIN_PERIODS):
+    if method == 'spearman':
+        return pairwise_spearman(values, min_periods)
+    if method == 'pearson':
+        return pairwise_pearson(values, min_periods)
+    raise ValueError(f"Unknown correlation method '{method}'. Use one of: {', '.join(CORRELATION_METHODS)}.")
+
+
+def to_nested_lists(matrix, decimals=None):
+    """2-D array -> nested lists for JSON, NaN -> None."""
+    matrix = np.asarray(matrix, dtype=float)
+    if decimals is not None:
+        matrix = np.round(matrix, decimals)
+    nested = matrix.astype(object)
+    nested[np.isnan(matrix)] = None
+    return nested.tolist()
@@ -0,0 +1,236 @@
+"""
+Synthetic datasets for scale testing.
+
+Values are drawn from a multivariate normal fitted to the real files (means, the
+pairwise covariance of the columns, their observed ranges and missing-value rates), so
+correlations, PCA and the scoring engine behave as on real data. Each entity (country,
+governorate) gets a persistent offset and its yearly values follow an AR(1) walk
+around it. Everything is generated with NumPy and written through the bulk upsert
+path; synthetic rows carry SYNTHETIC_PREFIX in their names so they can be removed.
+"""
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from countries.datasets import WHI_INFLATION
+from countries.models import Country, EconomicIndicator, HappinessPrediction, INDICATOR_FIELDS, LatestEconomicIndicator, UserFavorite
+from countries.snapshots import refresh_latest_indicators
+from tunisia.datasets import GOVERNORATES, LABOR_MARKET, LABOR_MARKET_COLUMNS, REAL_ESTATE_PRICES
+from tunisia.models import (
+    InvestmentScore, LaborMarketData as TunisiaLaborMarketData, RealEstatePrices, TaxIncentives, TunisiaGovernorate,
+)
+from tunisia.scoring import recompute_investment_scores
+
+from . import prediction, versioning
+from .ingestion import missing_to_none, parse_file, upsert_rows
+from .models import LaborMarketData
+
+SYNTHETIC_PREFIX = 'Synthetic'
+
+# Share of each column's variance that is between entities (the rest varies year to year)
+BETWEEN_SHARE = 0.7
+# Year-to-year persistence of the within-entity deviation
+AUTOCORRELATION = 0.8
+
+# Countries generated and written per chunk
+COUNTRY_CHUNK_SIZE = 500
+
+# Synthetic country codes start with a digit, so they never collide with ISO codes
+CODE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+MAX_COUNTRIES = 10 * 36 * 36
+
+GOVERNORATE_NUMERIC_FIELDS = (
+    'latitude', 'longitude', 'population_2024', 'area_km2', 'unemployment_rate', 'agricultural_land_percent',
+    'population_density', 'labor_force_size', 'gdp_contribution', 'industrial_zones', 'tourist_attractions',
+)
+GOVERNORATE_INT_FIELDS = ('population_2024', 'labor_force_size', 'industrial_zones', 'tourist_attractions')
+REAL_ESTATE_FIELDS = ('residential_price_per_m2', 'commercial_price_per_m2', 'land_price_per_m2')
+LABOR_FIELDS = tuple(column.field for column in LABOR_MARKET_COLUMNS if column.field not in ('governorate', 'year'))
+
+
+class GaussianProfile:
+    """Mean, covariance, range and missing rate of some numeric columns."""
+
+    def __init__(self, fields, mean, cov, low, high, missing_rate):
+        self.fields = tuple(fields)
+        self.mean = np.asarray(mean, dtype=float)
+        self.cov = np.asarray(cov, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.missing_rate = np.asarray(missing_rate, dtype=float)
+
+    @classmethod
+    def fit(cls, frame, fields):
+        """Fits on the columns `fields` of `frame`; pairwise-complete covariance, made positive semi-definite."""
+        values = frame[list(fields)].astype(float)
+        mean = values.mean().fillna(0.0).to_numpy()
+        cov = values.cov().fillna(0.0).to_numpy()
+        eigenvalues, eigenvectors = np.linalg.eigh((cov + cov.T) / 2)
+        cov = (eigenvectors * np.clip(eigenvalues, 0, None)) @ eigenvectors.T
+        low = values.min().fillna(0.0).to_numpy()
+        high = values.max().fillna(0.0).to_numpy()
+        return cls(fields, mean, cov, low, high, values.isna().mean().to_numpy())
+
+    def offsets(self, rng, n):
+        """Persistent per-entity values around the mean."""
+        return rng.multivariate_normal(self.mean, self.cov * BETWEEN_SHARE, size=n, method='eigh')
+
+    def walk(self, rng, n, steps):
+        """AR(1) deviations, shape (n, steps, fields), with the within-entity share of the variance."""
+        noise = rng.multivariate_normal(np.zeros(len(self.fields)), self.cov * (1 - BETWEEN_SHARE),
+                                        size=(n, steps), method='eigh')
+        deviations = np.empty_like(noise)
+        deviations[:, 0] = noise[:, 0]
+        innovation = np.sqrt(1 - AUTOCORRELATION ** 2)
+        for t in range(1, steps):
+            deviations[:, t] = AUTOCORRELATION * deviations[:, t - 1] + innovation * noise[:, t]
+        return deviations
+
+    def finish(self, rng, values):
+        """Clips to the observed range and blanks cells at the observed missing rates."""
+        values = np.clip(values, self.low, self.high)
+        return np.where(rng.random(values.shape) < self.missing_rate, np.nan, values)
+
+
+def country_code(i):
+    return CODE_ALPHABET[i // (36 * 36) % 10] + CODE_ALPHABET[i // 36 % 36] + CODE_ALPHABET[i % 36]
+
+
+def _rows(*columns):
+    """Row lists from equal-length columns, with NaN -> None."""
+    return [[None if isinstance(v, float) and v != v else v for v in row] for row in zip(*columns)]
+
+
+def generate_countries(reference_path, n_countries, n_years, start_year=2000, seed=0, batch_size=2000):
+    """Writes `n_countries` synthetic countries with `n_years` indicator rows each. Returns the row count."""
+    if n_countries > MAX_COUNTRIES:
+        raise ValueError(f'At most {MAX_COUNTRIES} synthetic countries are supported.')
+    rng = np.random.default_rng(seed)
+    reference = WHI_INFLATION.read_frame(reference_path)
+    profile = GaussianProfile.fit(reference, INDICATOR_FIELDS)
+    regions = reference['continent_region'].dropna().astype(str)
+    regions = regions.value_counts(normalize=True) if len(regions) else pd.Series({'Synthetic/Synthetic': 1.0})
+
+    written = 0
+    years = np.arange(start_year, start_year + n_years)
+    with transaction.atomic():
+        for start in range(0, n_countries, COUNTRY_CHUNK_SIZE):
+            count = min(COUNTRY_CHUNK_SIZE, n_countries - start)
+            names = [f'{SYNTHETIC_PREFIX} Country {i:05d}' for i in range(start, start + count)]
+            continent_regions = rng.choice(regions.index.to_numpy(), size=count, p=regions.to_numpy())
+            split = [(value.split('/', 1) + [''])[:2] for value in continent_regions]
+            upsert_rows(
+                Country, ['name', 'code', 'continent', 'region', 'latitude', 'longitude', 'population', 'capital', 'currency'],
+                _rows(
+                    names, [country_code(i) for i in range(start, start + count)],
+                    [continent.strip() for continent, _ in split], [region.strip() for _, region in split],
+                    rng.uniform(-60, 70, count).round(4).tolist(), rng.uniform(-180, 180, count).round(4).tolist(),
+                    np.exp(rng.normal(15.5, 1.8, count)).astype(np.int64).tolist(), [''] * count, [''] * count,
+                ),
+                unique_fields=('name',), batch_size=batch_size,
+            )
+            ids = dict(Country.objects.filter(name__in=names).values_list('name', 'id'))
+
+            values = _yearly(profile, rng, count, n_years)
+            country_ids = np.repeat([ids[name] for name in names], n_years)
+            row_years = np.tile(years, count)
+            rows = []
+            for country_id, year, row in zip(country_ids.tolist(), row_years.tolist(), values.tolist()):
+                row = [None if v != v else round(v, 4) for v in row]
+                rows.append([country_id, year, *row, EconomicIndicator.compute_fingerprint(row)])
+            upsert_rows(
+                EconomicIndicator, ['country', 'year', *INDICATOR_FIELDS, 'fingerprint'], rows,
+                unique_fields=('country', 'year'), batch_size=batch_size,
+            )
+            written += len(rows)
+
+        refresh_latest_indicators()
+        prediction.refresh(batch_size=batch_size)
+        versioning.bump(versioning.COUNTRIES)
+    return written
+
+
+def _yearly(profile, rng, n, n_years):
+    values = profile.offsets(rng, n)[:, None, :] + profile.walk(rng, n, n_years)
+    return profile.finish(rng, values).reshape(-1, len(profile.fields))
+
+
+def generate_governorates(data_dir, n_governorates, n_years, start_year=2019, seed=0, batch_size=2000):
+    """
+    Writes `n_governorates` synthetic governorates with `n_years` of real-estate and labor
+    data (both labor tables) fitted to the files in `data_dir`. Returns the governorate count.
+    """
+    rng = np.random.default_rng(seed)
+    governorates = parse_file(f'{data_dir}/tunisia_gov_data.txt', GOVERNORATES.spec())
+    real_estate = parse_file(f'{data_dir}/real_estate_data.txt', REAL_ESTATE_PRICES.spec())
+    labor = parse_file(f'{data_dir}/labor_market_data.txt', LABOR_MARKET[0].spec())
+
+    profile = GaussianProfile.fit(governorates, GOVERNORATE_NUMERIC_FIELDS)
+    attributes = profile.finish(rng, profile.offsets(rng, n_governorates))
+    attributes = pd.DataFrame(attributes, columns=GOVERNORATE_NUMERIC_FIELDS)
+    for field in GOVERNORATE_INT_FIELDS:
+        attributes[field] = attributes[field].round().astype('Int64')
+    coastal_rate = governorates['coastal_access'].mean() if len(governorates) else 0.5
+
+    names = [f'{SYNTHETIC_PREFIX} Governorate {i:05d}' for i in range(n_governorates)]
+    years = np.arange(start_year, start_year + n_years)
+    with transaction.atomic():
+        upsert_rows(
+            TunisiaGovernorate, ['name', 'arabic_name', *GOVERNORATE_NUMERIC_FIELDS, 'coastal_access'],
+            [
+                [name, '', *row, bool(coastal)]
+                for name, row, coastal in zip(
+                    names, missing_to_none(attributes, GOVERNORATE_NUMERIC_FIELDS), rng.random(n_governorates) < coastal_rate,
+                )
+            ],
+            unique_fields=('name',), batch_size=batch_size,
+        )
+        ids = dict(TunisiaGovernorate.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX} ').values_list('name', 'id'))
+        governorate_ids = np.repeat([ids[name] for name in names], n_years).tolist()
+        row_years = np.tile(years, n_governorates).tolist()
+
+        prices = _yearly(GaussianProfile.fit(real_estate, REAL_ESTATE_FIELDS), rng, n_governorates, n_years).round(2)
+        upsert_rows(
+            RealEstatePrices, ['governorate', 'year', *REAL_ESTATE_FIELDS],
+            _rows(governorate_ids, row_years, *prices.T.tolist()),
+            unique_fields=('governorate', 'year'), batch_size=batch_size,
+        )
+        labor_values = _yearly(GaussianProfile.fit(labor, LABOR_FIELDS), rng, n_governorates, n_years).round(2)
+        for model in (LaborMarketData, TunisiaLaborMarketData):
+            upsert_rows(
+                model, ['governorate', 'year', *LABOR_FIELDS],
+                _rows(governorate_ids, row_years, *labor_values.T.tolist()),
+                unique_fields=('governorate', 'year'), batch_size=batch_size,
+            )
+        recompute_investment_scores(batch_size=batch_size)
+        versioning.bump(versioning.TUNISIA)
+    return n_governorates
+
+
+def _raw_delete(queryset):
+    # One DELETE statement. QuerySet.delete() would load and signal every row: the
+    # versioning and snapshot receivers keep Django from fast-deleting.
+    return queryset._raw_delete(queryset.db)
+
+
+def clear_synthetic(batch_size=2000):
+    """
+    Deletes every synthetic country and governorate with their data, then rebuilds what
+    is derived across entities: the latest-indicator snapshot, the stored predictions and
+    the investment scores (normalized over all governorates). Returns (countries, governorates).
+    """
+    countries = Country.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX} ')
+    governorates = TunisiaGovernorate.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX} ')
+    with transaction.atomic():
+        _raw_delete(HappinessPrediction.objects.filter(indicator__country__in=countries))
+        for model in (EconomicIndicator, LatestEconomicIndicator, UserFavorite):
+            _raw_delete(model.objects.filter(country__in=countries))
+        for model in (RealEstatePrices, LaborMarketData, TunisiaLaborMarketData, InvestmentScore, TaxIncentives):
+            _raw_delete(model.objects.filter(governorate__in=governorates))
+        deleted = _raw_delete(countries), _raw_delete(governorates)
+
+        refresh_latest_indicators(batch_size=batch_size)
+        prediction.refresh(batch_size=batch_size)
+        recompute_investment_scores(batch_size=batch_size)
+        versioning.bump(versioning.COUNTRIES)
+        versioning.bump(versioning.TUNISIA)
+    return deleted
@@ -1,3 +1,1648 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Q
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework.utils.encoders import JSONEncoder
+from django.test.utils import CaptureQueriesContext
+from economic_platform import metrics, profiling
+from economic_platform.middleware import QueryInstrumentationMiddleware, query_budget, query_shape
+from countries.models import Country, EconomicIndicator, HappinessPrediction, LatestEconomicIndicator, INDICATOR_FIELDS
+from tunisia import scoring
+from tunisia.models import InvestmentScore, TaxIncentives, TunisiaGovernorate, RealEstatePrices, LaborMarketData as TunisiaLaborMarketData
+from countries import urls as countries_urls
+from countries.datasets import WHI_INFLATION
+from countries.snapshots import refresh_latest_indicators
+from tunisia import urls as tunisia_urls
+from . import caching, pca, prediction, renderers, versioning, views
+from . import urls as analytics_urls
+from .benchmarks import run_benchmarks
+from .cube import IndicatorCube, aget_cube, get_cube
+from .ingestion import coerce_series
+from .query_plans import full_scans
+from .stats import pairwise_pearson, pairwise_spearman
+from .models import LaborMarketData
+
+CSV_HEADER = (
+    'Country,Year,Headline Consumer Price Inflation,Energy Consumer Price Inflation,'
+    'Food Consumer Price Inflation,Official Core Consumer Price Inflation,Producer Price Inflation,'
+    'GDP Deflator Index Growth Rate,Continent/Region,Score,GDP per Capita,Social Support,'
+    'Healthy Life Expectancy at Birth,Freedom to Make Life Choices,Generosity,Perceptions of Corruption'
+)
+
+# Helper function to write a WHI-style CSV to a temporary file
+def write_csv(rows):
+    handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+    with handle:
+        handle.write(CSV_HEADER + '\n')
+        for row in rows:
+            handle.write(row + '\n')
+    return handle.name
+
+def synthetic_rows(n_countries, years):
+    rows = []
+    for c in range(n_countries):
+        for year in years:
+            rows.append(
+                f'Country{c},{year},{c % 7}.5,1.0,3.0,2.0,1.5,2.2,Europe/West,{5 + c % 3}.1,'
+                f'{1000 + c},0.9,70.0,0.8,0.1,0.4'
+            )
+    return rows
+
+
+class ImportDataCommandTests(TestCase):
+    def run_import(self, path, **options):
+        out = StringIO()
+        call_command('import_data', file_path=path, stdout=out, **options)
+        return out.getvalue()
+
+    def tearDown(self):
+        for path in getattr(self, 'paths', []):
+            os.remove(path)
+
+    def make_csv(self, rows):
+        path = write_csv(rows)
+        self.paths = getattr(self, 'paths', []) + [path]
+        return path
+
+    def test_import_creates_countries_and_indicators(self):
+        """
+        Countries are created with unique derived codes and continent/region split.
+        """
+        path = self.make_csv([
+            'Testland,2020,2.5,1.0,3.0,2.0,1.5,2.2,Testople/Central,7.5,50000,0.95,75.0,0.9,0.2,0.5',
+            'Testonia,2020,1.0,0.5,1.2,0.8,0.6,1.1,Dreamland,9.5,80000,0.99,85.0,0.98,0.3,0.1',
+        ])
+        output = self.run_import(path)
+
+        self.assertIn('Countries created: 2', output)
+        self.assertIn('Economic Indicators created: 2', output)
+        testland = Country.objects.get(name='Testland')
+        self.assertEqual((testland.continent, testland.region), ('Testople', 'Central'))
+        self.assertEqual(Country.objects.get(name='Testonia').region, '')
+        self.assertEqual(LatestEconomicIndicator.objects.get(country=testland).happiness_score, 7.5)
+        self.assertEqual(len(set(Country.objects.values_list('code', flat=True))), 2)
+        self.assertEqual(EconomicIndicator.objects.get(country=testland, year=2020).happiness_score, 7.5)
+
+    def test_reimport_updates_rows_in_place(self):
+        """
+        A second import upserts on (country, year) instead of duplicating rows.
+        """
+        self.run_import(self.make_csv(synthetic_rows(3, [2020, 2021])))
+        path = self.make_csv([
+            'Country0,2020,9.9,1.0,3.0,2.0,1.5,2.2,Europe/West,6.6,1000,0.9,70.0,0.8,0.1,0.4',
+            'Country0,2022,1.0,1.0,3.0,2.0,1.5,2.2,Europe/West,6.0,1000,0.9,70.0,0.8,0.1,0.4',
+        ])
+        output = self.run_import(path)
+
+        self.assertIn('Economic Indicators created: 1', output)
+        self.assertIn('Economic Indicators updated: 1', output)
+        self.assertEqual(EconomicIndicator.objects.count(), 7)
+        updated = EconomicIndicator.objects.get(country__name='Country0', year=2020)
+        self.assertEqual(updated.headline_consumer_price_inflation, 9.9)
+        # The snapshot follows the new latest year; untouched countries keep theirs
+        self.assertEqual(
+            list(LatestEconomicIndicator.objects.order_by('country__name').values_list('year', 'happiness_score')),
+            [(2022, 6.0), (2021, 6.1), (2021, 7.1)],
+        )
+
+    def test_snapshot_keeps_latest_non_null_values(self):
+        """
+        A newest year with only some columns (here inflation) moves the snapshot's year
+        but keeps each other field's latest known value.
+        """
+        self.run_import(self.make_csv(synthetic_rows(1, [2020, 2021])))
+        self.run_import(self.make_csv(['Country0,2022,4.4,,,,,,Europe/West,,,,,,,']))
+
+        snapshot = LatestEconomicIndicator.objects.get(country__name='Country0')
+        self.assertEqual(snapshot.year, 2022)
+        self.assertEqual(snapshot.headline_consumer_price_inflation, 4.4)
+        self.assertEqual((snapshot.happiness_score, snapshot.gdp_per_capita), (5.1, 1000))
+        self.assertEqual((snapshot.headline_consumer_price_inflation_year, snapshot.happiness_score_year), (2022, 2021))
+
+        # Single saves refresh through the signal the same way
+        EconomicIndicator.objects.filter(country__name='Country0', year=2021).update(happiness_score=None)
+        EconomicIndicator.objects.get(country__name='Country0', year=2022).save()
+        snapshot.refresh_from_db()
+        self.assertEqual((snapshot.happiness_score, snapshot.happiness_score_year), (5.1, 2020))
+
+    def test_reimport_of_identical_file_writes_nothing(self):
+        """
+        Fingerprints let a repeated import skip unchanged rows, leaving updated_at alone.
+        """
+        path = self.make_csv(synthetic_rows(5, [2020, 2021]))
+        self.run_import(path)
+        before = dict(EconomicIndicator.objects.values_list('pk', 'updated_at'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            output = self.run_import(path)
+
+        self.assertIn('Economic Indicators created: 0', output)
+        self.assertIn('Economic Indicators unchanged (skipped): 10', output)
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('INSERT')])
+        self.assertEqual(dict(EconomicIndicator.objects.values_list('pk', 'updated_at')), before)
+
+    def test_reimport_without_a_column_keeps_its_stored_values(self):
+        """
+        A file lacking an indicator column updates the others and leaves that one alone.
+        """
+        self.run_import(self.make_csv(synthetic_rows(2, [2020])))
+        path = self.make_csv(['Country0,2020,9.9,1.0,3.0,2.0,1.5,2.2,Europe/West,5.1,1000,0.9,70.0,0.8,0.1,0.4'])
+        pd.read_csv(path).drop(columns=['Generosity']).to_csv(path, index=False)
+
+        output = self.run_import(path)
+
+        self.assertIn('Economic Indicators updated: 1', output)
+        updated = EconomicIndicator.objects.get(country__name='Country0', year=2020)
+        self.assertEqual((updated.headline_consumer_price_inflation, updated.generosity), (9.9, 0.1))
+        self.assertEqual(LatestEconomicIndicator.objects.get(country=updated.country).generosity, 0.1)
+        # The stored fingerprint covers the kept value, so the same file is then unchanged
+        self.assertEqual(updated.fingerprint, EconomicIndicator.compute_fingerprint(getattr(updated, f) for f in INDICATOR_FIELDS))
+        self.assertIn('Economic Indicators unchanged (skipped): 1', self.run_import(path))
+
+    def test_model_save_keeps_fingerprint_current(self):
+        country = Country.objects.create(name='Fingerland', code='FIN', continent='Europe')
+        indicator = EconomicIndicator.objects.create(country=country, year=2020, happiness_score=7.0)
+        self.assertEqual(len(indicator.fingerprint), 32)
+
+        indicator.happiness_score = 7.1
+        indicator.save(update_fields=['happiness_score'])
+        indicator.refresh_from_db()
+        self.assertEqual(
+            indicator.fingerprint,
+            EconomicIndicator.compute_fingerprint([getattr(indicator, f) for f in INDICATOR_FIELDS]),
+        )
+
+    def test_rows_missing_country_or_year_are_skipped(self):
+        path = self.make_csv([
+            ',2020,2.5,1.0,3.0,2.0,1.5,2.2,Europe/West,7.5,50000,0.95,75.0,0.9,0.2,0.5',
+            'Testland,,2.5,1.0,3.0,2.0,1.5,2.2,Europe/West,7.5,50000,0.95,75.0,0.9,0.2,0.5',
+            'Testland,2021,2.5,1.0,3.0,2.0,1.5,2.2,Europe/West,7.5,50000,0.95,75.0,0.9,0.2,0.5',
+        ])
+        output = self.run_import(path)
+
+        self.assertIn('Rows with errors/skipped: 2', output)
+        self.assertEqual(EconomicIndicator.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """
+        The import is set-based: query count depends on batches, not on rows.
+        """
+        path = self.make_csv(synthetic_rows(40, range(2000, 2010)))
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_import(path)
+
+        self.assertEqual(EconomicIndicator.objects.count(), 400)
+        self.assertLess(len(ctx.captured_queries), 30)
+
+    def test_stream_mode_matches_in_memory_import(self):
+        """
+        --stream imputes with means computed over the whole file, not per chunk.
+        """
+        rows = synthetic_rows(4, [2020, 2021, 2022])
+        rows[1] = rows[1].replace(',Europe/West,5.1,', ',Europe/West,,')  # Country0/2021 has no score
+        path = self.make_csv(rows)
+
+        output = self.run_import(path, stream=True, chunk_size=2)
+        streamed = list(EconomicIndicator.objects.order_by('country__name', 'year').values_list('happiness_score', flat=True))
+        EconomicIndicator.objects.all().delete()
+        self.run_import(path)
+        in_memory = list(EconomicIndicator.objects.order_by('country__name', 'year').values_list('happiness_score', flat=True))
+
+        self.assertIn('Total rows in CSV read: 12', output)
+        self.assertIn("Filled NaN in 'happiness_score'", output)
+        self.assertEqual(len(streamed), 12)
+        self.assertEqual(streamed, in_memory)
+
+
+class PopulateTunisiaDataCommandTests(TestCase):
+    data_dir = settings.BASE_DIR.parent.parent / 'newdata'
+
+    def run_populate(self, **options):
+        out, err = StringIO(), StringIO()
+        call_command('populate_tunisia_data', stdout=out, stderr=err, **options)
+        return out.getvalue()
+
+    def test_populates_all_datasets_in_process_pool(self):
+        self.run_populate(data_dir=str(self.data_dir), workers=3)
+
+        self.assertEqual(TunisiaGovernorate.objects.count(), 24)
+        self.assertEqual(RealEstatePrices.objects.count(), 60)
+        self.assertEqual(LaborMarketData.objects.count(), 42)
+        self.assertEqual(TunisiaLaborMarketData.objects.count(), 42)
+        tunis = TunisiaGovernorate.objects.get(name='Tunis')
+        self.assertTrue(tunis.coastal_access)
+        self.assertEqual(RealEstatePrices.objects.get(governorate=tunis, year=2019).residential_price_per_m2, 2500)
+        self.assertEqual(InvestmentScore.objects.count(), 24 * len(scoring.SECTORS))
+
+    def test_rerun_is_idempotent_with_constant_query_count(self):
+        """
+        Governorates are resolved once per run, not once per data row.
+        """
+        self.run_populate(data_dir=str(self.data_dir), workers=1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_populate(data_dir=str(self.data_dir), workers=1)
+
+        self.assertEqual(RealEstatePrices.objects.count(), 60)
+        governorate_lookups = [q for q in ctx.captured_queries if 'FROM "tunisia_tunisiagovernorate" WHERE' in q['sql']]
+        self.assertLessEqual(len(governorate_lookups), 1)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+    def test_only_option_with_unknown_governorate(self):
+        """
+        Rows for governorates missing from the name->id map are reported and skipped.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as handle:
+            handle.write('governorate,year,residential_price_per_m2,commercial_price_per_m2,land_price_per_m2\n')
+            handle.write('Atlantis,2020,1,2,3\n')
+        self.addCleanup(os.remove, handle.name)
+
+        self.run_populate(only=['real_estate'], real_estate_file=handle.name, workers=1)
+        self.assertEqual(RealEstatePrices.objects.count(), 0)
+
+
+class InvestmentScoringTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tunis = TunisiaGovernorate.objects.create(
+            name='Tunis', latitude=36.8, longitude=10.2, population_2024=1200000, labor_force_size=450000,
+            coastal_access=True, industrial_zones=8, tourist_attractions=12, agricultural_land_percent=15.0,
+        )
+        cls.kef = TunisiaGovernorate.objects.create(
+            name='Kef', latitude=36.2, longitude=8.7, population_2024=240000, labor_force_size=80000,
+            coastal_access=False, industrial_zones=1, tourist_attractions=2, agricultural_land_percent=70.0,
+        )
+        TunisiaLaborMarketData.objects.create(governorate=cls.tunis, year=2019, average_wage=1000)
+        TunisiaLaborMarketData.objects.create(governorate=cls.tunis, year=2023, average_wage=1400)
+        TunisiaLaborMarketData.objects.create(governorate=cls.kef, year=2023, average_wage=800)
+        TaxIncentives.objects.create(governorate=cls.kef, sector='Agriculture', incentive_type='Regional', tax_reduction_percent=50, duration_years=5)
+
+    def scores(self):
+        return {(s.governorate.name, s.sector): s for s in InvestmentScore.objects.select_related('governorate')}
+
+    def test_normalization_flips_lower_is_better_and_keeps_missing_neutral(self):
+        features = np.array([[[1.0, 100.0, np.nan]], [[3.0, 50.0, np.nan]]])
+        with mock.patch.object(scoring, 'FEATURES', ('population_2024', 'average_wage', 'job_creation_rate')):
+            scaled = scoring.normalize(features)
+        np.testing.assert_allclose(scaled[:, 0], [[0.0, 0.0, 0.5], [1.0, 1.0, 0.5]])
+
+    def test_scores_every_governorate_and_sector(self):
+        self.assertEqual(scoring.recompute_investment_scores(), 2 * len(scoring.SECTORS))
+        scores = self.scores()
+
+        # Farmland counts for agriculture infrastructure, industrial zones for manufacturing
+        self.assertGreater(scores['Kef', 'agriculture'].infrastructure_score, scores['Tunis', 'agriculture'].infrastructure_score)
+        self.assertGreater(scores['Tunis', 'manufacturing'].infrastructure_score, scores['Kef', 'manufacturing'].infrastructure_score)
+        # Kef has the cheaper labor as of its latest year
+        self.assertGreater(scores['Kef', 'technology'].labor_score, 0)
+        self.assertEqual(scores['Kef', 'agriculture'].tax_incentive_score, 100.0)
+        self.assertEqual(scores['Kef', 'tourism'].tax_incentive_score, 0.0)
+        self.assertGreater(scores['Tunis', 'tourism'].market_access_score, scores['Kef', 'tourism'].market_access_score)
+        for score in scores.values():
+            self.assertTrue(0 <= score.overall_score <= 100)
+            self.assertTrue(score.reasoning.startswith('Strongest factor:'))
+
+    def test_only_changed_scores_are_written(self):
+        scoring.recompute_investment_scores()
+        self.assertEqual(scoring.recompute_investment_scores(), 0)
+
+        # A new latest year for Tunis changes the wage ranking, so both governorates move
+        TunisiaLaborMarketData.objects.create(governorate=self.tunis, year=2024, average_wage=700)
+        self.assertEqual(scoring.recompute_investment_scores(), 2 * len(scoring.SECTORS))
+
+        # An incentive only touches that governorate and sector
+        TaxIncentives.objects.create(governorate=self.tunis, sector='tourism', incentive_type='Coastal', tax_reduction_percent=20)
+        self.assertEqual(scoring.recompute_investment_scores(), 1)
+        self.assertEqual(scoring.recompute_investment_scores(force=True), 2 * len(scoring.SECTORS))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('compute_investment_scores', stdout=out)
+        self.assertIn(f'{2 * len(scoring.SECTORS)} written', out.getvalue())
+
+
+class IngestionTests(TestCase):
+    def test_vectorized_coercion(self):
+        raw = pd.Series(['1', ' 2 ', '', 'x', None, '2.5'])
+
+        self.assertEqual(coerce_series(raw, 'float').tolist()[:2], [1.0, 2.0])
+        self.assertEqual(coerce_series(raw, 'int').astype(object).where(lambda s: s.notna(), None).tolist(),
+                         [1, 2, None, None, None, None])
+        self.assertEqual(coerce_series(pd.Series(['1', '0', None, 'True']), 'bool').tolist(), [True, False, False, True])
+        self.assertEqual(coerce_series(pd.Series([' Tunis ', '']), 'str').astype(object).tolist()[0], 'Tunis')
+
+    def test_populate_global_data_headers_are_case_insensitive(self):
+        """
+        The WHI dataset reads both header spellings found in the repo's CSV files.
+        """
+        path = write_csv(['Testland,2020,2.5,1.0,3.0,2.0,1.5,2.2,Europe,7.5,50000,0.95,75.0,0.9,0.2,0.5'])
+        self.addCleanup(os.remove, path)
+        with open(path, encoding='utf-8') as handle:
+            content = handle.read().replace('Social Support', 'Social support')
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+
+        self.assertEqual(WHI_INFLATION.missing_columns(path), [])
+        self.assertEqual(WHI_INFLATION.read_frame(path)['social_support'].tolist(), [0.95])
+
+
+class AnalyticsAPITestCase(APITestCase):
+    """Authenticated API tests; in-memory structures are invalidated since each test's writes are rolled back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='analyst@example.com', username='analyst', password='pass', first_name='A', last_name='B'
+        )
+
+    def setUp(self):
+        versioning.touch(versioning.COUNTRIES)
+        versioning.touch(versioning.TUNISIA)
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+
+class IndicatorCubeViewTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.atlantis = Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+        cls.eldorado = Country.objects.create(name='El Dorado', code='ELD', continent='Mythical', latitude=3.0, longitude=4.0)
+        cls.nowhere = Country.objects.create(name='Nowhere', code='NOW', continent='Lost')
+        EconomicIndicator.objects.create(country=cls.atlantis, year=2022, happiness_score=7.0, headline_consumer_price_inflation=2.0)
+        EconomicIndicator.objects.create(country=cls.atlantis, year=2023, happiness_score=7.5, headline_consumer_price_inflation=4.0)
+        EconomicIndicator.objects.create(country=cls.eldorado, year=2022, happiness_score=6.5, headline_consumer_price_inflation=5.0)
+        EconomicIndicator.objects.create(country=cls.eldorado, year=2023, happiness_score=None, headline_consumer_price_inflation=6.0)
+        EconomicIndicator.objects.create(country=cls.nowhere, year=2023, happiness_score=5.0, headline_consumer_price_inflation=None)
+
+
+    def test_global_dashboard_matches_latest_year(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('analytics_api:global_dashboard_data'))
+
+        # El Dorado has no 2023 score (its snapshot holds the 2022 one) and Nowhere no coordinates
+        self.assertEqual(response.data, [{'country': 'Atlantis', 'happiness': 7.5, 'lat': 1.0, 'lng': 2.0, 'code': 'ATL'}])
+
+    def test_country_detail_by_name_or_code(self):
+        response = self.client.get(reverse('analytics_api:country_detail_data', args=['atl']))
+
+        self.assertEqual(response.data['country_info']['name'], 'Atlantis')
+        self.assertEqual([row['year'] for row in response.data['economic_indicators']], [2022, 2023])
+        self.assertIsNone(response.data['economic_indicators'][0]['gdp_per_capita'])
+        missing = self.client.get(reverse('analytics_api:country_detail_data', args=['Lemuria']))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_inflation_trends_match_sql_averages(self):
+        url = reverse('analytics_api:inflation_trends')
+
+        trends = self.client.get(url).data
+        self.assertEqual([row['year'] for row in trends], [2022, 2023])
+        self.assertEqual(trends[1]['avg_headline_inflation'], 5.0)  # NULL ignored, as AVG() does
+        filtered = self.client.get(url, {'continent': 'lost', 'start_year': 2023}).data
+        self.assertEqual(filtered, [{
+            'year': 2023, 'avg_headline_inflation': None, 'avg_food_inflation': None,
+            'avg_energy_inflation': None, 'avg_core_inflation': None,
+        }])
+        self.assertEqual(self.client.get(url, {'end_year': 'x'}).status_code, 400)
+
+    def test_reads_hit_no_sql_until_data_changes(self):
+        url = reverse('analytics_api:inflation_trends')
+        self.client.get(url)
+        self.client.get(reverse('analytics_api:global_dashboard_data'))
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+            self.client.get(reverse('analytics_api:global_dashboard_data'))
+
+        EconomicIndicator.objects.create(country=self.eldorado, year=2024, headline_consumer_price_inflation=1.0)
+        self.assertEqual(get_cube().latest_year, 2024)
+        self.assertEqual(self.client.get(url).data[-1]['year'], 2024)
+
+
+class CorrelationTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rng = np.random.default_rng(7)
+        for c in range(6):
+            country = Country.objects.create(name=f'Country{c}', code=f'C{c:02d}', continent='North' if c < 3 else 'South')
+            for year in range(2015, 2023):
+                gdp = float(rng.normal(10, 2))
+                EconomicIndicator.objects.create(
+                    country=country, year=year, gdp_per_capita=gdp,
+                    happiness_score=gdp / 2 + float(rng.normal(0, 0.5)),
+                    headline_consumer_price_inflation=None if (c + year) % 4 == 0 else float(rng.normal(3, 1)),
+                )
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('analytics_api:correlation_analysis')
+
+    def test_pairwise_complete_matches_pandas(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(300, 5)).round(1)
+        values[:, 1] += values[:, 0]
+        values[rng.random(values.shape) < 0.2] = np.nan
+        values[:, 4] = 1.0  # constant column -> undefined
+
+        frame = pd.DataFrame(values)
+        for function, method in ((pairwise_pearson, 'pearson'), (pairwise_spearman, 'spearman')):
+            expected = frame.corr(method=method, min_periods=3).to_numpy()
+            np.testing.assert_allclose(function(values)[0], expected, atol=1e-12)
+
+    def test_matrix_from_live_data_with_filters(self):
+        response = self.client.get(self.url, {
+            'metrics': 'gdp_per_capita,happiness_score,headline_consumer_price_inflation',
+            'method': 'spearman', 'continent': 'north', 'start_year': 2017,
+        })
+
+        rows = EconomicIndicator.objects.filter(country__continent='North', year__gte=2017).values(
+            'gdp_per_capita', 'happiness_score', 'headline_consumer_price_inflation')
+        expected = pd.DataFrame(list(rows), dtype=float).corr(method='spearman').round(4).to_numpy()
+        correlation = response.data['correlation_matrix']
+        self.assertEqual(correlation['observations'], 18)
+        np.testing.assert_allclose(np.array(correlation['matrix'], dtype=float), expected, atol=1e-4)
+        self.assertGreater(correlation['matrix'][0][1], 0.5)
+
+    def test_results_are_cached_per_dataset_version(self):
+        with mock.patch.object(views, 'compute_correlations', wraps=views.compute_correlations) as compute:
+            self.client.get(self.url)
+            self.client.get(self.url)
+            self.assertEqual(compute.call_count, 1)
+
+            EconomicIndicator.objects.filter(year=2015).first().save()
+            self.client.get(self.url)
+            self.assertEqual(compute.call_count, 2)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'metrics': 'gdp_per_capita,nope'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'method': 'kendall'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start_year': 'x'}).status_code, 400)
+
+
+@override_settings(VAR_DIR=tempfile.mkdtemp())
+class PCAResultsTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rng = np.random.default_rng(3)
+        for c in range(8):
+            country = Country.objects.create(name=f'Country{c}', code=f'C{c:02d}', continent='Europe')
+            for year in (2021, 2022):
+                base = rng.normal(size=3)
+                EconomicIndicator.objects.create(country=country, year=year, happiness_score=5.0, **{
+                    field: float(base[i % 3] * (i + 1) + rng.normal(0, 0.1))
+                    for i, field in enumerate(pca.PCA_FEATURES)
+                })
+        # No 2022 row for Country7's inflation: its point falls back to 2021
+        EconomicIndicator.objects.filter(country__name='Country7', year=2022).update(producer_price_inflation=None)
+
+    def setUp(self):
+        super().setUp()
+        pca._model = None
+        shutil.rmtree(os.path.join(settings.VAR_DIR, 'pca'), ignore_errors=True)
+        self.url = reverse('analytics_api:pca_results')
+
+    def test_projections_match_a_direct_fit(self):
+        response = self.client.get(self.url)
+
+        rows = EconomicIndicator.objects.exclude(producer_price_inflation=None).values_list(*pca.PCA_FEATURES)
+        values = np.array(list(rows), dtype=float)
+        standardized = (values - values.mean(axis=0)) / values.std(axis=0)
+        eigenvalues = np.linalg.eigvalsh(np.cov(standardized, rowvar=False))[::-1]
+        np.testing.assert_allclose(
+            response.data['explained_variance_ratio'], (eigenvalues / eigenvalues.sum())[:2], atol=1e-4
+        )
+        self.assertEqual(response.data['n_samples'], 15)
+        self.assertEqual(set(response.data['components_loading']), {'PC1', 'PC2'})
+        points = {p['country']: p for p in response.data['points']}
+        self.assertEqual(len(points), 8)
+        self.assertEqual(points['Country7']['year'], 2021)
+        self.assertEqual(points['Country0']['year'], 2022)
+
+        year_points = self.client.get(self.url, {'year': 2021}).data['points']
+        self.assertEqual({p['year'] for p in year_points}, {2021})
+
+    def test_fits_once_per_dataset_version_and_persists(self):
+        with mock.patch.object(pca.PCAModel, 'fit', wraps=pca.PCAModel.fit) as fit:
+            first = self.client.get(self.url).data
+            self.client.get(self.url)
+            self.assertEqual(fit.call_count, 1)
+
+            # Another process (or a restart) loads the saved components
+            pca._model = None
+            cache.clear()
+            self.assertEqual(self.client.get(self.url).data, first)
+            self.assertEqual(fit.call_count, 1)
+
+            EconomicIndicator.objects.first().save()
+            self.client.get(self.url)
+            self.assertEqual(fit.call_count, 2)
+
+    def test_correlation_analysis_serves_fitted_loadings(self):
+        response = self.client.get(reverse('analytics_api:correlation_analysis'))
+
+        self.assertEqual(response.data['pca_loadings'], self.client.get(self.url).data['components_loading'])
+
+
+@override_settings(VAR_DIR=tempfile.mkdtemp())
+class HappinessPredictionTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rng = np.random.default_rng(11)
+        for c in range(10):
+            country = Country.objects.create(name=f'Country{c}', code=f'C{c:02d}', continent='Europe')
+            for year in (2020, 2021, 2022):
+                gdp, support = float(rng.normal(10, 1)), float(rng.uniform(0.5, 1))
+                EconomicIndicator.objects.create(
+                    country=country, year=year, gdp_per_capita=gdp, social_support=support,
+                    happiness_score=None if (c, year) == (0, 2022) else 0.3 * gdp + 2 * support + 1,
+                )
+
+    def setUp(self):
+        super().setUp()
+        shutil.rmtree(settings.VAR_DIR, ignore_errors=True)
+        self.url = reverse('analytics_api:predict_happiness')
+
+    def test_train_command_persists_model_and_precomputes_every_row(self):
+        out = StringIO()
+        call_command('train_happiness_model', stdout=out)
+
+        self.assertIn('Stored predictions for 30 indicator rows.', out.getvalue())
+        self.assertEqual(HappinessPrediction.objects.count(), 30)
+        # Exact linear relationship; the unscored row is predicted too
+        unscored = HappinessPrediction.objects.get(indicator__country__name='Country0', indicator__year=2022)
+        indicator = unscored.indicator
+        self.assertAlmostEqual(unscored.predicted_score, 0.3 * indicator.gdp_per_capita + 2 * indicator.social_support + 1, places=6)
+
+        response = self.client.get(reverse('analytics_api:happiness_predictions'), {'country': 'c00'})
+        self.assertEqual([row['year'] for row in response.data], [2020, 2021, 2022])
+        self.assertIsNone(response.data[2]['happiness_score'])
+
+    def test_output_elsewhere_is_not_precomputed(self):
+        path = os.path.join(settings.VAR_DIR, 'candidate.npz')
+        with self.assertRaisesMessage(CommandError, 'only precomputed with the model the web workers serve'):
+            call_command('train_happiness_model', output=path, stdout=StringIO())
+        self.assertFalse(os.path.exists(path))
+
+        call_command('train_happiness_model', output=path, skip_precompute=True, stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(HappinessPrediction.objects.exists())
+
+    def test_imports_refresh_predictions_with_the_served_model(self):
+        # Without a model, imports leave predictions alone
+        path = write_csv(synthetic_rows(1, [2019]))
+        self.addCleanup(os.remove, path)
+        call_command('import_data', file_path=path, stdout=StringIO())
+        self.assertFalse(HappinessPrediction.objects.exists())
+
+        call_command('train_happiness_model', stdout=StringIO())
+        model = prediction.get_model()
+        changed = EconomicIndicator.objects.get(country__name='Country1', year=2020)
+        path = write_csv([
+            'Country1,2020,1.0,1.0,3.0,2.0,1.5,2.2,Europe/West,6.0,20.0,0.1,70.0,0.8,0.1,0.4',
+            'Country2,2023,1.0,1.0,3.0,2.0,1.5,2.2,Europe/West,6.0,9.0,0.7,70.0,0.8,0.1,0.4',
+        ])
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+        call_command('import_data', file_path=path, stdout=out)
+
+        self.assertIn('Happiness predictions refreshed: 7', out.getvalue())  # both countries' rows
+        changed.refresh_from_db()
+        new = EconomicIndicator.objects.get(country__name='Country2', year=2023)
+        for indicator in (changed, new):
+            stored = HappinessPrediction.objects.get(indicator=indicator)
+            features = np.array([[getattr(indicator, f) for f in prediction.HAPPINESS_FEATURES]], dtype=float)
+            self.assertEqual(stored.model_version, model.version)
+            self.assertAlmostEqual(stored.predicted_score, float(model.predict(features)[0]), places=6)
+
+    def test_batch_predict_loads_model_once(self):
+        prediction.train()
+        rows = [{'gdp_per_capita': 10.0, 'social_support': 0.5}, {'gdp_per_capita': 12.0, 'social_support': 1.0}]
+
+        with mock.patch.object(prediction, 'load_model', wraps=prediction.load_model) as load:
+            prediction._loaded = (None, None)
+            first = self.client.post(self.url, {'rows': rows}, format='json')
+            self.client.post(self.url, {'rows': rows}, format='json')
+            self.assertEqual(load.call_count, 1)
+
+        self.assertEqual(first.data['predictions'], [5.0, 6.6])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url, {'rows': []}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'rows': [{'score': 1}]}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'rows': [{'generosity': 'x'}]}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'rows': [{'generosity': 1}]}, format='json').status_code, 503)
+
+
+class SearchCountriesTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        names = ['Finland', 'Iceland', 'Ireland', 'Island Republic', 'Landia', 'Netherlands', 'Poland',
+                 'Switzerland', 'Thailand', 'New Zealand', 'Laos', 'Ndland', 'Eswatini']
+        for i, name in enumerate(names):
+            country = Country.objects.create(name=name, code=name[:2].upper() + str(i % 10), continent='Any')
+            EconomicIndicator.objects.create(country=country, year=2022, happiness_score=5.0 + i / 10)
+            if i % 3:
+                EconomicIndicator.objects.create(country=country, year=2023, happiness_score=6.0 + i / 10)
+        # A latest-year row without a score: the snapshot keeps the 2022 score, search must not show it
+        greenland = Country.objects.create(name='Greenland', code='GRL', continent='Any')
+        EconomicIndicator.objects.create(country=greenland, year=2022, happiness_score=4.0)
+        EconomicIndicator.objects.create(country=greenland, year=2023, generosity=0.2)
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('analytics_api:search_countries')
+
+    def expected(self, query):
+        """The original icontains + per-country latest-year query implementation."""
+        results = []
+        for country in Country.objects.filter(Q(name__icontains=query) | Q(code__iexact=query)):
+            indicator = EconomicIndicator.objects.filter(country=country, year=2023, happiness_score__isnull=False).first()
+            results.append({
+                'name': country.name, 'code': country.code, 'continent': country.continent, 'region': country.region,
+                'happiness_score': indicator.happiness_score if indicator else None,
+            })
+        results.sort(key=lambda x: (x['code'].lower() != query.lower(), not x['name'].lower().startswith(query.lower()), x['name']))
+        return results[:10]
+
+    def test_matches_previous_ranking_and_scores(self):
+        for query in ('land', 'LAN', 'i', 'Is', 'ir2', 'ne', 'zz', 'eswatini', 'nd'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(self.url, {'q': query}).data, self.expected(query))
+
+    def test_keystrokes_issue_no_queries_until_data_changes(self):
+        self.client.get(self.url, {'q': 'l'})
+        with self.assertNumQueries(0):
+            for prefix in ('l', 'la', 'lan', 'land'):
+                self.client.get(self.url, {'q': prefix})
+
+        Country.objects.create(name='Lapland', code='LPL', continent='Any')
+        self.assertEqual(self.client.get(self.url, {'q': 'lap'}).data[0]['name'], 'Lapland')
+
+
+@override_settings(VAR_DIR=tempfile.mkdtemp())
+class DatasetConditionalGetTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        country = Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+        EconomicIndicator.objects.create(country=country, year=2023, happiness_score=7.5)
+
+    def setUp(self):
+        super().setUp()
+        # A 304 is only given to a session
+        self.client.force_login(self.user)
+
+    def test_repeat_request_gets_304_without_running_the_view(self):
+        url = reverse('analytics_api:global_dashboard_data')
+        first = self.client.get(url)
+        self.assertIn('ETag', first)
+        self.assertIn('Cookie', first['Vary'])
+
+        # Only the session and user lookups of the authentication check
+        with self.assertNumQueries(2):
+            repeat = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], first['ETag'])
+
+    def test_etag_changes_with_data_and_parameters(self):
+        url = reverse('analytics_api:inflation_trends')
+        etag = self.client.get(url)['ETag']
+
+        self.assertNotEqual(self.client.get(url, {'continent': 'Mythical'})['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            EconomicIndicator.objects.create(country=Country.objects.get(code='ATL'), year=2024)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_ignores_this_process_uncommitted_writes(self):
+        url = reverse('countries_api:list_all_countries_api')
+        etag = self.client.get(url)['ETag']
+
+        # The save changes this worker's in-process version only; the other workers
+        # keep computing the old ETag until the write commits, so this one must too
+        Country.objects.create(name='Lemuria', code='LEM')
+        self.assertNotEqual(versioning.current(versioning.COUNTRIES), versioning.committed(versioning.COUNTRIES))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_scopes_are_independent(self):
+        url = reverse('countries_api:list_all_countries_api')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_only_successful_json_gets_are_tagged(self):
+        missing = self.client.get(reverse('analytics_api:country_detail_data', args=['Lemuria']))
+        self.assertNotIn('ETag', missing)
+        page = self.client.get(reverse('analytics_api:world_map_page'))
+        self.assertNotIn('ETag', page)
+        post = self.client.post(reverse('analytics_api:predict_happiness'), {'rows': []}, format='json')
+        self.assertNotIn('ETag', post)
+
+    def test_unauthenticated_requests_are_never_304(self):
+        for url in (reverse('analytics_api:global_dashboard_data'), reverse('countries_api:list_all_countries_api')):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                anonymous = self.client_class()
+                self.assertEqual(anonymous.get(url, HTTP_IF_NONE_MATCH='*').status_code, 403)
+                self.assertEqual(anonymous.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+                # With a session cookie that authenticates nobody
+                anonymous.cookies[settings.SESSION_COOKIE_NAME] = 'stale'
+                self.assertEqual(anonymous.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+                # The wildcard does not match for the session either
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+    def test_ended_session_replaying_its_etag_is_not_304(self):
+        url = reverse('analytics_api:global_dashboard_data')
+        etag = self.client.get(url)['ETag']
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        self.client.logout()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+
+    def test_cache_stats_are_never_304(self):
+        url = reverse('analytics_api:cache_stats')
+        first = self.client.get(url)
+        self.assertNotIn('ETag', first)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+
+
+class QueryInstrumentationTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(6):
+            governorate = TunisiaGovernorate.objects.create(name=f'Gov{i}', latitude=36.0, longitude=10.0)
+            InvestmentScore.objects.create(governorate=governorate, sector='tourism', overall_score=50 + i)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('countries_api:list_all_countries_api'))
+
+        timings = dict(part.strip().split(';', 1) for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(timings), {'db', 'serialize', 'total'})
+        self.assertIn('desc="1 queries"', timings['db'])
+
+    def test_investment_advisor_joins_governorates(self):
+        with self.assertNoLogs('economic_platform.sql', 'WARNING'), self.assertNumQueries(1):
+            response = self.client.get(reverse('api_investment_advisor'), {'sector': 'tourism'})
+        self.assertEqual([row['governorate']['name'] for row in response.data][:2], ['Gov5', 'Gov4'])
+
+    def test_repeated_query_shapes_are_flagged(self):
+        def per_row_lookups(request):
+            for score in InvestmentScore.objects.all():
+                score.governorate.name
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(per_row_lookups)
+        with self.assertLogs('economic_platform.sql', 'WARNING') as logs:
+            middleware(RequestFactory().get('/api/tunisia/scores/'))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Likely N+1: GET /api/tunisia/scores/ ran 6×', logs.output[0])
+        self.assertIn('"tunisia_tunisiagovernorate"', logs.output[0])
+
+    def test_query_budget(self):
+        url = reverse('countries_api:list_all_countries_api')
+        with override_settings(SQL_QUERY_BUDGET=0), self.assertLogs('economic_platform.sql', 'WARNING') as logs:
+            self.client.get(url)
+        self.assertIn(f'Query budget exceeded: GET {url} ran 1 queries (budget 0)', logs.output[0])
+
+        # Views can raise their own budget
+        view = query_budget(5)(lambda request: HttpResponse())
+        request = RequestFactory().get('/')
+        request._query_budget = 0
+        QueryInstrumentationMiddleware(view).process_view(request, view, (), {})
+        self.assertEqual(request._query_budget, 5)
+
+    def test_query_shapes_ignore_parameters(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s) LIMIT 21'),
+            query_shape('SELECT * FROM "t" WHERE "t"."id" IN (%s) LIMIT 1'),
+        )
+
+
+
+class RequestProfilingTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.staff = get_user_model().objects.create_user(
+            email='staff@example.com', username='staff', password='pass', first_name='S', last_name='T', is_staff=True
+        )
+        country = Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+        EconomicIndicator.objects.create(country=country, year=2023, happiness_score=7.5)
+
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        settings_override = override_settings(PROFILE_DIR=self.profile_dir, PROFILE_RING_SIZE=3, PROFILE_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse('analytics_api:country_detail_data', args=['Atlantis'])
+
+    def test_staff_header_captures_profile(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, 200)
+        capture_id = response['X-Profile-Id']
+        self.assertEqual(sorted(os.listdir(self.profile_dir)), [f'{capture_id}.json', f'{capture_id}.prof'])
+        [capture] = profiling.captures()
+        self.assertEqual((capture['path'], capture['status'], capture['trigger']), (self.url, 200, 'header'))
+        self.assertTrue(any('country_detail_data (analytics/views.py' in frame['function'] for frame in capture['top_frames']))
+
+    def test_only_staff_can_request_a_profile(self):
+        response = self.client.get(self.url, {'profile': '1'}, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    async def test_overlapping_captures_are_skipped(self):
+        started, finish = asyncio.Event(), asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await finish.wait()
+            return HttpResponse()
+
+        async def fast(request):
+            return HttpResponse()
+
+        first = asyncio.ensure_future(profiling.aprofile(slow, RequestFactory().get(self.url), 'header'))
+        await started.wait()
+        second = await profiling.aprofile(fast, RequestFactory().get(self.url), 'sample')
+        finish.set()
+
+        self.assertIn('X-Profile-Id', await first)
+        self.assertNotIn('X-Profile-Id', second)
+        self.assertIn('X-Profile-Id', await profiling.aprofile(fast, RequestFactory().get(self.url), 'sample'))
+
+    def test_sampling_and_ring_size(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            ids = [self.client.get(self.url)['X-Profile-Id'] for _ in range(5)]
+
+        self.assertEqual({capture['trigger'] for capture in profiling.captures()}, {'sample'})
+        self.assertEqual(sorted(os.listdir(self.profile_dir)), sorted(f'{i}{suffix}' for i in ids[-3:] for suffix in ('.json', '.prof')))
+
+    def test_admin_page_lists_slowest_captures(self):
+        self.client.force_login(self.staff)
+        self.client.get(self.url, {'profile': '1'})
+        page = self.client.get(reverse('admin_profiles'))
+
+        self.assertContains(page, f'{self.url}?profile=1')
+        capture_id = profiling.captures()[0]['id']
+        download = self.client.get(reverse('admin_profile_download', args=[capture_id]))
+        self.assertEqual(download.status_code, 200)
+        download.close()
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('admin_profiles')).status_code, 302)
+
+
+
+class RequestMetricsTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+
+    def setUp(self):
+        super().setUp()
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        settings_override = override_settings(METRICS_DIR=self.metrics_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode().splitlines()
+
+    def test_per_view_counters_and_histograms(self):
+        url = reverse('countries_api:list_all_countries_api')
+        size = len(self.client.get(url).content)
+        self.client.get(url)
+        self.client.get(reverse('analytics_api:country_detail_data', args=['Lemuria']))
+        lines = self.scrape()
+
+        view = 'view="countries_api:list_all_countries_api"'
+        self.assertIn(f'http_requests_total{{{view},method="GET",status="200"}} 2', lines)
+        self.assertIn('http_requests_total{view="analytics_api:country_detail_data",method="GET",status="404"} 1', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{view},le="+Inf"}} 2', lines)
+        self.assertIn(f'http_request_duration_seconds_count{{{view}}} 2', lines)
+        self.assertIn(f'http_request_db_queries_total{{{view}}} 2', lines)
+        self.assertIn(f'http_response_size_bytes_bucket{{{view},le="256.0"}} 2', lines)
+        self.assertIn(f'http_response_size_bytes_sum{{{view}}} {2 * size}', lines)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', lines)
+        # Scrapes are not counted
+        self.assertFalse(any('view="metrics"' in line for line in lines))
+
+    def test_files_of_all_processes_are_summed(self):
+        self.client.get(reverse('countries_api:list_all_countries_api'))
+        other = metrics.MetricsFile(os.path.join(self.metrics_dir, 'other.db'))
+        key = metrics._key('http_requests_total', (('view', 'countries_api:list_all_countries_api'), ('method', 'GET'), ('status', '200')))
+        other.add_many([(key, 3)])
+
+        self.assertIn('http_requests_total{view="countries_api:list_all_countries_api",method="GET",status="200"} 4', self.scrape())
+
+    def test_file_grows_and_reopens_with_its_values(self):
+        path = os.path.join(self.metrics_dir, 'worker.db')
+        store = metrics.MetricsFile(path)
+        keys = [f'key-{i:05d}' * 10 for i in range(1000)]
+        store.add_many([(key, 1.5) for key in keys])
+        store.add_many([(keys[0], 1)])
+
+        values = {key: value for key, _, value in metrics.read_entries(metrics.MetricsFile(path)._map)}
+        self.assertEqual(len(values), 1000)
+        self.assertEqual(values[keys[0]], 2.5)
+        self.assertGreater(os.path.getsize(path), metrics.MetricsFile.INITIAL_SIZE)
+
+
+
+class ResponseFormatTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for c, continent in enumerate(['Mythical', 'Mythical', 'Lost']):
+            country = Country.objects.create(name=f'Country{c}', code=f'C{c:02d}', continent=continent)
+            for year in (2019, 2020, 2021):
+                if (c, year) == (0, 2020):
+                    continue
+                EconomicIndicator.objects.create(
+                    country=country, year=year, happiness_score=5 + c, headline_consumer_price_inflation=year - 2018 + c,
+                    food_consumer_price_inflation=None if c == 1 else 2.5,
+                )
+        cls.governorate = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2)
+        for year in (2021, 2022):
+            RealEstatePrices.objects.create(governorate=cls.governorate, year=year, residential_price_per_m2=2000 + year)
+
+    @staticmethod
+    def columns(rows):
+        """The columnar form of a list of per-year dicts."""
+        return {'years': [row['year'] for row in rows], **{key: [row[key] for row in rows] for key in rows[0] if key != 'year'}}
+
+    def test_columnar_json(self):
+        detail_url = reverse('analytics_api:country_detail_data', args=['Country0'])
+        rows = self.client.get(detail_url).data['economic_indicators']
+        response = self.client.get(detail_url, HTTP_ACCEPT='application/vnd.columnar+json')
+        self.assertEqual(response['Content-Type'], 'application/vnd.columnar+json')
+        indicators = json.loads(response.content)['economic_indicators']
+        self.assertEqual(indicators, self.columns(rows))
+        self.assertEqual(indicators['years'], [2019, 2021])
+
+        trends_url = reverse('analytics_api:inflation_trends')
+        rows = self.client.get(trends_url, {'continent': 'mythical'}).data
+        response = self.client.get(trends_url, {'continent': 'mythical', 'format': 'columnar'})
+        self.assertEqual(json.loads(response.content), self.columns(rows))
+        self.assertLess(len(response.content), len(json.dumps(rows)))
+
+    def test_formats_are_cached_and_tagged_separately(self):
+        url = reverse('analytics_api:inflation_trends')
+        self.assertIsInstance(self.client.get(url).data, list)
+        columnar = self.client.get(url, HTTP_ACCEPT='application/vnd.columnar+json')
+        self.assertIsInstance(json.loads(columnar.content), dict)
+        self.assertIsInstance(self.client.get(url).data, list)
+        self.assertIn('ETag', columnar)
+        self.assertNotEqual(columnar['ETag'], self.client.get(url)['ETag'])
+
+    def test_unsupported_formats(self):
+        url = reverse('analytics_api:inflation_trends')
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='text/csv').status_code, 406)
+        self.assertEqual(self.client.get(url, {'format': 'csv'}).status_code, 404)
+        # Endpoints without time series keep their formats
+        self.assertEqual(self.client.get(reverse('analytics_api:pca_results'), {'format': 'columnar'}).status_code, 404)
+
+    @skipUnless(renderers.msgpack, 'msgpack is not installed')
+    def test_messagepack(self):
+        url = reverse('analytics_api:country_detail_data', args=['Country1'])
+        columnar = json.loads(self.client.get(url, {'format': 'columnar'}).content)
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(response.content), columnar)
+        self.assertEqual(columnar['economic_indicators']['food_consumer_price_inflation'], [None, None, None])
+
+        url = reverse('analytics_api:real_estate_price_trends_api', args=[self.governorate.pk])
+        expected = self.client.get(url).data
+        decoded = renderers.msgpack.unpackb(self.client.get(url, {'format': 'msgpack'}).content)
+        self.assertEqual(decoded['years'], [2021, 2022])
+        self.assertEqual(decoded, json.loads(json.dumps(expected, cls=JSONEncoder)))
+        # Errors are rendered in the negotiated format
+        response = self.client.get(reverse('analytics_api:country_detail_data', args=['Nowhere']), {'format': 'msgpack'})
+        self.assertEqual(renderers.msgpack.unpackb(response.content), {'error': "Country 'Nowhere' not found."})
+
+    def test_async_variants_negotiate_the_same_formats(self):
+        self.client.force_login(self.user)
+        formats = [{'format': 'columnar'}, {'HTTP_ACCEPT': 'application/vnd.columnar+json'}, {}]
+        if renderers.msgpack:
+            formats.append({'format': 'msgpack'})
+        for sync_name, async_name, args in [
+            ('analytics_api:country_detail_data', 'analytics_api:async_country_detail_data', ['Country2']),
+            ('analytics_api:inflation_trends', 'analytics_api:async_inflation_trends', []),
+            ('analytics_api:labor_market_trends_batch_api', 'analytics_api:async_labor_market_trends_batch_api', []),
+        ]:
+            for options in formats:
+                params = {key: value for key, value in options.items() if key == 'format'}
+                headers = {key: value for key, value in options.items() if key != 'format'}
+                with self.subTest(endpoint=async_name, **options):
+                    expected = self.client.get(reverse(sync_name, args=args), params, **headers)
+                    response = self.client.get(reverse(async_name, args=args), params, **headers)
+                    self.assertEqual(response['Content-Type'], expected['Content-Type'])
+                    if params.get('format') == 'msgpack':
+                        self.assertEqual(renderers.msgpack.unpackb(response.content), renderers.msgpack.unpackb(expected.content))
+                    else:
+                        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+        url = reverse('analytics_api:async_inflation_trends')
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='text/csv').status_code, 406)
+        self.assertEqual(self.client.get(url, {'format': 'csv'}).status_code, 404)
+
+
+class CursorPaginationTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for c in range(7):
+            country = Country.objects.create(name=f'Country{c}', code=f'C{c:02d}', continent='Europe')
+            for year in (2020, 2021, 2022):
+                indicator = EconomicIndicator.objects.create(country=country, year=year, happiness_score=c + year % 10)
+                HappinessPrediction.objects.create(indicator=indicator, predicted_score=c, model_version='test')
+
+    def walk(self, url, params):
+        """Every page's results, following next_cursor."""
+        pages, cursor = [], None
+        while True:
+            response = self.client.get(url, {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['results'])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return pages
+
+    def streamed(self, url, params):
+        response = self.client.get(url, {**params, 'stream': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_country_pages_cover_the_list(self):
+        url = reverse('countries_api:list_all_countries_api')
+        everything = self.client.get(url).data
+
+        pages = self.walk(url, {'limit': 3})
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), everything)
+        self.assertEqual(self.streamed(url, {}), everything)
+
+    def test_prediction_pages_are_keyed_on_country_and_year(self):
+        url = reverse('analytics_api:happiness_predictions')
+        everything = self.client.get(url).data
+        self.assertEqual(len(everything), 21)
+
+        pages = self.walk(url, {'limit': 4})
+        self.assertEqual(sum(pages, []), everything)
+        # A page boundary inside a country's years
+        self.assertEqual([(row['country'], row['year']) for row in pages[1][:2]], [('Country1', 2021), ('Country1', 2022)])
+        self.assertEqual(self.walk(url, {'limit': 2, 'year': 2021})[1][0]['country'], 'Country2')
+        self.assertEqual(self.streamed(url, {'country': 'c03'}), self.client.get(url, {'country': 'c03'}).data)
+        self.assertEqual(self.streamed(url, {'country': 'Nowhere'}), [])
+
+    def test_pages_do_not_skip_or_repeat_rows_written_meanwhile(self):
+        url = reverse('countries_api:list_all_countries_api')
+        first = self.client.get(url, {'limit': 2}).data
+        Country.objects.create(name='Country0a', code='C0A')  # sorts before the cursor
+        Country.objects.create(name='Country9', code='C09')
+
+        second = self.client.get(url, {'limit': 10, 'cursor': first['next_cursor']}).data
+        self.assertEqual([row['name'] for row in second['results']], [f'Country{c}' for c in (2, 3, 4, 5, 6, 9)])
+
+    def test_streams_in_chunks(self):
+        url = reverse('analytics_api:happiness_predictions')
+        with mock.patch('analytics.pagination.STREAM_CHUNK_SIZE', 5):
+            response = self.client.get(url, {'stream': 'true'})
+            chunks = list(response.streaming_content)
+        # '[', ceil(21 / 5) chunks of items, ']'
+        self.assertEqual(len(chunks), 7)
+        self.assertEqual(json.loads(b''.join(chunks)), self.client.get(url).data)
+        # Streamed bodies are not cached
+        self.assertTrue(self.client.get(url, {'stream': 'true'}).streaming)
+
+    def test_invalid_parameters(self):
+        url = reverse('countries_api:list_all_countries_api')
+        for params, error in [
+            ({'limit': 0}, 'limit must be between 1 and 1000.'),
+            ({'limit': 'x'}, 'Invalid limit format.'),
+            ({'cursor': 'not a cursor'}, 'Invalid cursor.'),
+            ({'cursor': 'WyJhIiwiYiJd'}, 'Invalid cursor.'),  # two values for a one-field key
+            ({'stream': '1', 'limit': 5}, 'stream cannot be combined with limit or cursor.'),
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual((response.status_code, response.data), (400, {'error': error}))
+
+        # A well-formed cursor with a value of the wrong type
+        cursor = views.HAPPINESS_PREDICTIONS.page(
+            [('Country1', 'x', None, None, None), ('Country2', 2020, None, None, None)], 1,
+        )['next_cursor']
+        response = self.client.get(reverse('analytics_api:happiness_predictions'), {'cursor': cursor})
+        self.assertEqual(response.data, {'error': 'Invalid cursor.'})
+
+    def test_async_variants(self):
+        self.client.force_login(self.user)
+        for sync_name, async_name in [
+            ('countries_api:list_all_countries_api', 'countries_api:async_list_all_countries_api'),
+            ('analytics_api:happiness_predictions', 'analytics_api:async_happiness_predictions'),
+        ]:
+            with self.subTest(endpoint=async_name):
+                first = self.client.get(reverse(sync_name), {'limit': 4}).data
+                second = self.client.get(reverse(sync_name), {'limit': 4, 'cursor': first['next_cursor']}).data
+                self.assertEqual(self.client.get(reverse(async_name), {'limit': 4}).json(), first)
+                self.assertEqual(self.client.get(reverse(async_name), {'limit': 4, 'cursor': first['next_cursor']}).json(), second)
+
+    async def test_async_stream_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('analytics.pagination.STREAM_CHUNK_SIZE', 4):
+            response = await self.async_client.get(reverse('analytics_api:async_happiness_predictions'), {'stream': '1'})
+            chunks = [chunk async for chunk in response.streaming_content]
+        rows = json.loads(b''.join(chunks))
+        self.assertEqual(len(chunks), 2 + 6)
+        self.assertEqual([(row['country'], row['year']) for row in rows[:2]], [('Country0', 2020), ('Country0', 2021)])
+        self.assertEqual(len(rows), 21)
+
+
+class AsyncViewTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i, (name, code) in enumerate([('Atlantis', 'ATL'), ('Lemuria', 'LEM'), ('Mu', 'MUU')]):
+            country = Country.objects.create(name=name, code=code, continent='Mythical', latitude=1.0 + i, longitude=2.0)
+            for year in (2022, 2023):
+                indicator = EconomicIndicator.objects.create(
+                    country=country, year=year, happiness_score=5.0 + i + year % 2, gdp_per_capita=1.0 + i * 0.3,
+                    social_support=0.5 + i * 0.1, headline_consumer_price_inflation=2.0 * i + year % 2,
+                )
+                HappinessPrediction.objects.create(indicator=indicator, predicted_score=5.5 + i, model_version='test')
+        refresh_latest_indicators()
+        for name in ('Tunis', 'Sfax'):
+            governorate = TunisiaGovernorate.objects.create(name=name, latitude=36.8, longitude=10.2)
+            RealEstatePrices.objects.create(governorate=governorate, year=2023, residential_price_per_m2=2500)
+            LaborMarketData.objects.create(governorate=governorate, year=2023, unemployment_rate=12.0)
+            InvestmentScore.objects.create(governorate=governorate, sector='tourism', overall_score=70)
+        cls.governorate = governorate
+
+    def setUp(self):
+        super().setUp()
+        # The async views authenticate through the session, like SessionAuthentication
+        self.client.force_login(self.user)
+
+    def pairs(self):
+        """(sync URL name, async URL name, path args, query params)."""
+        gov = self.governorate.pk
+        return [
+            ('analytics_api:global_dashboard_data', 'analytics_api:async_global_dashboard_data', [], {}),
+            ('analytics_api:search_countries', 'analytics_api:async_search_countries', [], {'q': 'le'}),
+            ('analytics_api:country_detail_data', 'analytics_api:async_country_detail_data', ['atl'], {}),
+            ('analytics_api:inflation_trends', 'analytics_api:async_inflation_trends', [], {'continent': 'mythical'}),
+            ('analytics_api:correlation_analysis', 'analytics_api:async_correlation_analysis', [], {'metrics': 'happiness_score,gdp_per_capita'}),
+            ('analytics_api:pca_results', 'analytics_api:async_pca_results', [], {'year': 2023}),
+            ('analytics_api:happiness_predictions', 'analytics_api:async_happiness_predictions', [], {'country': 'MUU'}),
+            ('analytics_api:real_estate_price_trends_api', 'analytics_api:async_real_estate_price_trends_api', [gov], {}),
+            ('analytics_api:labor_market_trends_api', 'analytics_api:async_labor_market_trends_api', [gov], {}),
+            ('analytics_api:real_estate_price_trends_batch_api', 'analytics_api:async_real_estate_price_trends_batch_api', [], {'start_year': 2020}),
+            ('analytics_api:labor_market_trends_batch_api', 'analytics_api:async_labor_market_trends_batch_api', [], {'governorates': gov}),
+            ('analytics_api:tunisia_dashboard_bundle_api', 'analytics_api:async_tunisia_dashboard_bundle_api', [], {'top': 1}),
+            ('countries_api:list_all_countries_api', 'countries_api:async_list_all_countries_api', [], {}),
+            ('countries_api:country_comparison_api', 'countries_api:async_country_comparison_api', [], {'countries': 'Mu,Atlantis,Nowhere'}),
+        ]
+
+    def test_async_variants_match_the_drf_views(self):
+        for sync_name, async_name, args, params in self.pairs():
+            with self.subTest(endpoint=async_name):
+                expected = self.client.get(reverse(sync_name, args=args), params, HTTP_ACCEPT='application/json')
+                response = self.client.get(reverse(async_name, args=args), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), json.loads(expected.content))
+
+    def test_errors_match_the_drf_views(self):
+        for sync_name, async_name, args, params in [
+            ('analytics_api:country_detail_data', 'analytics_api:async_country_detail_data', ['Nowhere'], {}),
+            ('analytics_api:inflation_trends', 'analytics_api:async_inflation_trends', [], {'start_year': 'x'}),
+            ('analytics_api:correlation_analysis', 'analytics_api:async_correlation_analysis', [], {'method': 'magic'}),
+            ('analytics_api:tunisia_dashboard_bundle_api', 'analytics_api:async_tunisia_dashboard_bundle_api', [], {'top': 0}),
+            ('countries_api:country_comparison_api', 'countries_api:async_country_comparison_api', [], {}),
+        ]:
+            with self.subTest(endpoint=async_name):
+                expected = self.client.get(reverse(sync_name, args=args), params)
+                response = self.client.get(reverse(async_name, args=args), params)
+                self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.data))
+
+    def test_requires_session_authentication(self):
+        self.client.logout()
+        response = self.client.get(reverse('analytics_api:async_inflation_trends'))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.post(reverse('analytics_api:async_inflation_trends')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.post(reverse('analytics_api:async_inflation_trends')).status_code, 405)
+
+    async def test_served_natively_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('analytics_api:async_tunisia_dashboard_bundle_api')
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['governorates']['name']), 2)
+        # The instrumentation middleware sees the async ORM's queries: session, user and the two bundle queries
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+        self.assertIn('ETag', response)
+        cached = await self.async_client.get(url)
+        self.assertIn('desc="2 queries"', cached['Server-Timing'])
+
+    async def test_overlapping_requests_load_the_cube_once(self):
+        versioning.touch(versioning.COUNTRIES)
+        with mock.patch.object(IndicatorCube, 'load', wraps=IndicatorCube.load) as load:
+            first, second = await asyncio.gather(aget_cube(), aget_cube())
+        self.assertEqual(load.call_count, 1)
+        self.assertIs(first, second)
+        self.assertEqual(sorted(first.names), ['Atlantis', 'Lemuria', 'Mu'])
+        self.assertIs(await aget_cube(), first)
+        self.assertIs(get_cube(), first)
+
+
+class ResponseCacheTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.atlantis = Country.objects.create(name='Atlantis', code='ATL', continent='Mythical')
+        EconomicIndicator.objects.create(country=cls.atlantis, year=2023, headline_consumer_price_inflation=2.0)
+
+    def setUp(self):
+        super().setUp()
+        caching.reset_stats()
+        self.url = reverse('analytics_api:inflation_trends')
+        self.view = f'{views.__name__}.inflation_trends'
+
+    def test_hits_and_misses_are_counted(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.get(self.url, {'continent': 'Mythical'})
+
+        stats = self.client.get(reverse('analytics_api:cache_stats')).data[self.view]
+        self.assertEqual(stats, {'hits': 1, 'misses': 2, 'hit_ratio': 0.3333})
+
+    def test_equivalent_query_strings_share_an_entry(self):
+        self.client.get(f'{self.url}?start_year=2020&end_year=2023')
+        with mock.patch.object(views, 'get_cube') as get_cube_mock:
+            response = self.client.get(f'{self.url}?end_year=2023&country=&start_year=2020')
+        get_cube_mock.assert_not_called()
+        self.assertEqual(response.data[0]['avg_headline_inflation'], 2.0)
+
+    def test_import_invalidates_entries(self):
+        self.assertEqual(len(self.client.get(self.url).data), 1)
+        EconomicIndicator.objects.create(country=self.atlantis, year=2024, headline_consumer_price_inflation=3.0)
+
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+        self.assertEqual(caching.cache_stats()[self.view]['misses'], 2)
+
+    def test_errors_are_not_cached(self):
+        self.client.get(self.url, {'start_year': 'soon'})
+        self.client.get(self.url, {'start_year': 'soon'})
+        self.assertEqual(caching.cache_stats()[self.view]['misses'], 2)
+
+
+class GovernorateTrendsTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tunis = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2)
+        cls.sfax = TunisiaGovernorate.objects.create(name='Sfax', latitude=34.7, longitude=10.8)
+        cls.empty = TunisiaGovernorate.objects.create(name='Zaghouan', latitude=36.4, longitude=10.1)
+        for year, price in ((2021, 2500.0), (2022, 2600.0), (2023, 2700.0)):
+            RealEstatePrices.objects.create(governorate=cls.tunis, year=year, residential_price_per_m2=price)
+        RealEstatePrices.objects.create(governorate=cls.sfax, year=2022, residential_price_per_m2=1500.0, land_price_per_m2=200.0)
+        LaborMarketData.objects.create(governorate=cls.sfax, year=2023, unemployment_rate=12.5)
+
+    def test_batch_returns_columnar_series_for_all_governorates_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('analytics_api:real_estate_price_trends_batch_api'))
+
+        by_name = {g['governorate_name']: g for g in response.data['governorates']}
+        self.assertEqual(list(by_name), ['Sfax', 'Tunis', 'Zaghouan'])
+        self.assertEqual(by_name['Tunis']['years'], [2021, 2022, 2023])
+        self.assertEqual(by_name['Tunis']['residential_prices'], [2500.0, 2600.0, 2700.0])
+        self.assertEqual(by_name['Sfax']['land_prices'], [200.0])
+        self.assertEqual(by_name['Zaghouan']['years'], [])
+
+    def test_batch_selection_and_year_range(self):
+        response = self.client.get(reverse('analytics_api:real_estate_price_trends_batch_api'), {
+            'governorates': f'{self.tunis.pk},{self.empty.pk}', 'start_year': 2022, 'end_year': 2022,
+        })
+
+        self.assertEqual(response.data['filters'], {'start_year': 2022, 'end_year': 2022})
+        series = response.data['governorates']
+        self.assertEqual([g['governorate_id'] for g in series], [self.tunis.pk, self.empty.pk])
+        self.assertEqual(series[0]['years'], [2022])
+        self.assertEqual(series[1]['residential_prices'], [])
+
+    def test_batch_rejects_bad_parameters(self):
+        url = reverse('analytics_api:labor_market_trends_batch_api')
+        self.assertEqual(self.client.get(url, {'governorates': 'tunis'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start_year': 'x'}).status_code, 400)
+
+    def test_single_governorate_endpoints(self):
+        response = self.client.get(reverse('analytics_api:labor_market_trends_api', args=[self.sfax.pk]))
+        self.assertEqual(response.data['governorate_name'], 'Sfax')
+        self.assertEqual(response.data['unemployment_rate'], [12.5])
+        self.assertNotIn('governorate_id', response.data)
+
+        missing = self.client.get(reverse('analytics_api:real_estate_price_trends_api', args=[0]))
+        self.assertEqual(missing.status_code, 404)
+
+
+class TunisiaDashboardBundleTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tunis = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2, coastal_access=True)
+        cls.sfax = TunisiaGovernorate.objects.create(name='Sfax', latitude=34.7, longitude=10.8)
+        cls.kef = TunisiaGovernorate.objects.create(name='Kef', latitude=36.2, longitude=8.7)
+        LaborMarketData.objects.create(governorate=cls.tunis, year=2022, unemployment_rate=14.0)
+        LaborMarketData.objects.create(governorate=cls.tunis, year=2023, unemployment_rate=13.0)
+        RealEstatePrices.objects.create(governorate=cls.sfax, year=2023, residential_price_per_m2=1500.0)
+        for governorate, score in ((cls.tunis, 80.0), (cls.sfax, 90.0), (cls.kef, 70.0)):
+            InvestmentScore.objects.create(governorate=governorate, sector='tourism', overall_score=score)
+        InvestmentScore.objects.create(governorate=cls.kef, sector='agriculture', overall_score=85.0)
+
+    def test_bundle_in_two_queries(self):
+        url = reverse('analytics_api:tunisia_dashboard_bundle_api')
+        with self.assertNumQueries(2):
+            data = self.client.get(url, {'top': 2}).data
+
+        self.assertEqual(data['governorates']['name'], ['Kef', 'Sfax', 'Tunis'])
+        self.assertEqual(data['governorates']['coastal_access'], [False, False, True])
+        # Latest figures are aligned with the governorate columns
+        self.assertEqual(data['latest_labor_market']['year'], [None, None, 2023])
+        self.assertEqual(data['latest_labor_market']['unemployment_rate'], [None, None, 13.0])
+        self.assertEqual(data['latest_real_estate']['residential_price_per_m2'], [None, 1500.0, None])
+        self.assertEqual(data['top_investment_scores']['tourism'], {
+            'governorate_id': [self.sfax.pk, self.tunis.pk], 'overall_score': [90.0, 80.0],
+        })
+        self.assertEqual(data['top_investment_scores']['agriculture']['governorate_id'], [self.kef.pk])
+
+        with self.assertNumQueries(0):
+            self.client.get(url, {'top': 2})
+
+    def test_invalid_top(self):
+        url = reverse('analytics_api:tunisia_dashboard_bundle_api')
+        self.assertEqual(self.client.get(url, {'top': 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'top': 'all'}).status_code, 400)
+
+
+class InvestmentRankingTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tunis = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2)
+        cls.sfax = TunisiaGovernorate.objects.create(name='Sfax', latitude=34.7, longitude=10.8)
+        cls.kef = TunisiaGovernorate.objects.create(name='Kef', latitude=36.2, longitude=8.7)
+        scores = {
+            # governorate: {sector: (overall, labor, infrastructure, tax incentive, market access)}
+            cls.tunis: {'tourism': (80, 60, 90, 20, 95), 'technology': (90, 70, 95, 30, 90)},
+            cls.sfax: {'tourism': (70, 80, 70, 40, 60), 'technology': (75, 90, 60, 50, 55)},
+            cls.kef: {'tourism': (40, 95, 20, 90, 10)},
+        }
+        for governorate, by_sector in scores.items():
+            for sector, (overall, labor, infrastructure, tax, market) in by_sector.items():
+                InvestmentScore.objects.create(
+                    governorate=governorate, sector=sector, overall_score=overall, labor_score=labor,
+                    infrastructure_score=infrastructure, tax_incentive_score=tax, market_access_score=market,
+                )
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('api_investment_ranking')
+
+    def test_default_ranks_by_mean_overall_score_over_all_sectors_scored(self):
+        data = self.client.get(self.url, {'sectors': 'tourism'}).data
+
+        self.assertEqual([r['governorate'] for r in data['results']], ['Tunis', 'Sfax', 'Kef'])
+        self.assertEqual(data['weights'], {'overall_score': 1.0})
+        self.assertEqual(data['results'][0]['sector_scores'], {'tourism': 80.0})
+
+    def test_custom_weights_and_multiple_sectors(self):
+        data = self.client.get(self.url, {'sectors': 'tourism,technology', 'weights': 'labor:3,tax_incentive:1'}).data
+
+        # Kef has no technology score, so it is not ranked for both sectors
+        self.assertEqual([r['governorate'] for r in data['results']], ['Sfax', 'Tunis'])
+        self.assertEqual(data['results'][0]['score'], round((0.75 * 80 + 0.25 * 40 + 0.75 * 90 + 0.25 * 50) / 2, 2))
+        self.assertEqual(data['weights'], {'labor_score': 0.75, 'tax_incentive_score': 0.25})
+
+    def test_top_k_and_min_score(self):
+        data = self.client.get(self.url, {'sectors': 'tourism', 'weights': 'labor:1', 'top': 1}).data
+        self.assertEqual([r['governorate'] for r in data['results']], ['Kef'])
+
+        data = self.client.get(self.url, {'sectors': 'tourism', 'min_score': 75}).data
+        self.assertEqual([r['governorate'] for r in data['results']], ['Tunis'])
+
+    def test_weight_changes_reuse_the_cached_matrix(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            for weights in ('labor:1', 'labor:1,market_access:2', 'infrastructure:1'):
+                self.client.get(self.url, {'weights': weights})
+
+        InvestmentScore.objects.filter(governorate=self.kef).update(overall_score=99)
+        versioning.bump(versioning.TUNISIA)
+        self.assertEqual(self.client.get(self.url, {'sectors': 'tourism'}).data['results'][0]['governorate'], 'Kef')
+
+    def test_invalid_parameters(self):
+        for params in ({'sectors': 'mining'}, {'weights': 'luck:1'}, {'weights': 'labor:x'},
+                       {'weights': 'labor:0'}, {'weights': 'labor:inf'}, {'weights': 'labor:1e309'},
+                       {'weights': 'labor:nan'}, {'weights': 'labor:1e308,overall:1e308'}, {'top': 0}, {'min_score': 'high'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+
+class QueryPlanTests(AnalyticsAPITestCase):
+    """
+    No endpoint query may read a table without an index, except the whole-table loads
+    that the in-memory structures (indicator cube, score matrix) are built from.
+    """
+    CUBE = {'countries_economicindicator'}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        country = Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+        indicator = EconomicIndicator.objects.create(country=country, year=2023, happiness_score=7.5)
+        HappinessPrediction.objects.create(indicator=indicator, predicted_score=7.0, model_version='test')
+        governorate = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2)
+        RealEstatePrices.objects.create(governorate=governorate, year=2023, residential_price_per_m2=2500)
+        LaborMarketData.objects.create(governorate=governorate, year=2023, unemployment_rate=12.0)
+        InvestmentScore.objects.create(governorate=governorate, sector='tourism', overall_score=80)
+        cls.governorate = governorate
+
+    def endpoints(self):
+        """(url, query params, tables the endpoint may scan)."""
+        gov = self.governorate.pk
+        return [
+            (reverse('analytics_api:global_dashboard_data'), {}, set()),
+            (reverse('analytics_api:search_countries'), {'q': 'at'}, set()),
+            (reverse('analytics_api:country_detail_data', args=['Atlantis']), {}, self.CUBE),
+            (reverse('analytics_api:inflation_trends'), {'continent': 'Mythical', 'start_year': 2020}, self.CUBE),
+            (reverse('analytics_api:correlation_analysis'), {}, self.CUBE),
+            (reverse('analytics_api:pca_results'), {}, self.CUBE),
+            (reverse('analytics_api:happiness_predictions'), {'country': 'atl'}, self.CUBE),
+            (reverse('analytics_api:happiness_predictions'), {'year': 2023}, set()),
+            (reverse('analytics_api:real_estate_price_trends_api', args=[gov]), {}, set()),
+            (reverse('analytics_api:labor_market_trends_api', args=[gov]), {}, set()),
+            (reverse('analytics_api:real_estate_price_trends_batch_api'), {'start_year': 2020}, set()),
+            (reverse('analytics_api:labor_market_trends_batch_api'), {'governorates': gov}, set()),
+            (reverse('analytics_api:tunisia_dashboard_bundle_api'), {}, set()),
+            (reverse('countries_api:list_all_countries_api'), {}, set()),
+            (reverse('countries_api:country_comparison_api'), {'countries': 'Atlantis'}, set()),
+            (reverse('api_investment_advisor'), {'sector': 'Tourism'}, set()),
+            (reverse('api_investment_ranking'), {}, {'tunisia_investmentscore'}),
+        ]
+
+    def test_no_endpoint_query_scans_a_table(self):
+        for url, params, allowed in self.endpoints():
+            cache.clear()
+            versioning.touch(versioning.COUNTRIES)
+            versioning.touch(versioning.TUNISIA)
+            with self.subTest(url=url, params=params), CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                offenders = full_scans(ctx.captured_queries, allowed)
+                self.assertEqual(offenders, [], '\n'.join(f'{sql}\n  {plan}' for sql, _, plan in offenders))
+
+    def test_detects_full_scans(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(Country.objects.filter(region__icontains='x'))
+            list(Country.objects.filter(name='Atlantis'))
+        offenders = full_scans(ctx.captured_queries)
+        self.assertEqual([tables for _, tables, _ in offenders], [['countries_country']])
+
+
+class SyntheticDataTests(TestCase):
+    reference_file = settings.BASE_DIR.parent.parent / 'WHI_Inflation.csv'
+    data_dir = settings.BASE_DIR.parent.parent / 'newdata'
+
+    def generate(self, *args):
+        out = StringIO()
+        call_command(
+            'generate_synthetic_data', *args, reference_file=str(self.reference_file),
+            tunisia_data_dir=str(self.data_dir), stdout=out,
+        )
+        return out.getvalue()
+
+    def test_generates_countries_similar_to_the_reference(self):
+        self.generate('--countries', '40', '--years', '25', '--start-year', '1990')
+
+        self.assertEqual(Country.objects.count(), 40)
+        self.assertEqual(len(set(Country.objects.values_list('code', flat=True))), 40)
+        self.assertEqual(EconomicIndicator.objects.count(), 40 * 25)
+        self.assertEqual(LatestEconomicIndicator.objects.filter(year=2014).count(), 40)
+        reference = WHI_INFLATION.read_frame(str(self.reference_file))
+        generated = pd.DataFrame(list(EconomicIndicator.objects.values('happiness_score', 'gdp_per_capita')))
+        low, high = reference['happiness_score'].min(), reference['happiness_score'].max()
+        self.assertTrue(generated['happiness_score'].dropna().between(low, high).all())
+        # The strong happiness/GDP correlation of the real data carries over
+        self.assertGreater(generated.corr().loc['happiness_score', 'gdp_per_capita'], 0.4)
+
+    def test_same_seed_is_reproducible_and_rerun_upserts(self):
+        self.generate('--countries', '5', '--years', '3', '--seed', '7')
+        first = list(EconomicIndicator.objects.order_by('country__name', 'year').values_list('fingerprint', flat=True))
+        self.generate('--countries', '5', '--years', '3', '--seed', '7')
+
+        self.assertEqual(EconomicIndicator.objects.count(), 15)
+        self.assertEqual(first, list(EconomicIndicator.objects.order_by('country__name', 'year').values_list('fingerprint', flat=True)))
+
+    def test_generates_governorates_and_scores(self):
+        self.generate('--countries', '0', '--governorates', '3', '--governorate-years', '4')
+
+        self.assertEqual(TunisiaGovernorate.objects.count(), 3)
+        self.assertEqual(RealEstatePrices.objects.count(), 12)
+        self.assertEqual(LaborMarketData.objects.count(), 12)
+        self.assertEqual(TunisiaLaborMarketData.objects.count(), 12)
+        self.assertEqual(InvestmentScore.objects.count(), 3 * len(scoring.SECTORS))
+
+    def test_clear_removes_only_synthetic_rows(self):
+        Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+        tunis = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2, unemployment_rate=15.0)
+        self.generate('--countries', '3', '--years', '2', '--governorates', '2', '--governorate-years', '1')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.generate('--clear')
+
+        self.assertEqual(list(Country.objects.values_list('name', flat=True)), ['Atlantis'])
+        self.assertFalse(EconomicIndicator.objects.exists())
+        self.assertFalse(LatestEconomicIndicator.objects.exists())
+        self.assertEqual(list(TunisiaGovernorate.objects.all()), [tunis])
+        # Tunis is rescored on its own rather than against the deleted governorates
+        self.assertEqual(InvestmentScore.objects.filter(governorate=tunis).count(), len(scoring.SECTORS))
+        self.assertEqual(scoring.recompute_investment_scores(), 0)
+        # One DELETE per table; rows are not loaded, signalled and deleted one by one
+        self.assertLess(len(ctx.captured_queries), 30)
+
+
+class EndpointBenchmarkTests(AnalyticsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        country = Country.objects.create(name='Atlantis', code='ATL', continent='Mythical', latitude=1.0, longitude=2.0)
+        EconomicIndicator.objects.create(country=country, year=2023, happiness_score=7.5, gdp_per_capita=1.2)
+        refresh_latest_indicators()
+        governorate = TunisiaGovernorate.objects.create(name='Tunis', latitude=36.8, longitude=10.2)
+        RealEstatePrices.objects.create(governorate=governorate, year=2023, residential_price_per_m2=2500)
+        LaborMarketData.objects.create(governorate=governorate, year=2023, unemployment_rate=12.0)
+
+    def test_reports_every_endpoint(self):
+        out = StringIO()
+        call_command('benchmark_endpoints', '--iterations', '2', '--warmup', '1', '--json', stdout=out)
+        results = {row['endpoint']: row for row in json.loads(out.getvalue())}
+
+        expected = {f'analytics_api:{p.name}' for p in analytics_urls.urlpatterns}
+        expected |= {f'countries_api:{p.name}' for p in countries_urls.urlpatterns}
+        expected |= {p.name for p in tunisia_urls.urlpatterns}
+        self.assertEqual(set(results), expected)
+
+        detail = results['analytics_api:country_detail_data']
+        self.assertEqual(detail['path'], reverse('analytics_api:country_detail_data', args=['Atlantis']))
+        self.assertEqual(detail['status'], 200)
+        self.assertEqual(results['analytics_api:real_estate_price_trends_api']['status'], 200)
+        self.assertEqual(results['analytics_api:async_country_detail_data']['status'], 200)
+        for row in results.values():
+            self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+            self.assertGreater(row['peak_memory_kib'], 0)
+        # Warm runs are served from the response cache: only the session and user lookups remain
+        self.assertEqual(results['analytics_api:inflation_trends']['queries'], 2)
+
+    def test_cold_runs_hit_the_database(self):
+        results = run_benchmarks(iterations=1, cold=True, only=['inflation_trends'])
+
+        self.assertEqual([row['endpoint'] for row in results], ['analytics_api:inflation_trends', 'analytics_api:async_inflation_trends'])
+        self.assertTrue(all(row['queries'] > 0 for row in results))
+        self.assertFalse(get_user_model().objects.filter(username='benchmark').exists())
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'analytics_api' # Namespace for URLs
 
@@ -9,9 +9,29 @@ urlpatterns = [
     path('country-detail/<str:country_name>/', views.country_detail_data, name='country_detail_data'),
     path('inflation-trends/', views.inflation_trends, name='inflation_trends'),
     path('correlation-analysis/', views.correlation_analysis, name='correlation_analysis'),
+    path('pca-results/', views.pca_results, name='pca_results'),
+    path('predict-happiness/', views.predict_happiness, name='predict_happiness'),
+    path('happiness-predictions/', views.happiness_predictions, name='happiness_predictions'),
+    path('cache-stats/', views.cache_stats_api, name='cache_stats'),
     path('test-chart/', views.test_chart_view, name='test_chart_view'), # New URL for the test chart
     path('real-estate-trends/<int:governorate_id>/', views.real_estate_price_trends_api, name='real_estate_price_trends_api'),
     path('labor-market-trends/<int:governorate_id>/', views.labor_market_trends_api, name='labor_market_trends_api'),
+    path('real-estate-trends/', views.real_estate_price_trends_batch_api, name='real_estate_price_trends_batch_api'),
+    path('labor-market-trends/', views.labor_market_trends_batch_api, name='labor_market_trends_batch_api'),
+    path('tunisia-dashboard/', views.tunisia_dashboard_bundle_api, name='tunisia_dashboard_bundle_api'),
+    # Async variants of the read endpoints, for ASGI deployments
+    path('async/global-dashboard-data/', async_views.global_dashboard_data, name='async_global_dashboard_data'),
+    path('async/search-countries/', async_views.search_countries, name='async_search_countries'),
+    path('async/country-detail/<str:country_name>/', async_views.country_detail_data, name='async_country_detail_data'),
+    path('async/inflation-trends/', async_views.inflation_trends, name='async_inflation_trends'),
+    path('async/correlation-analysis/', async_views.correlation_analysis, name='async_correlation_analysis'),
+    path('async/pca-results/', async_views.pca_results, name='async_pca_results'),
+    path('async/happiness-predictions/', async_views.happiness_predictions, name='async_happiness_predictions'),
+    path('async/real-estate-trends/<int:governorate_id>/', async_views.real_estate_price_trends_api, name='async_real_estate_price_trends_api'),
+    path('async/labor-market-trends/<int:governorate_id>/', async_views.labor_market_trends_api, name='async_labor_market_trends_api'),
+    path('async/real-estate-trends/', async_views.real_estate_price_trends_batch_api, name='async_real_estate_price_trends_batch_api'),
+    path('async/labor-market-trends/', async_views.labor_market_trends_batch_api, name='async_labor_market_trends_batch_api'),
+    path('async/tunisia-dashboard/', async_views.tunisia_dashboard_bundle_api, name='async_tunisia_dashboard_bundle_api'),
     path('tunisia-map/', views.tunisia_map_view, name='tunisia_map_view'), # URL for the Tunisia map page
     path('world-map/', views.world_map_view, name='world_map_page'), # URL for the new World Map page
     path('investment-advisor/', views.investment_advisor_view, name='investment_advisor_page'), # URL for Investment Advisor
@@ -0,0 +1,107 @@
+"""
+Dataset version tokens.
+
+Every process reads the same small token file per scope ('countries', 'tunisia'), so
+in-memory structures and HTTP caches can tell that an import happened without asking
+the database. Writers call `bump(scope)`: the shared token is rewritten when the
+transaction commits, so other workers never reload before the new rows are visible,
+while the writing process sees its own change immediately.
+"""
+import os
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+COUNTRIES = 'countries'
+TUNISIA = 'tunisia'
+
+# Models whose writes change a scope, as app_label.ModelName
+SCOPE_MODELS = {
+    COUNTRIES: (
+        'countries.Country', 'countries.EconomicIndicator', 'countries.LatestEconomicIndicator',
+        'countries.HappinessPrediction',
+    ),
+    TUNISIA: (
+        'tunisia.TunisiaGovernorate', 'tunisia.RealEstatePrices', 'tunisia.LaborMarketData',
+        'tunisia.InvestmentScore', 'tunisia.TaxIncentives', 'analytics.LaborMarketData',
+    ),
+}
+
+# Writes made by this process, including ones not committed yet. They are tagged with a
+# per-process id so a token never names another process's uncommitted state.
+_local_writes = Counter()
+_process_id = uuid.uuid4().hex[:8]
+
+
+def _path(scope):
+    return os.path.join(settings.VAR_DIR, 'versions', scope)
+
+
+def committed(scope):
+    """
+    The scope's shared token, identical in every process. Use it for anything compared
+    across workers (HTTP validators); current() also reflects this process's own writes.
+    """
+    try:
+        with open(_path(scope)) as handle:
+            return handle.read() or '0'
+    except FileNotFoundError:
+        return '0'
+
+
+def current(scope):
+    """Returns the scope's version token for in-process caches (a short string, stable until the next bump)."""
+    token = committed(scope)
+    local = _local_writes[scope]
+    return f'{token}-{_process_id}.{local}' if local else token
+
+
+def last_modified(scope):
+    """Time of the scope's last committed bump (a Unix timestamp), or None if it was never bumped."""
+    try:
+        return os.stat(_path(scope)).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _write(scope):
+    path = _path(scope)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as handle:
+        handle.write(uuid.uuid4().hex)
+    os.replace(tmp, path)  # atomic, readers never see a partial token
+
+
+def bump(scope, using=None):
+    """Marks `scope` as changed, for other processes once the surrounding transaction (if any) commits."""
+    _local_writes[scope] += 1
+    transaction.on_commit(lambda: _write(scope), using=using)
+
+
+def touch(scope):
+    """Invalidates this process's view of `scope` only, e.g. after rolling back writes that had bumped it."""
+    _local_writes[scope] += 1
+
+
+def scope_for(model):
+    label = model._meta.label
+    for scope, labels in SCOPE_MODELS.items():
+        if label in labels:
+            return scope
+    return None
+
+
+def _model_changed(sender, using=None, **kwargs):
+    scope = scope_for(sender)
+    if scope:
+        bump(scope, using=using)
+
+
+def connect_signals():
+    """Bumps the owning scope on every ORM save/delete; bulk writers call bump() themselves."""
+    from django.db.models.signals import post_delete, post_save
+    post_save.connect(_model_changed, dispatch_uid='versioning_post_save')
+    post_delete.connect(_model_changed, dispatch_uid='versioning_post_delete')
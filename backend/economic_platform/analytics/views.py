@@ -1,14 +1,29 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
-from countries.models import Country, EconomicIndicator # Ensure these are the correct model names
-from tunisia.models import RealEstatePrices, TunisiaGovernorate # Import RealEstatePrices and TunisiaGovernorate
-from .models import LaborMarketData # Import LaborMarketData
+from countries.models import HappinessPrediction, LatestEconomicIndicator, INDICATOR_FIELDS # Ensure these are the correct model names
+from tunisia.models import TunisiaGovernorate # Import TunisiaGovernorate
 from .chart_configs import CHART_CONFIGURATIONS # For potential use in correlation_analysis later
-from django.db.models import Max, F, Q, Avg
+from django.db.models import Subquery
 from django.db.models.functions import ExtractYear
-from django.shortcuts import get_object_or_404, render # Added import, and render
+from django.shortcuts import render
 import pandas as pd # For potential complex data manipulation, if needed
+import numpy as np
+from economic_platform.middleware import etag_exempt
+from . import versioning
+from .api import InvalidRequest, int_param, year_range
+from .caching import cache_stats, cached_response
+from .cube import get_cube
+from .governorates import BUNDLE_TOP_SCORES, LABOR_MARKET_SERIES, REAL_ESTATE_SERIES, dashboard_bundle, governorate_series
+from .pagination import Listing, streamed
+from .pca import get_model as get_pca_model, project_countries
+from .prediction import HAPPINESS_FEATURES, ModelNotAvailable, get_model as get_happiness_model
+from .renderers import TIME_SERIES_RENDERERS, columnar
+from .search import get_search_index
+from .stats import CORRELATION_METHODS, correlation_matrix, to_nested_lists
+
+# The payload functions below are shared by these DRF views and their async variants
+# (async_views): they take already loaded data (cube, models, query rows) and do no I/O.
 
 # New view for testing Chart.js
 def test_chart_view(request):
@@ -22,41 +37,31 @@ def test_chart_view(request):
     }
     return render(request, 'analytics/test_chart.html', context)
 
+def latest_happiness_rows():
+    """
+    One indexed read of the latest-indicator snapshot: countries with a happiness score
+    in the dataset's latest year (the subquery), and coordinates.
+    """
+    latest_year = LatestEconomicIndicator.objects.order_by('-year').values('year')[:1]
+    return LatestEconomicIndicator.objects.filter(
+        happiness_score_year=Subquery(latest_year),
+        country__latitude__isnull=False,
+        country__longitude__isnull=False,
+    ).order_by('country__name').values_list(
+        'country__name', 'happiness_score', 'country__latitude', 'country__longitude', 'country__code'
+    )
+
+def global_dashboard_payload(rows):
+    return [
+        {'country': name, 'happiness': score, 'lat': lat, 'lng': lng, 'code': code}
+        for name, score, lat, lng, code in rows
+    ]
+
 @api_view(['GET'])
+@cached_response([versioning.COUNTRIES])
 def global_dashboard_data(request):
     try:
-        latest_year_data = EconomicIndicator.objects.aggregate(latest_year=Max('year'))
-        latest_year = latest_year_data.get('latest_year')
-
-        if not latest_year:
-            return Response([], status=status.HTTP_200_OK)
-
-        countries_with_happiness = Country.objects.filter(
-            economic_indicators__year=latest_year,
-            economic_indicators__happiness_score__isnull=False,
-            latitude__isnull=False,
-            longitude__isnull=False
-        ).annotate(
-            latest_happiness_score=F('economic_indicators__happiness_score')
-        ).values(
-            'name',
-            'latest_happiness_score',
-            'latitude',
-            'longitude',
-            'code'
-        ).distinct()
-
-        formatted_data = []
-        for country_data in countries_with_happiness:
-            formatted_data.append({
-                'country': country_data['name'],
-                'happiness': country_data['latest_happiness_score'],
-                'lat': country_data['latitude'],
-                'lng': country_data['longitude'],
-                'code': country_data['code']
-            })
-
-        return Response(formatted_data)
+        return Response(global_dashboard_payload(latest_happiness_rows()))
     except Exception as e:
         print(f"Error in global_dashboard_data: {e}")
         return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -68,195 +73,275 @@ def search_countries(request):
         return Response([], status=status.HTTP_200_OK)
 
     try:
-        latest_year_overall_data = EconomicIndicator.objects.aggregate(max_year=Max('year'))
-        latest_year_overall = latest_year_overall_data.get('max_year')
-
-        countries_qs = Country.objects.filter(
-            Q(name__icontains=query) | Q(code__iexact=query)
-        )
-
-        results = []
-        for country in countries_qs:
-            data = {
-                'name': country.name,
-                'code': country.code,
-                'continent': country.continent,
-                'region': country.region,
-                'happiness_score': None
-            }
-            if latest_year_overall:
-                latest_indicator = EconomicIndicator.objects.filter(
-                    country=country,
-                    year=latest_year_overall,
-                    happiness_score__isnull=False
-                ).values('happiness_score').first()
-                if latest_indicator:
-                    data['happiness_score'] = latest_indicator['happiness_score']
-            results.append(data)
-
-        results.sort(key=lambda x: (
-            x['code'].lower() != query.lower(),
-            not x['name'].lower().startswith(query.lower()),
-            x['name']
-        ))
-
-        return Response(results[:10])
+        # In-memory index with latest happiness scores precomputed; no queries per keystroke
+        return Response(get_search_index().search(query, limit=10))
     except Exception as e:
         print(f"Error in search_countries: {e}")
         return Response({'error': 'An unexpected error occurred. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-@api_view(['GET'])
-def country_detail_data(request, country_name):
-    try:
-        country = get_object_or_404(Country, Q(name__iexact=country_name) | Q(code__iexact=country_name))
-        indicators = EconomicIndicator.objects.filter(country=country).order_by('year')
-
-        country_info = {
-            'name': country.name,
-            'code': country.code,
-            'continent': country.continent,
-            'region': country.region,
-            'population': country.population,
-            'latitude': country.latitude,
-            'longitude': country.longitude,
-        }
+def country_detail_payload(cube, country_name, as_columns=False):
+    index = cube.find_country(country_name)
+    if index is None:
+        raise InvalidRequest(f"Country '{country_name}' not found.", status.HTTP_404_NOT_FOUND)
 
-        if not indicators.exists():
-            return Response({
-                'country_info': country_info,
-                'error': 'No economic indicator data found for this country.'
-            }, status=status.HTTP_200_OK) # Changed to 200 with error message in body as per common practice
-
-        indicator_data_list = []
-        for ind in indicators:
-            indicator_data_list.append({
-                'year': ind.year,
-                'headline_consumer_price_inflation': ind.headline_consumer_price_inflation,
-                'energy_consumer_price_inflation': ind.energy_consumer_price_inflation,
-                'food_consumer_price_inflation': ind.food_consumer_price_inflation,
-                'official_core_consumer_price_inflation': ind.official_core_consumer_price_inflation,
-                'producer_price_inflation': ind.producer_price_inflation,
-                'gdp_deflator_index_growth_rate': ind.gdp_deflator_index_growth_rate,
-                'happiness_score': ind.happiness_score,
-                'gdp_per_capita': ind.gdp_per_capita,
-                'social_support': ind.social_support,
-                'healthy_life_expectancy_at_birth': ind.healthy_life_expectancy_at_birth,
-                'freedom_to_make_life_choices': ind.freedom_to_make_life_choices,
-                'generosity': ind.generosity,
-                'perceptions_of_corruption': ind.perceptions_of_corruption,
-            })
-
-        response_data = {
+    country_info = cube.country_info(index)
+    if not cube.present[index].any():
+        # 200 with the error message in the body, as per common practice
+        return {
             'country_info': country_info,
-            'economic_indicators': indicator_data_list,
+            'error': 'No economic indicator data found for this country.'
         }
-        return Response(response_data)
-    except Country.DoesNotExist: # This is technically handled by get_object_or_404, but kept for clarity
-         return Response({'error': f"Country '{country_name}' not found."}, status=status.HTTP_404_NOT_FOUND)
+    return {
+        'country_info': country_info,
+        'economic_indicators': cube.country_columns(index) if as_columns else cube.country_series(index),
+    }
+
+@api_view(['GET'])
+@renderer_classes(TIME_SERIES_RENDERERS)
+@cached_response([versioning.COUNTRIES])
+def country_detail_data(request, country_name):
+    try:
+        return Response(country_detail_payload(get_cube(), country_name, columnar(request)))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
     except Exception as e:
         print(f"Error in country_detail_data for {country_name}: {e}")
         return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Response key -> EconomicIndicator field averaged per year by inflation_trends
+INFLATION_TREND_METRICS = {
+    'avg_headline_inflation': 'headline_consumer_price_inflation',
+    'avg_food_inflation': 'food_consumer_price_inflation',
+    'avg_energy_inflation': 'energy_consumer_price_inflation',
+    'avg_core_inflation': 'official_core_consumer_price_inflation',
+}
+
+def inflation_trends_payload(cube, params, as_columns=False):
+    years = year_range(params)
+    trend_years, means = cube.yearly_means(
+        INFLATION_TREND_METRICS.values(),
+        cube.country_mask(continent=params.get('continent'), country=params.get('country')),
+        cube.year_mask(years.get('start_year'), years.get('end_year')),
+    )
+    if as_columns:
+        return {'years': trend_years, **{key: means[field] for key, field in INFLATION_TREND_METRICS.items()}}
+    return [
+        {'year': year, **{key: means[field][i] for key, field in INFLATION_TREND_METRICS.items()}}
+        for i, year in enumerate(trend_years)
+    ]
+
 @api_view(['GET'])
+@renderer_classes(TIME_SERIES_RENDERERS)
+@cached_response([versioning.COUNTRIES])
 def inflation_trends(request):
     try:
-        filters = Q()
-        continent = request.query_params.get('continent', None)
-        country_name_or_code = request.query_params.get('country', None)
-        start_year = request.query_params.get('start_year', None)
-        end_year = request.query_params.get('end_year', None)
-
-        if continent:
-            filters &= Q(country__continent__iexact=continent)
-        if country_name_or_code:
-            filters &= (Q(country__name__iexact=country_name_or_code) | Q(country__code__iexact=country_name_or_code))
-        if start_year:
-            try:
-                filters &= Q(year__gte=int(start_year))
-            except ValueError:
-                return Response({'error': 'Invalid start_year format.'}, status=status.HTTP_400_BAD_REQUEST)
-        if end_year:
-            try:
-                filters &= Q(year__lte=int(end_year))
-            except ValueError:
-                return Response({'error': 'Invalid end_year format.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        trends = EconomicIndicator.objects.filter(filters) \
-                    .values('year') \
-                    .annotate(
-                        avg_headline_inflation=Avg('headline_consumer_price_inflation'),
-                        avg_food_inflation=Avg('food_consumer_price_inflation'),
-                        avg_energy_inflation=Avg('energy_consumer_price_inflation'),
-                        avg_core_inflation=Avg('official_core_consumer_price_inflation')
-                    ).order_by('year')
-
-        return Response(list(trends))
+        return Response(inflation_trends_payload(get_cube(), request.query_params, columnar(request)))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
     except Exception as e:
         print(f"Error in inflation_trends: {e}")
         return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def compute_correlations(cube, metrics, method, continent=None, start_year=None, end_year=None):
+    """Correlation matrix over every (country, year) row selected by the filters."""
+    selected = cube.present & cube.country_mask(continent=continent)[:, None] & cube.year_mask(start_year, end_year)[None, :]
+    observations = cube.values[selected][:, [cube.metric_index[m] for m in metrics]]
+    matrix, counts = correlation_matrix(observations, method)
+    return {
+        'headers': list(metrics),
+        'method': method,
+        'matrix': to_nested_lists(matrix, decimals=4),
+        'pair_counts': counts.tolist(),
+        'observations': int(selected.sum()),
+    }
+
+def correlation_payload(cube, pca_model, params):
+    metrics = params.get('metrics')
+    metrics = [m.strip() for m in metrics.split(',') if m.strip()] if metrics else list(INDICATOR_FIELDS)
+    unknown = [m for m in metrics if m not in INDICATOR_FIELDS]
+    if unknown:
+        raise InvalidRequest(f"Unknown metrics: {', '.join(unknown)}.")
+
+    method = params.get('method', 'pearson').lower()
+    if method not in CORRELATION_METHODS:
+        raise InvalidRequest(f"Invalid method. Use one of: {', '.join(CORRELATION_METHODS)}.")
+
+    continent = params.get('continent') or None
+    years = year_range(params)
+    correlation = compute_correlations(cube, metrics, method, continent, **years)
+
+    return {
+        'correlation_matrix': correlation,
+        'filters': {'continent': continent, **years},
+        'pca_insights': CHART_CONFIGURATIONS.get('pca_analysis', {}).get('insights', []),
+        'pca_loadings': pca_model.loadings(),
+    }
+
 @api_view(['GET'])
+@cached_response([versioning.COUNTRIES])
 def correlation_analysis(request):
     try:
-        pca_insights = CHART_CONFIGURATIONS.get('pca_analysis', {}).get('insights', [])
-        pca_loadings = CHART_CONFIGURATIONS.get('pca_analysis', {}).get('components_loading', {})
-
-        static_correlation_matrix = {
-            'headers': ['headline_inflation', 'happiness_score', 'gdp_per_capita', 'social_support'],
-            'matrix': [
-                [1.00, -0.25, -0.10, -0.15],
-                [-0.25, 1.00,  0.75,  0.65],
-                [-0.10,  0.75, 1.00,  0.80],
-                [-0.15,  0.65,  0.80, 1.00]
-            ],
-            'notes': "This is a static placeholder correlation matrix. Dynamic calculation is a future enhancement."
-        }
-
-        response_data = {
-            'static_correlation_matrix': static_correlation_matrix,
-            'pca_insights': pca_insights,
-            'pca_loadings': pca_loadings,
-            'message': "Correlation analysis endpoint currently returns static data and PCA insights from configuration."
-        }
-        return Response(response_data)
+        cube = get_cube()
+        return Response(correlation_payload(cube, get_pca_model(cube), request.query_params))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
     except Exception as e:
         print(f"Error in correlation_analysis: {e}")
         return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def pca_payload(cube, model, params):
+    return {
+        'features': list(model.features),
+        'explained_variance_ratio': [round(float(v), 4) for v in model.explained_variance_ratio],
+        'components_loading': model.loadings(),
+        'n_samples': model.n_samples,
+        'points': project_countries(cube, model, int_param(params, 'year')),
+    }
+
 @api_view(['GET'])
-def real_estate_price_trends_api(request, governorate_id):
+@cached_response([versioning.COUNTRIES])
+def pca_results(request):
     try:
-        # Ensure governorate exists
-        governorate = get_object_or_404(TunisiaGovernorate, pk=governorate_id)
-
-        prices = RealEstatePrices.objects.filter(governorate=governorate).order_by('year')
-
-        if not prices.exists():
-            return Response({
-                'years': [],
-                'residential_prices': [],
-                'commercial_prices': [],
-                'land_prices': []
-            }, status=status.HTTP_200_OK)
+        cube = get_cube()
+        return Response(pca_payload(cube, get_pca_model(cube), request.query_params))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
+    except Exception as e:
+        print(f"Error in pca_results: {e}")
+        return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        years = [price.year for price in prices]
-        residential_prices = [price.residential_price_per_m2 for price in prices]
-        commercial_prices = [price.commercial_price_per_m2 for price in prices]
-        land_prices = [price.land_price_per_m2 for price in prices]
+# Upper bound on rows per predict_happiness request
+MAX_PREDICTION_ROWS = 10000
 
+@api_view(['POST'])
+def predict_happiness(request):
+    """
+    Batch inference: {"rows": [{feature: value, ...}, ...]} -> one prediction per row.
+    Features left out of a row are imputed by the model.
+    """
+    try:
+        rows = request.data.get('rows') if isinstance(request.data, dict) else None
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return Response({'error': "Expected a non-empty 'rows' list of objects."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_PREDICTION_ROWS:
+            return Response({'error': f'At most {MAX_PREDICTION_ROWS} rows per request.'}, status=status.HTTP_400_BAD_REQUEST)
+        unknown = sorted({key for row in rows for key in row} - set(HAPPINESS_FEATURES))
+        if unknown:
+            return Response({'error': f"Unknown features: {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            features = np.array([[row.get(f) for f in HAPPINESS_FEATURES] for row in rows], dtype=float)
+        except (TypeError, ValueError):
+            return Response({'error': 'Feature values must be numbers or null.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = get_happiness_model()
+        predictions = model.predict(features)
         return Response({
-            'governorate_name': governorate.name,
-            'years': years,
-            'residential_prices': residential_prices,
-            'commercial_prices': commercial_prices,
-            'land_prices': land_prices
+            'model_version': model.version,
+            'predictions': [round(float(p), 4) for p in predictions],
         })
-    except TunisiaGovernorate.DoesNotExist:
-        return Response({'error': f"Governorate with id {governorate_id} not found."}, status=status.HTTP_404_NOT_FOUND)
+    except ModelNotAvailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception as e:
+        print(f"Error in predict_happiness: {e}")
+        return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# Fields of a happiness_predictions row, in the (unique) listing order first
+HAPPINESS_PREDICTION_FIELDS = (
+    'indicator__country__name', 'indicator__year', 'indicator__happiness_score', 'predicted_score', 'model_version',
+)
+
+def happiness_prediction_rows(cube, params):
+    """The predictions query for the country (name or code) and year filters; empty if the country is unknown."""
+    predictions = HappinessPrediction.objects.order_by('indicator__country__name', 'indicator__year')
+    country_name_or_code = params.get('country')
+    if country_name_or_code:
+        # Resolved in memory, so the filter is an indexed country_id lookup rather than a LIKE over every row
+        index = cube.find_country(country_name_or_code)
+        if index is None:
+            return predictions.none().values_list(*HAPPINESS_PREDICTION_FIELDS)
+        predictions = predictions.filter(indicator__country_id=int(cube.country_ids[index]))
+    year = int_param(params, 'year')
+    if year is not None:
+        predictions = predictions.filter(indicator__year=year)
+    return predictions.values_list(*HAPPINESS_PREDICTION_FIELDS)
+
+def happiness_predictions_payload(rows):
+    return [
+        {'country': name, 'year': year, 'happiness_score': actual, 'predicted_score': predicted, 'model_version': version}
+        for name, year, actual, predicted, version in rows
+    ]
+
+# Pages and streams of the predictions, keyed on (country, year)
+HAPPINESS_PREDICTIONS = Listing(HAPPINESS_PREDICTION_FIELDS[:2], key=lambda row: row[:2], to_items=happiness_predictions_payload)
+
+@api_view(['GET'])
+@cached_response([versioning.COUNTRIES])
+def happiness_predictions(request):
+    """
+    Precomputed predictions next to the actual scores, filtered by country (name or code) and/or year.
+    ?limit=N&cursor=... pages through them and ?stream=1 streams them (analytics.pagination).
+    """
+    try:
+        params = request.query_params
+        # The cube is only needed to resolve a country filter
+        rows = happiness_prediction_rows(get_cube() if params.get('country') else None, params)
+        if streamed(params):
+            return HAPPINESS_PREDICTIONS.stream(rows)
+        return Response(HAPPINESS_PREDICTIONS.data(rows, params))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
+    except Exception as e:
+        print(f"Error in happiness_predictions: {e}")
+        return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@etag_exempt
+@api_view(['GET'])
+def cache_stats_api(request):
+    """Per-view hit/miss counters of the response cache in this worker process."""
+    return Response(cache_stats())
+
+def governorate_trends_payload(trends, governorate_id):
+    """The single governorate's series from governorate_series output."""
+    if not trends:
+        raise InvalidRequest(f"Governorate with id {governorate_id} not found.", status.HTTP_404_NOT_FOUND)
+    trends[0].pop('governorate_id')
+    return trends[0]
+
+@api_view(['GET'])
+@renderer_classes(TIME_SERIES_RENDERERS)
+@cached_response([versioning.TUNISIA])
+def real_estate_price_trends_api(request, governorate_id):
+    try:
+        trends = governorate_series('real_estate_prices', REAL_ESTATE_SERIES, [governorate_id])
+        return Response(governorate_trends_payload(trends, governorate_id))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
     except Exception as e:
         print(f"Error in real_estate_price_trends_api for governorate {governorate_id}: {e}")
         return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def bundle_top(params):
+    """?top=N investment scores per sector in the dashboard bundle."""
+    top = int_param(params, 'top')
+    if top is None:
+        return BUNDLE_TOP_SCORES
+    if top < 1:
+        raise InvalidRequest('top must be at least 1.')
+    return top
+
+@api_view(['GET'])
+@cached_response([versioning.TUNISIA])
+def tunisia_dashboard_bundle_api(request):
+    """The Tunisia dashboard's data in one response; ?top=N investment scores per sector."""
+    try:
+        return Response(dashboard_bundle(bundle_top(request.query_params)))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
+    except Exception as e:
+        print(f"Error in tunisia_dashboard_bundle_api: {e}")
+        return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 def tunisia_map_view(request):
     governorates = TunisiaGovernorate.objects.all().values(
         'id', 'name', 'latitude', 'longitude', 'population_2024', 'unemployment_rate'
@@ -267,47 +352,59 @@ def tunisia_map_view(request):
     return render(request, 'analytics/tunisia_map.html', context)
 
 @api_view(['GET'])
+@renderer_classes(TIME_SERIES_RENDERERS)
+@cached_response([versioning.TUNISIA])
 def labor_market_trends_api(request, governorate_id):
     try:
-        governorate = get_object_or_404(TunisiaGovernorate, pk=governorate_id)
-        labor_data = LaborMarketData.objects.filter(governorate=governorate).order_by('year')
-
-        if not labor_data.exists():
-            return Response({
-                'governorate_name': governorate.name, # Return name even if no data
-                'years': [],
-                'unemployment_rate': [],
-                'youth_unemployment': [],
-                'female_unemployment': [],
-                'labor_force_participation': [],
-                'average_wage': [],
-                'job_creation_rate': []
-            }, status=status.HTTP_200_OK)
-
-        years = [data.year for data in labor_data]
-        unemployment_rate = [data.unemployment_rate for data in labor_data]
-        youth_unemployment = [data.youth_unemployment for data in labor_data]
-        female_unemployment = [data.female_unemployment for data in labor_data]
-        labor_force_participation = [data.labor_force_participation for data in labor_data]
-        average_wage = [data.average_wage for data in labor_data]
-        job_creation_rate = [data.job_creation_rate for data in labor_data]
+        trends = governorate_series('labor_market_data', LABOR_MARKET_SERIES, [governorate_id])
+        return Response(governorate_trends_payload(trends, governorate_id))
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
+    except Exception as e:
+        print(f"Error in labor_market_trends_api for governorate {governorate_id}: {e}")
+        return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def batch_trend_filters(params):
+    """
+    (governorate ids or None for all, year range) of a batch trends request:
+    ?governorates=1,2,3 (default: all), optional start_year/end_year.
+    """
+    governorate_ids = params.get('governorates')
+    if governorate_ids:
+        try:
+            governorate_ids = [int(i) for i in governorate_ids.split(',') if i.strip()]
+        except ValueError:
+            raise InvalidRequest('governorates must be a comma-separated list of ids.')
+    else:
+        governorate_ids = None
+    return governorate_ids, year_range(params)
+
+def batch_governorate_trends(request, relation, series, view_name):
+    """Columnar series for several governorates from one query."""
+    try:
+        governorate_ids, years = batch_trend_filters(request.query_params)
         return Response({
-            'governorate_name': governorate.name,
-            'years': years,
-            'unemployment_rate': unemployment_rate,
-            'youth_unemployment': youth_unemployment,
-            'female_unemployment': female_unemployment,
-            'labor_force_participation': labor_force_participation,
-            'average_wage': average_wage,
-            'job_creation_rate': job_creation_rate
+            'filters': years,
+            'governorates': governorate_series(relation, series, governorate_ids, **years),
         })
-    except TunisiaGovernorate.DoesNotExist:
-        return Response({'error': f"Governorate with id {governorate_id} not found."}, status=status.HTTP_404_NOT_FOUND)
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
     except Exception as e:
-        print(f"Error in labor_market_trends_api for governorate {governorate_id}: {e}")
+        print(f"Error in {view_name}: {e}")
         return Response({'error': 'An unexpected error occurred.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@renderer_classes(TIME_SERIES_RENDERERS)
+@cached_response([versioning.TUNISIA])
+def real_estate_price_trends_batch_api(request):
+    return batch_governorate_trends(request, 'real_estate_prices', REAL_ESTATE_SERIES, 'real_estate_price_trends_batch_api')
+
+@api_view(['GET'])
+@renderer_classes(TIME_SERIES_RENDERERS)
+@cached_response([versioning.TUNISIA])
+def labor_market_trends_batch_api(request):
+    return batch_governorate_trends(request, 'labor_market_data', LABOR_MARKET_SERIES, 'labor_market_trends_batch_api')
+
 def world_map_view(request):
     """Renders the world map page."""
     context = {
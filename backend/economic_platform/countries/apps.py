@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CountriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'countries'
+
+    def ready(self):
+        from . import snapshots
+        snapshots.connect_signals()
@@ -0,0 +1,27 @@
+"""
+Async variants of the countries read endpoints, for ASGI deployments (under
+/api/countries/async/); same JSON as the DRF views, queries through the async ORM.
+"""
+from analytics.api import InvalidRequest, alist, async_api_view
+from analytics.pagination import streamed
+
+from .views import (
+    COUNTRIES_PARAM_REQUIRED, COUNTRY_LIST, comparison_payload, comparison_queryset, country_list_rows,
+    requested_country_names,
+)
+
+
+@async_api_view(['GET'])
+async def country_comparison(request):
+    country_names = requested_country_names(request.GET)
+    if country_names is None:
+        raise InvalidRequest(COUNTRIES_PARAM_REQUIRED)
+    # The serializer reads the select_related snapshot only, so it runs no query here
+    return comparison_payload(country_names, await alist(comparison_queryset(country_names)))
+
+
+@async_api_view(['GET'])
+async def list_all_countries(request):
+    if streamed(request.GET):
+        return COUNTRY_LIST.astream(country_list_rows())
+    return await COUNTRY_LIST.adata(country_list_rows(), request.GET)
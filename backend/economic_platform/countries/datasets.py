@@ -0,0 +1,30 @@
+from analytics.ingestion import Column, Dataset
+from .models import EconomicIndicator, INDICATOR_FIELDS
+
+# WHI_Inflation.csv; headers are matched case-insensitively, which covers both the
+# "GDP Deflator Index Growth Rate" and "GDP deflator Index growth rate" spellings.
+WHI_INFLATION = Dataset(
+    EconomicIndicator,
+    columns=[
+        Column('Country', 'country', 'str', required=True), # Country name, resolved to an id by the caller
+        Column('Year', 'year', 'int', required=True),
+        Column('Continent/Region', 'continent_region', 'str'), # Belongs to Country, not written here
+        Column('Headline Consumer Price Inflation', 'headline_consumer_price_inflation'),
+        Column('Energy Consumer Price Inflation', 'energy_consumer_price_inflation'),
+        Column('Food Consumer Price Inflation', 'food_consumer_price_inflation'),
+        Column('Official Core Consumer Price Inflation', 'official_core_consumer_price_inflation'),
+        Column('Producer Price Inflation', 'producer_price_inflation'),
+        Column('GDP Deflator Index Growth Rate', 'gdp_deflator_index_growth_rate'),
+        Column('Score', 'happiness_score'),
+        Column('GDP per Capita', 'gdp_per_capita'),
+        Column('Social Support', 'social_support'),
+        Column('Healthy Life Expectancy at Birth', 'healthy_life_expectancy_at_birth'),
+        Column('Freedom to Make Life Choices', 'freedom_to_make_life_choices'),
+        Column('Generosity', 'generosity'),
+        Column('Perceptions of Corruption', 'perceptions_of_corruption'),
+    ],
+    natural_key=('country', 'year'),
+    lookups={'country': 'Country'},
+    fingerprint_field='fingerprint',
+    fingerprint_fields=INDICATOR_FIELDS,
+)
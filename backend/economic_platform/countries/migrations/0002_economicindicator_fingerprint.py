@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:10
+
+import hashlib
+
+from django.db import migrations, models
+
+FIELDS = (
+    'headline_consumer_price_inflation', 'energy_consumer_price_inflation',
+    'food_consumer_price_inflation', 'official_core_consumer_price_inflation',
+    'producer_price_inflation', 'gdp_deflator_index_growth_rate', 'happiness_score',
+    'gdp_per_capita', 'social_support', 'healthy_life_expectancy_at_birth',
+    'freedom_to_make_life_choices', 'generosity', 'perceptions_of_corruption',
+)
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # Mirrors EconomicIndicator.compute_fingerprint so the first delta import sees existing rows as unchanged
+    EconomicIndicator = apps.get_model('countries', 'EconomicIndicator')
+    batch = []
+    for indicator in EconomicIndicator.objects.only(*FIELDS).iterator(chunk_size=2000):
+        values = (getattr(indicator, f) for f in FIELDS)
+        normalized = '|'.join('' if v is None else format(float(v), '.12g') for v in values)
+        indicator.fingerprint = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+        batch.append(indicator)
+    EconomicIndicator.objects.bulk_update(batch, ['fingerprint'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='economicindicator',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0002_economicindicator_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HappinessPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('predicted_score', models.FloatField()),
+                ('model_version', models.CharField(max_length=32)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('indicator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='happiness_prediction', to='countries.economicindicator')),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+FIELDS = (
+    'headline_consumer_price_inflation', 'energy_consumer_price_inflation',
+    'food_consumer_price_inflation', 'official_core_consumer_price_inflation',
+    'producer_price_inflation', 'gdp_deflator_index_growth_rate', 'happiness_score',
+    'gdp_per_capita', 'social_support', 'healthy_life_expectancy_at_birth',
+    'freedom_to_make_life_choices', 'generosity', 'perceptions_of_corruption',
+)
+
+
+def build_snapshot(apps, schema_editor):
+    # One row per country copied from its latest EconomicIndicator
+    EconomicIndicator = apps.get_model('countries', 'EconomicIndicator')
+    LatestEconomicIndicator = apps.get_model('countries', 'LatestEconomicIndicator')
+    latest_year = (
+        EconomicIndicator.objects.filter(country=OuterRef('country'))
+        .order_by().values('country').annotate(latest=Max('year')).values('latest')
+    )
+    rows = EconomicIndicator.objects.order_by().filter(year=Subquery(latest_year)).values('country_id', 'year', *FIELDS)
+    LatestEconomicIndicator.objects.bulk_create([LatestEconomicIndicator(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0003_happinessprediction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestEconomicIndicator',
+            fields=[
+                ('country', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_indicator', serialize=False, to='countries.country')),
+                ('year', models.IntegerField(db_index=True)),
+                ('headline_consumer_price_inflation', models.FloatField(blank=True, null=True)),
+                ('energy_consumer_price_inflation', models.FloatField(blank=True, null=True)),
+                ('food_consumer_price_inflation', models.FloatField(blank=True, null=True)),
+                ('official_core_consumer_price_inflation', models.FloatField(blank=True, null=True)),
+                ('producer_price_inflation', models.FloatField(blank=True, null=True)),
+                ('gdp_deflator_index_growth_rate', models.FloatField(blank=True, null=True)),
+                ('happiness_score', models.FloatField(blank=True, null=True)),
+                ('gdp_per_capita', models.FloatField(blank=True, null=True)),
+                ('social_support', models.FloatField(blank=True, null=True)),
+                ('healthy_life_expectancy_at_birth', models.FloatField(blank=True, null=True)),
+                ('freedom_to_make_life_choices', models.FloatField(blank=True, null=True)),
+                ('generosity', models.FloatField(blank=True, null=True)),
+                ('perceptions_of_corruption', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0004_latesteconomicindicator'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['continent', 'name'], name='country_continent_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='economicindicator',
+            index=models.Index(fields=['year', 'country'], name='indicator_year_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='economicindicator',
+            index=models.Index(fields=['year', 'happiness_score'], name='indicator_year_happiness_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+FIELDS = (
+    'headline_consumer_price_inflation', 'energy_consumer_price_inflation',
+    'food_consumer_price_inflation', 'official_core_consumer_price_inflation',
+    'producer_price_inflation', 'gdp_deflator_index_growth_rate', 'happiness_score',
+    'gdp_per_capita', 'social_support', 'healthy_life_expectancy_at_birth',
+    'freedom_to_make_life_choices', 'generosity', 'perceptions_of_corruption',
+)
+
+
+def rebuild_snapshot(apps, schema_editor):
+    # The snapshot now holds each field's latest non-null value rather than a copy of the latest row
+    Country = apps.get_model('countries', 'Country')
+    EconomicIndicator = apps.get_model('countries', 'EconomicIndicator')
+    LatestEconomicIndicator = apps.get_model('countries', 'LatestEconomicIndicator')
+
+    def latest(field, **filters):
+        return Subquery(
+            EconomicIndicator.objects.filter(country=OuterRef('pk'), **filters).order_by('-year').values(field)[:1]
+        )
+
+    rows = Country.objects.annotate(
+        latest_year=latest('year'),
+        **{f'latest_{field}': latest(field, **{f'{field}__isnull': False}) for field in FIELDS},
+    ).filter(latest_year__isnull=False).values_list('pk', 'latest_year', *(f'latest_{field}' for field in FIELDS))
+    LatestEconomicIndicator.objects.all().delete()
+    LatestEconomicIndicator.objects.bulk_create(
+        [LatestEconomicIndicator(country_id=pk, year=year, **dict(zip(FIELDS, values))) for pk, year, *values in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0005_indicator_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:23
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+FIELDS = (
+    'headline_consumer_price_inflation', 'energy_consumer_price_inflation',
+    'food_consumer_price_inflation', 'official_core_consumer_price_inflation',
+    'producer_price_inflation', 'gdp_deflator_index_growth_rate', 'happiness_score',
+    'gdp_per_capita', 'social_support', 'healthy_life_expectancy_at_birth',
+    'freedom_to_make_life_choices', 'generosity', 'perceptions_of_corruption',
+)
+
+
+def fill_value_years(apps, schema_editor):
+    # The year of each snapshot value: the latest year in which the field is not null
+    Country = apps.get_model('countries', 'Country')
+    EconomicIndicator = apps.get_model('countries', 'EconomicIndicator')
+    LatestEconomicIndicator = apps.get_model('countries', 'LatestEconomicIndicator')
+
+    def latest_year(field):
+        return Subquery(
+            EconomicIndicator.objects.filter(country=OuterRef('pk'), **{f'{field}__isnull': False})
+            .order_by('-year').values('year')[:1]
+        )
+
+    rows = Country.objects.filter(latest_indicator__isnull=False).annotate(
+        **{f'latest_{field}_year': latest_year(field) for field in FIELDS}
+    ).values_list('pk', *(f'latest_{field}_year' for field in FIELDS))
+    snapshots = [
+        LatestEconomicIndicator(country_id=pk, **{f'{field}_year': year for field, year in zip(FIELDS, years)})
+        for pk, *years in rows
+    ]
+    LatestEconomicIndicator.objects.bulk_update(snapshots, [f'{field}_year' for field in FIELDS], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('countries', '0006_latest_non_null_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='energy_consumer_price_inflation_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='food_consumer_price_inflation_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='freedom_to_make_life_choices_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='gdp_deflator_index_growth_rate_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='gdp_per_capita_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='generosity_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='happiness_score_year',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='headline_consumer_price_inflation_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='healthy_life_expectancy_at_birth_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='official_core_consumer_price_inflation_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='perceptions_of_corruption_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='producer_price_inflation_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='latesteconomicindicator',
+            name='social_support_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_value_years, migrations.RunPython.noop),
+    ]
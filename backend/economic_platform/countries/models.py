@@ -1,8 +1,30 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Value columns of EconomicIndicator, in a fixed order (used for fingerprints and bulk writes)
+INDICATOR_FIELDS = (
+    'headline_consumer_price_inflation',
+    'energy_consumer_price_inflation',
+    'food_consumer_price_inflation',
+    'official_core_consumer_price_inflation',
+    'producer_price_inflation',
+    'gdp_deflator_index_growth_rate',
+    'happiness_score',
+    'gdp_per_capita',
+    'social_support',
+    'healthy_life_expectancy_at_birth',
+    'freedom_to_make_life_choices',
+    'generosity',
+    'perceptions_of_corruption',
+)
+
+# LatestEconomicIndicator columns holding the year each INDICATOR_FIELDS value comes from
+INDICATOR_YEAR_FIELDS = tuple(f'{field}_year' for field in INDICATOR_FIELDS)
+
 class Country(models.Model):
     """Country basic information"""
     name = models.CharField(max_length=100, unique=True)
@@ -17,6 +39,10 @@ class Country(models.Model):
     
     class Meta:
         verbose_name_plural = "Countries"
+        indexes = [
+            # Continent filters, listed by name
+            models.Index(fields=['continent', 'name'], name='country_continent_name_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -43,16 +69,95 @@ class EconomicIndicator(models.Model):
     generosity = models.FloatField(null=True, blank=True)
     perceptions_of_corruption = models.FloatField(null=True, blank=True)
     
+    # Hash of the normalized indicator values; lets imports skip rows that did not change
+    fingerprint = models.CharField(max_length=32, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['country', 'year']
         ordering = ['-year', 'country__name']
+        indexes = [
+            # Year filters and year ranges across countries (latest year, trends by year);
+            # unique_together only serves lookups that start from the country
+            models.Index(fields=['year', 'country'], name='indicator_year_country_idx'),
+            # Scored rows of a year (happiness rankings and maps)
+            models.Index(fields=['year', 'happiness_score'], name='indicator_year_happiness_idx'),
+        ]
     
     def __str__(self):
         return f"{self.country.name} - {self.year} Economic Indicators"
 
+    @staticmethod
+    def compute_fingerprint(values):
+        """
+        Hashes indicator values given in INDICATOR_FIELDS order. Floats are normalized
+        to 12 significant digits so CSV round-trips do not register as changes.
+        """
+        normalized = '|'.join('' if v is None or v != v else format(float(v), '.12g') for v in values)
+        return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.compute_fingerprint(getattr(self, f) for f in INDICATOR_FIELDS)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'fingerprint' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['fingerprint']
+        super().save(*args, **kwargs)
+
+class LatestEconomicIndicator(models.Model):
+    """
+    Each country's latest indicators (one row per country): its latest year and, per
+    field, the latest non-null value, which may come from an earlier year; `<field>_year`
+    is the year it comes from. Kept current by countries.snapshots so "latest
+    indicators" is one indexed read.
+    """
+    country = models.OneToOneField(Country, on_delete=models.CASCADE, primary_key=True, related_name='latest_indicator')
+    year = models.IntegerField(db_index=True)
+
+    headline_consumer_price_inflation = models.FloatField(null=True, blank=True)
+    energy_consumer_price_inflation = models.FloatField(null=True, blank=True)
+    food_consumer_price_inflation = models.FloatField(null=True, blank=True)
+    official_core_consumer_price_inflation = models.FloatField(null=True, blank=True)
+    producer_price_inflation = models.FloatField(null=True, blank=True)
+    gdp_deflator_index_growth_rate = models.FloatField(null=True, blank=True)
+    happiness_score = models.FloatField(null=True, blank=True)
+    gdp_per_capita = models.FloatField(null=True, blank=True)
+    social_support = models.FloatField(null=True, blank=True)
+    healthy_life_expectancy_at_birth = models.FloatField(null=True, blank=True)
+    freedom_to_make_life_choices = models.FloatField(null=True, blank=True)
+    generosity = models.FloatField(null=True, blank=True)
+    perceptions_of_corruption = models.FloatField(null=True, blank=True)
+
+    headline_consumer_price_inflation_year = models.IntegerField(null=True, blank=True)
+    energy_consumer_price_inflation_year = models.IntegerField(null=True, blank=True)
+    food_consumer_price_inflation_year = models.IntegerField(null=True, blank=True)
+    official_core_consumer_price_inflation_year = models.IntegerField(null=True, blank=True)
+    producer_price_inflation_year = models.IntegerField(null=True, blank=True)
+    gdp_deflator_index_growth_rate_year = models.IntegerField(null=True, blank=True)
+    happiness_score_year = models.IntegerField(null=True, blank=True, db_index=True)
+    gdp_per_capita_year = models.IntegerField(null=True, blank=True)
+    social_support_year = models.IntegerField(null=True, blank=True)
+    healthy_life_expectancy_at_birth_year = models.IntegerField(null=True, blank=True)
+    freedom_to_make_life_choices_year = models.IntegerField(null=True, blank=True)
+    generosity_year = models.IntegerField(null=True, blank=True)
+    perceptions_of_corruption_year = models.IntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.country_id} - latest ({self.year})"
+
+class HappinessPrediction(models.Model):
+    """Happiness score predicted for an EconomicIndicator row, precomputed in bulk"""
+    indicator = models.OneToOneField(EconomicIndicator, on_delete=models.CASCADE, related_name='happiness_prediction')
+    predicted_score = models.FloatField()
+    model_version = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.indicator} - predicted {self.predicted_score:.2f}"
+
 class UserFavorite(models.Model):
     """User's favorite countries"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
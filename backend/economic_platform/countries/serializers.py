@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Country, EconomicIndicator
+from .models import Country, EconomicIndicator, INDICATOR_YEAR_FIELDS, LatestEconomicIndicator
 
 class CountryEconomicIndicatorSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,9 +23,16 @@ class CountryEconomicIndicatorSerializer(serializers.ModelSerializer):
         ]
         # Optional: Could add read_only_fields if some fields shouldn't be updatable via this serializer
 
+class LatestEconomicIndicatorSerializer(serializers.ModelSerializer):
+    # 'year' is the country's latest year; a value may come from an earlier one, given by '<field>_year'
+    class Meta:
+        model = LatestEconomicIndicator
+        fields = CountryEconomicIndicatorSerializer.Meta.fields + list(INDICATOR_YEAR_FIELDS)
+
 class CountryComparisonDataSerializer(serializers.ModelSerializer):
-    latest_indicators = CountryEconomicIndicatorSerializer(read_only=True, source='latest_economic_indicator')
-    # 'latest_economic_indicator' will be a property or annotated field on the Country model instance
+    # Read from the LatestEconomicIndicator snapshot; querysets should select_related('latest_indicator')
+    # so this costs no query per country. Countries without indicators serialize as None.
+    latest_indicators = LatestEconomicIndicatorSerializer(read_only=True, source='latest_indicator', default=None)
 
     class Meta:
         model = Country
@@ -37,20 +44,3 @@ class CountryComparisonDataSerializer(serializers.ModelSerializer):
             'population', # Added population
             'latest_indicators'
         ]
-
-    def to_representation(self, instance):
-        """
-        Dynamically fetch the latest economic indicator for the country instance.
-        This method is called by DRF when serializing the object.
-        """
-        representation = super().to_representation(instance)
-
-        # Fetch the latest economic indicator for this specific country instance
-        latest_indicator_instance = EconomicIndicator.objects.filter(country=instance).order_by('-year').first()
-
-        if latest_indicator_instance:
-            representation['latest_indicators'] = CountryEconomicIndicatorSerializer(latest_indicator_instance).data
-        else:
-            representation['latest_indicators'] = None # Or an empty dict, or a specific message
-
-        return representation
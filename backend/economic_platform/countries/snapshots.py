@@ -0,0 +1,79 @@
+"""
+Maintenance of LatestEconomicIndicator, the one-row-per-country summary of each
+country's most recent indicators: `year` is the country's latest year, and every
+indicator field holds the value of the latest year in which it is not null. A newest
+year that only carries some columns (say inflation, before the happiness report is
+out) therefore keeps the older values of the others, and `<field>_year` records the
+year each value comes from, so readers can tell it from the latest year.
+
+Import commands call refresh_latest_indicators() with the countries they touched, in
+bulk; single ORM saves/deletes of EconomicIndicator refresh their country through
+signals.
+"""
+from django.db.models import OuterRef, Subquery
+
+from .models import Country, EconomicIndicator, INDICATOR_FIELDS, INDICATOR_YEAR_FIELDS, LatestEconomicIndicator
+
+# Countries per refresh query; keeps IN lists under SQLite's bound-parameter limit
+REFRESH_CHUNK_SIZE = 500
+
+
+def refresh_latest_indicators(country_ids=None, batch_size=1000):
+    """
+    Recomputes the snapshot for `country_ids` (all countries when None): one query per
+    chunk reads each country's latest year and latest non-null values with their years,
+    which are upserted; countries left without indicators lose their snapshot row. Returns the
+    number of rows written.
+    """
+    if country_ids is None:
+        LatestEconomicIndicator.objects.exclude(country__economic_indicators__isnull=False).delete()
+        return _refresh(Country.objects.all(), batch_size)
+
+    country_ids = list(dict.fromkeys(country_ids))
+    written = 0
+    for start in range(0, len(country_ids), REFRESH_CHUNK_SIZE):
+        chunk = country_ids[start:start + REFRESH_CHUNK_SIZE]
+        written += _refresh(Country.objects.filter(pk__in=chunk), batch_size)
+        LatestEconomicIndicator.objects.filter(country_id__in=chunk).exclude(
+            country__economic_indicators__isnull=False
+        ).delete()
+    return written
+
+
+def latest_non_null(field, column=None):
+    """
+    Subquery for a Country: `column` (default `field`) of the latest indicator row where
+    `field` is not null. Seeks the (country, year) index backwards from the latest year.
+    """
+    return Subquery(
+        EconomicIndicator.objects.filter(country=OuterRef('pk'), **{f'{field}__isnull': False})
+        .order_by('-year').values(column or field)[:1]
+    )
+
+
+def _refresh(countries, batch_size):
+    from analytics.ingestion import upsert_rows
+
+    latest_year = Subquery(EconomicIndicator.objects.filter(country=OuterRef('pk')).order_by('-year').values('year')[:1])
+    values = {f'latest_{field}': latest_non_null(field) for field in INDICATOR_FIELDS}
+    values.update({f'latest_{field}_year': latest_non_null(field, 'year') for field in INDICATOR_FIELDS})
+    rows = (
+        countries.order_by()
+        .annotate(latest_year=latest_year, **values)
+        .filter(latest_year__isnull=False)
+        .values_list('pk', 'latest_year', *values)
+    )
+    rows = [list(row) for row in rows]
+    upsert_rows(LatestEconomicIndicator, ['country', 'year', *INDICATOR_FIELDS, *INDICATOR_YEAR_FIELDS], rows,
+                unique_fields=('country',), batch_size=batch_size)
+    return len(rows)
+
+
+def _indicator_changed(sender, instance, **kwargs):
+    refresh_latest_indicators([instance.country_id])
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+    post_save.connect(_indicator_changed, sender=EconomicIndicator, dispatch_uid='latest_indicator_save')
+    post_delete.connect(_indicator_changed, sender=EconomicIndicator, dispatch_uid='latest_indicator_delete')
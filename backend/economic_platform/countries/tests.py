@@ -1,7 +1,9 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Country, EconomicIndicator
+from django.contrib.auth import get_user_model
+from .models import Country, EconomicIndicator, LatestEconomicIndicator
+from .snapshots import refresh_latest_indicators
 from decimal import Decimal
 
 # Helper function to create countries
@@ -239,3 +241,48 @@ print("Finished defining CountryComparisonAPIViewTests")
 # `country_names = [name.strip() for name in countries_param.split(',') if name.strip()] # Filter out empty strings`
 # `if not country_names: return Response({'error': 'Valid country names are required.'}, status=status.HTTP_400_BAD_REQUEST)`
 # If such a change were made, `test_request_with_empty_countries_parameter` would need to expect a 400.
+
+
+class LatestEconomicIndicatorTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='analyst@example.com', username='analyst', password='pass', first_name='A', last_name='B'
+        )
+        cls.atlantis = create_country(name="Atlantis", code="ATL")
+        cls.eldorado = create_country(name="El Dorado", code="ELD")
+        create_country(name="Xanadu", code="XAN")
+        create_economic_indicator(cls.atlantis, 2022, happiness_score=Decimal('7.5'))
+        cls.latest = create_economic_indicator(cls.atlantis, 2023, happiness_score=Decimal('7.8'))
+        create_economic_indicator(cls.eldorado, 2021, happiness_score=Decimal('8.0'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_snapshot_follows_orm_writes(self):
+        self.assertEqual(LatestEconomicIndicator.objects.get(country=self.atlantis).year, 2023)
+
+        self.latest.happiness_score = Decimal('6.0')
+        self.latest.save()
+        self.assertEqual(LatestEconomicIndicator.objects.get(country=self.atlantis).happiness_score, 6.0)
+        self.latest.delete()
+        self.assertEqual(LatestEconomicIndicator.objects.get(country=self.atlantis).year, 2022)
+        EconomicIndicator.objects.filter(country=self.eldorado).get().delete()
+        self.assertFalse(LatestEconomicIndicator.objects.filter(country=self.eldorado).exists())
+
+    def test_full_refresh_rebuilds_every_country(self):
+        LatestEconomicIndicator.objects.all().delete()
+        self.assertEqual(refresh_latest_indicators(), 2)
+        self.assertEqual(
+            dict(LatestEconomicIndicator.objects.values_list('country__code', 'year')), {'ATL': 2023, 'ELD': 2021}
+        )
+
+    def test_comparison_reads_snapshot_in_one_query(self):
+        url = reverse('countries_api:country_comparison_api')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'countries': 'Atlantis,El Dorado,Xanadu'})
+
+        data = {c['code']: c['latest_indicators'] for c in response.data['comparison_data']}
+        self.assertEqual((data['ATL']['year'], data['ATL']['happiness_score'], data['ATL']['happiness_score_year']), (2023, 7.8, 2023))
+        self.assertEqual(data['ELD']['year'], 2021)
+        self.assertIsNone(data['XAN'])
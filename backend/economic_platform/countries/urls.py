@@ -1,9 +1,12 @@
 from django.urls import path
-from . import views # Import views to access all views in the module
+from . import async_views, views # Import views to access all views in the module
 
 app_name = 'countries_api' # Namespace for URLs
 
 urlpatterns = [
     path('compare/', views.CountryComparisonAPIView.as_view(), name='country_comparison_api'),
     path('list-all/', views.list_all_countries_api, name='list_all_countries_api'),
+    # Async variants, for ASGI deployments
+    path('async/compare/', async_views.country_comparison, name='async_country_comparison_api'),
+    path('async/list-all/', async_views.list_all_countries, name='async_list_all_countries_api'),
 ]
\ No newline at end of file
@@ -3,21 +3,52 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
 from django.db.models import Prefetch
+from analytics.api import InvalidRequest
+from analytics.pagination import Listing, streamed
 from .models import Country, EconomicIndicator
 from .serializers import CountryComparisonDataSerializer
 
+COUNTRIES_PARAM_REQUIRED = 'Query parameter "countries" is required. Please provide a comma-separated list of country names.'
+
+def requested_country_names(params):
+    """Names in ?countries=a,b,c, or None when the parameter is missing."""
+    countries_param = params.get('countries')
+    if not countries_param:
+        return None
+    return [name.strip() for name in countries_param.split(',')]
+
+
+def comparison_queryset(country_names):
+    # The latest indicators come from the LatestEconomicIndicator snapshot in the same query.
+    return Country.objects.filter(name__in=country_names).select_related('latest_indicator')
+
+
+def comparison_payload(country_names, countries):
+    """The comparison response for the fetched `countries`, with notes for the missing names."""
+    found_country_names = [country.name for country in countries]
+    missing_names = [name for name in country_names if name not in found_country_names]
+
+    serializer = CountryComparisonDataSerializer(countries, many=True)
+    response_data = {
+        'comparison_data': serializer.data,
+    }
+    if missing_names:
+        response_data['notes'] = [f"Data for country '{name}' not found." for name in missing_names]
+        # Optionally, you could choose to return a 404 if *any* requested country is missing,
+        # but returning available data with notes is often more user-friendly.
+    return response_data
+
+
 class CountryComparisonAPIView(APIView):
     def get(self, request, *args, **kwargs):
-        countries_param = request.query_params.get('countries')
+        country_names = requested_country_names(request.query_params)
 
-        if not countries_param:
+        if country_names is None:
             return Response(
-                {'error': 'Query parameter "countries" is required. Please provide a comma-separated list of country names.'},
+                {'error': COUNTRIES_PARAM_REQUIRED},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        country_names = [name.strip() for name in countries_param.split(',')]
-
         if not country_names:
              return Response(
                 {'error': 'Country names list cannot be empty.'},
@@ -25,48 +56,34 @@ class CountryComparisonAPIView(APIView):
             )
 
         # Fetch countries. We will handle missing countries later.
-        # We use select_related or prefetch_related if we anticipate accessing related models often in the serializer,
-        # but here the serializer's `to_representation` handles fetching the latest indicator.
-        # For more complex scenarios or if `latest_economic_indicator` was a direct relation, prefetching would be good.
-        # Example:
-        # latest_indicator_prefetch = Prefetch(
-        #     'economic_indicators',
-        #     queryset=EconomicIndicator.objects.order_by('-year'),
-        #     to_attr='latest_indicator_list' # a temporary attribute
-        # )
-        # fetched_countries = Country.objects.filter(name__in=country_names).prefetch_related(latest_indicator_prefetch)
+        fetched_countries_qs = comparison_queryset(country_names)
+        return Response(comparison_payload(country_names, list(fetched_countries_qs)), status=status.HTTP_200_OK)
 
-        fetched_countries_qs = Country.objects.filter(name__in=country_names)
 
-        found_country_names = [country.name for country in fetched_countries_qs]
-        missing_names = [name for name in country_names if name not in found_country_names]
+def country_list_rows():
+    return Country.objects.order_by('name').values_list('id', 'name', 'code')
 
-        # The serializer's to_representation method will handle attaching the latest indicator.
-        serializer = CountryComparisonDataSerializer(fetched_countries_qs, many=True)
-        serialized_data = serializer.data
 
-        response_data = {
-            'comparison_data': serialized_data,
-        }
+def country_list_payload(rows):
+    return [{'id': country_id, 'name': name, 'code': code} for country_id, name, code in rows]
 
-        if missing_names:
-            response_data['notes'] = [f"Data for country '{name}' not found." for name in missing_names]
-            # Optionally, you could choose to return a 404 if *any* requested country is missing,
-            # but returning available data with notes is often more user-friendly.
 
-        return Response(response_data, status=status.HTTP_200_OK)
+# Pages and streams of the country list, keyed on the (unique) name
+COUNTRY_LIST = Listing(('name',), key=lambda row: (row[1],), to_items=country_list_payload)
 
 
 @api_view(['GET'])
 def list_all_countries_api(request):
     """
     API endpoint to list all countries with their ID, name, and code.
+    ?limit=N&cursor=... pages through them and ?stream=1 streams the list (analytics.pagination).
     """
     try:
-        countries = Country.objects.all().order_by('name')
-        # Manually construct the list of dictionaries
-        data = [{'id': country.id, 'name': country.name, 'code': country.code} for country in countries]
-        return Response(data, status=status.HTTP_200_OK)
+        if streamed(request.query_params):
+            return COUNTRY_LIST.stream(country_list_rows())
+        return Response(COUNTRY_LIST.data(country_list_rows(), request.query_params), status=status.HTTP_200_OK)
+    except InvalidRequest as e:
+        return Response({'error': e.message}, status=e.status_code)
     except Exception as e:
         # Consider logging the exception e
         return Response({'error': 'An unexpected error occurred while fetching countries.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
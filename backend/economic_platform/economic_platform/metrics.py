@@ -0,0 +1,218 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+Every worker process adds to its own memory-mapped file under METRICS_DIR (default
+VAR_DIR/metrics), so recording a request is a few in-place float additions, with no
+locking between processes and no I/O beyond the page cache. /metrics reads and sums
+the files of all processes, including ones that have exited, so counters stay
+monotonic across worker restarts; clear the directory when deploying a new release.
+The endpoint is unauthenticated for scrapers and should only be reachable internally.
+"""
+import bisect
+import functools
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by view, method and response status.', None),
+    'http_request_duration_seconds': ('histogram', 'Time from the first middleware to the response.', LATENCY_BUCKETS),
+    'http_request_db_seconds_total': ('counter', 'Time spent executing SQL.', None),
+    'http_request_db_queries_total': ('counter', 'SQL queries executed.', None),
+    'http_response_size_bytes': ('histogram', 'Response body size (streamed responses excluded).', SIZE_BUCKETS),
+}
+
+UNMATCHED_VIEW = '<unmatched>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_HEADER = struct.Struct('Q')   # bytes in use
+_LENGTH = struct.Struct('I')   # key length
+_VALUE = struct.Struct('d')
+
+
+def _padded(length):
+    """Key length + padding, so the value that follows is 8-byte aligned."""
+    return length + (-(_LENGTH.size + length) % 8)
+
+
+class MetricsFile:
+    """
+    One process's metrics: a memory-mapped file of (key, float64) entries, laid out as
+    an 8-byte header holding the bytes in use followed by entries of
+    [uint32 key length][key, padded][float64 value]. Only the owning process writes it.
+    """
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.INITIAL_SIZE:
+            self._file.truncate(self.INITIAL_SIZE)
+            size = self.INITIAL_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._offsets = {key: offset for key, offset, _ in read_entries(self._map, self._used)}
+
+    def add_many(self, amounts):
+        """Adds each (key, amount) to its value."""
+        with self._lock:
+            for key, amount in amounts:
+                offset = self._offsets.get(key)
+                if offset is None:
+                    offset = self._append(key)
+                _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        size = _LENGTH.size + _padded(len(encoded)) + _VALUE.size
+        if self._used + size > len(self._map):
+            capacity = max(len(self._map) * 2, self._used + size)
+            self._file.truncate(capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), capacity)
+        start = self._used
+        _LENGTH.pack_into(self._map, start, len(encoded))
+        self._map[start + _LENGTH.size:start + _LENGTH.size + len(encoded)] = encoded
+        offset = start + size - _VALUE.size
+        _VALUE.pack_into(self._map, offset, 0.0)
+        # Published last, so readers never see a half-written entry
+        self._used += size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+
+def read_entries(buffer, used=None):
+    """(key, value offset, value) for every entry of a metrics file's contents."""
+    if used is None:
+        used = _HEADER.unpack_from(buffer, 0)[0]
+    used = min(used, len(buffer))
+    position = _HEADER.size
+    while position + _LENGTH.size <= used:
+        length = _LENGTH.unpack_from(buffer, position)[0]
+        offset = position + _LENGTH.size + _padded(length)
+        if offset + _VALUE.size > used:
+            break
+        key = bytes(buffer[position + _LENGTH.size:position + _LENGTH.size + length]).decode()
+        yield key, offset, _VALUE.unpack_from(buffer, offset)[0]
+        position = offset + _VALUE.size
+
+
+def metrics_dir():
+    return str(getattr(settings, 'METRICS_DIR', None) or os.path.join(settings.VAR_DIR, 'metrics'))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """This process's metrics file, reopened after a fork or a change of METRICS_DIR."""
+    global _store
+    path = os.path.join(metrics_dir(), f'{os.getpid()}.db')
+    store = _store
+    if store is not None and store.path == path and store.pid == os.getpid():
+        return store
+    with _store_lock:
+        if _store is None or _store.path != path or _store.pid != os.getpid():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _store = MetricsFile(path)
+        return _store
+
+
+@functools.lru_cache(maxsize=4096)
+def _key(name, labels):
+    return json.dumps([name, labels])
+
+
+def _histogram(name, labels, value):
+    buckets = METRICS[name][2]
+    index = bisect.bisect_left(buckets, value)
+    le = repr(float(buckets[index])) if index < len(buckets) else '+Inf'
+    return [
+        (_key(f'{name}_bucket', labels + (('le', le),)), 1),
+        (_key(f'{name}_sum', labels), value),
+        (_key(f'{name}_count', labels), 1),
+    ]
+
+
+def record_request(view, method, status, seconds, db_seconds=None, queries=None, size=None):
+    labels = (('view', view),)
+    amounts = [(_key('http_requests_total', labels + (('method', method), ('status', str(status)))), 1)]
+    amounts += _histogram('http_request_duration_seconds', labels, seconds)
+    if db_seconds is not None:
+        amounts += [
+            (_key('http_request_db_seconds_total', labels), db_seconds),
+            (_key('http_request_db_queries_total', labels), queries),
+        ]
+    if size is not None:
+        amounts += _histogram('http_response_size_bytes', labels, size)
+    get_store().add_many(amounts)
+
+
+def collect(directory=None):
+    """{(sample name, labels): value} summed over the metrics files of all processes."""
+    directory = directory or metrics_dir()
+    totals = defaultdict(float)
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith('.db')]
+    except FileNotFoundError:
+        return totals
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), 'rb') as handle:
+                contents = handle.read()
+        except FileNotFoundError:
+            continue
+        if len(contents) < _HEADER.size:
+            continue
+        for key, _, value in read_entries(contents):
+            sample, labels = json.loads(key)
+            totals[sample, tuple(map(tuple, labels))] += value
+    return totals
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name, labels, value):
+    label_text = ','.join(f'{label}="{_escape(text)}"' for label, text in labels)
+    value_text = repr(float(value)) if value != int(value) else str(int(value))
+    return f'{name}{{{label_text}}} {value_text}' if labels else f'{name} {value_text}'
+
+
+def exposition(totals):
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            lines += [_sample(name, labels, value) for (sample, labels), value in sorted(totals.items()) if sample == name]
+            continue
+        for (sample, labels), count in sorted(totals.items()):
+            if sample != f'{name}_count':
+                continue
+            cumulative = 0
+            for le in [repr(float(bucket)) for bucket in buckets] + ['+Inf']:
+                cumulative += totals.get((f'{name}_bucket', labels + (('le', le),)), 0)
+                lines.append(_sample(f'{name}_bucket', labels + (('le', le),), cumulative))
+            lines.append(_sample(f'{name}_sum', labels, totals[f'{name}_sum', labels]))
+            lines.append(_sample(f'{name}_count', labels, count))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(exposition(collect()), content_type=CONTENT_TYPE)
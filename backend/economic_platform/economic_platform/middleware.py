@@ -0,0 +1,320 @@
+"""
+Project-wide middleware.
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags
+
+from analytics import versioning
+from analytics.renderers import DATA_MEDIA_TYPES
+
+from . import metrics, profiling
+
+# URL prefix -> dataset scopes its GET responses are derived from
+DATASET_SCOPES = (
+    ('/api/analytics/', (versioning.COUNTRIES, versioning.TUNISIA)),
+    ('/api/countries/', (versioning.COUNTRIES,)),
+    ('/api/tunisia/', (versioning.TUNISIA,)),
+)
+
+sql_logger = logging.getLogger('economic_platform.sql')
+
+# Placeholder lists of any length (IN (%s, %s, ...)) and inlined numbers (LIMIT 21) share a shape
+_PLACEHOLDER_LIST = re.compile(r'\((?:%s|\?)(?:,\s*(?:%s|\?))*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI, so async views are
+    not pushed onto a thread: `handle` is the sync path, `ahandle` the async one.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
+
+
+def etag_exempt(view_func):
+    """Marks a view whose responses do not depend only on the dataset versions (e.g. live counters)."""
+    view_func.etag_exempt = True
+    return view_func
+
+
+class DatasetConditionalGetMiddleware(AsyncCapableMiddleware):
+    """
+    ETag/Last-Modified for the read APIs, derived from the dataset version tokens.
+
+    Data only changes on import, so a response is identified by the version tokens of the
+    scopes behind its URL plus the request itself (path, query string, Accept and the
+    session cookie, so a 304 is only ever given to the session that received the 200).
+    A matching If-None-Match gets a 304 here, before the view runs, but only for an
+    authenticated user: an expired or forged session replaying a known ETag reaches the
+    view and its 403, so the middleware goes after AuthenticationMiddleware (the check
+    costs the session and user lookups). The wildcard `*`, meant for writes, never
+    matches. Views whose output is not derived from the datasets opt out with @etag_exempt.
+    Last-Modified is informational: If-Modified-Since alone is not bound to a session,
+    so it is left to the view. Only successful API responses in a data format (JSON,
+    columnar JSON, MessagePack) carry the headers.
+    """
+
+    def handle(self, request):
+        return self.tag(request, self.get_response(request))
+
+    async def ahandle(self, request):
+        return self.tag(request, await self.get_response(request))
+
+    @staticmethod
+    def tag(request, response):
+        etag = getattr(request, '_dataset_etag', None)
+        if etag is None:
+            return response
+        if response.status_code == 200 and response.get('Content-Type', '').split(';')[0] in DATA_MEDIA_TYPES \
+                or response.status_code == 304:
+            response['ETag'] = etag
+            if request._dataset_last_modified is not None:
+                response['Last-Modified'] = http_date(request._dataset_last_modified)
+            patch_vary_headers(response, ('Accept', 'Cookie'))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        scopes = self.scopes_for(request)
+        if scopes is None or getattr(view_func, 'etag_exempt', False):
+            return None
+        request._dataset_etag = self.etag(request, scopes)
+        request._dataset_last_modified = self.last_modified(scopes)
+        if self.not_modified(request, request._dataset_etag):
+            return HttpResponseNotModified()
+        return None
+
+    @staticmethod
+    def scopes_for(request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        for prefix, scopes in DATASET_SCOPES:
+            if request.path.startswith(prefix):
+                return scopes
+        return None
+
+    @staticmethod
+    def etag(request, scopes):
+        # Committed tokens only: every worker behind the load balancer must compute the same ETag
+        parts = [versioning.committed(scope) for scope in scopes] + [
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME, ''),
+        ]
+        return '"%s"' % hashlib.blake2b('\n'.join(parts).encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def last_modified(scopes):
+        times = [versioning.last_modified(scope) for scope in scopes]
+        return None if None in times else int(max(times))
+
+    @staticmethod
+    def not_modified(request, etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match or etag not in parse_etags(if_none_match):
+            return False
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_authenticated
+
+
+def query_budget(limit):
+    """Overrides SQL_QUERY_BUDGET for one view (e.g. a deliberate bulk export); put it above @api_view."""
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def query_shape(sql):
+    """`sql` with its variable parts collapsed, so one query run with different parameters has one shape."""
+    return _NUMBER.sub('N', _PLACEHOLDER_LIST.sub('(...)', sql))
+
+
+class QueryLog:
+    """Database execute wrapper recording (sql, seconds) for every query it sees."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def seconds(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def repeated_shapes(self, threshold):
+        """[(shape, count)] of the shapes run at least `threshold` times, most frequent first."""
+        counts = Counter(query_shape(sql) for sql, _ in self.queries)
+        return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+
+class QueryInstrumentationMiddleware(AsyncCapableMiddleware):
+    """
+    Counts and times the SQL of every request.
+
+    Each response gets a Server-Timing header with the time spent in the database, in
+    rendering the response (JSON encoding, templates) and in total. A warning is logged
+    on 'economic_platform.sql' when a request runs more than its query budget
+    (SQL_QUERY_BUDGET, or @query_budget on the view) or repeats one query shape at
+    least SQL_N_PLUS_ONE_THRESHOLD times, the signature of a per-row lookup (N+1).
+    Disabled with SQL_INSTRUMENTATION = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        log, start = self.start(request)
+        with ExitStack() as stack:
+            self.wrap_connections(stack, log)
+            response = self.get_response(request)
+        return self.finish(request, response, log, start)
+
+    async def ahandle(self, request):
+        log, start = self.start(request)
+        # Connections are per thread and the async ORM runs this request's queries in its
+        # thread-sensitive executor, so the wrappers are installed (and removed) there
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, log)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, log, start)
+
+    @staticmethod
+    def start(request):
+        log = request._query_log = QueryLog()
+        request._query_budget = settings.SQL_QUERY_BUDGET
+        return log, time.perf_counter()
+
+    @staticmethod
+    def wrap_connections(stack, log):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+
+    def finish(self, request, response, log, start):
+        total = time.perf_counter() - start
+        render = getattr(request, '_render_seconds', 0.0)
+        response['Server-Timing'] = (
+            f'db;dur={log.seconds * 1000:.2f};desc="{log.count} queries", '
+            f'serialize;dur={render * 1000:.2f}, total;dur={total * 1000:.2f}'
+        )
+        self.check(request, log)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', request._query_budget)
+        return None
+
+    def process_template_response(self, request, response):
+        # Runs last among the middleware, right before the handler renders the response
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def check(request, log):
+        if log.count > request._query_budget:
+            sql_logger.warning(
+                'Query budget exceeded: %s %s ran %d queries (budget %d) in %.1f ms',
+                request.method, request.path, log.count, request._query_budget, log.seconds * 1000,
+            )
+        for shape, count in log.repeated_shapes(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            sql_logger.warning('Likely N+1: %s %s ran %d× %s', request.method, request.path, count, shape)
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """
+    Profiles the requests economic_platform.profiling.trigger selects (staff asking via
+    header or ?profile=1, or 1-in-N sampling) and stores the captures. Goes after
+    AuthenticationMiddleware, since staff requests are recognised by their user.
+    """
+
+    def handle(self, request):
+        reason = profiling.trigger(request, getattr(request, 'user', None))
+        if reason is None:
+            return self.get_response(request)
+        return profiling.profile(self.get_response, request, reason)
+
+    async def ahandle(self, request):
+        reason = profiling.trigger(request, await request.auser() if hasattr(request, 'auser') else None)
+        if reason is None:
+            return await self.get_response(request)
+        return await profiling.aprofile(self.get_response, request, reason)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """
+    Records every request in economic_platform.metrics: count, latency, SQL time (from
+    QueryInstrumentationMiddleware, which must come after it) and response size, labelled
+    with the URL name of the view. Goes first, so the latency covers all other middleware.
+    """
+
+    def handle(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        return self.record(request, response, time.perf_counter() - start)
+
+    async def ahandle(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.record(request, response, time.perf_counter() - start)
+
+    @staticmethod
+    def record(request, response, seconds):
+        match = request.resolver_match
+        view = match.view_name if match else metrics.UNMATCHED_VIEW
+        if view == 'metrics':
+            return response
+        log = getattr(request, '_query_log', None)
+        metrics.record_request(
+            view, request.method, response.status_code, seconds,
+            db_seconds=log.seconds if log else None, queries=log.count if log else None,
+            size=None if response.streaming else len(response.content),
+        )
+        return response
@@ -0,0 +1,190 @@
+"""
+Opt-in request profiling.
+
+A request is profiled with cProfile when a staff user asks for it (X-Profile header or
+?profile=1) or when it is sampled (1 in PROFILE_SAMPLE_RATE requests). Each capture is
+written to PROFILE_DIR as a pstats file (for snakeviz, `python -m pstats`, ...) plus a
+JSON summary with the request, its duration and its top frames. The directory is a
+ring: once it holds PROFILE_RING_SIZE captures, the oldest are deleted. Staff can list
+the slowest captures at /admin/profiles/. One capture runs at a time per process; a
+request selected while another is profiled is served without a capture.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+ENABLED_VALUES = ('1', 'true', 'yes', 'on')
+
+# Frames kept in a capture's summary, by cumulative time
+TOP_FRAMES = 15
+# Captures shown on the admin page by default
+LISTED_CAPTURES = 50
+
+# Held while a capture runs. Overlapping profilers clobber each other on one thread (the
+# event loop), and from Python 3.12 a second enable() anywhere in the process raises.
+_capturing = threading.Lock()
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', None) or os.path.join(settings.VAR_DIR, 'profiles'))
+
+
+def trigger(request, user):
+    """Why `request` (made by `user`) should be profiled ('header', 'param' or 'sample'), or None."""
+    if request.META.get(PROFILE_HEADER, '').lower() in ENABLED_VALUES:
+        requested = 'header'
+    elif request.GET.get(PROFILE_PARAM, '').lower() in ENABLED_VALUES:
+        requested = 'param'
+    else:
+        requested = None
+    if requested and user is not None and user.is_staff:
+        return requested
+    rate = settings.PROFILE_SAMPLE_RATE
+    if rate and random.randrange(rate) == 0:
+        return 'sample'
+    return None
+
+
+def _frame_name(filename, line, function):
+    base = str(settings.BASE_DIR)
+    if filename.startswith(base):
+        filename = os.path.relpath(filename, base)
+    return f'{function} ({filename}:{line})' if line else function
+
+
+def top_frames(profiler, limit=TOP_FRAMES):
+    """[{function, calls, own_ms, cumulative_ms}] of the frames with the most cumulative time."""
+    stats = pstats.Stats(profiler).stats
+    frames = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': _frame_name(*frame),
+            'calls': primitive_calls if primitive_calls == calls else f'{calls}/{primitive_calls}',
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for frame, (primitive_calls, calls, own, cumulative, _) in frames
+    ]
+
+
+def save(profiler, request, response, seconds, reason):
+    """Writes one capture and trims the ring; returns its id."""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    # Ids sort by capture time, so the ring drops the oldest first
+    capture_id = f'{time.time_ns():020d}-{uuid.uuid4().hex[:8]}'
+    summary = {
+        'id': capture_id,
+        'captured_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': round(seconds * 1000, 3),
+        'trigger': reason,
+        'top_frames': top_frames(profiler),
+    }
+    profiler.dump_stats(os.path.join(directory, f'{capture_id}.prof'))
+    tmp = os.path.join(directory, f'{capture_id}.json.tmp')
+    with open(tmp, 'w') as handle:
+        json.dump(summary, handle)
+    os.replace(tmp, os.path.join(directory, f'{capture_id}.json'))  # listed only once complete
+    trim(directory, settings.PROFILE_RING_SIZE)
+    return capture_id
+
+
+def trim(directory, size):
+    captures = sorted(name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json'))
+    for capture_id in captures[:max(len(captures) - size, 0)]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(directory, capture_id + suffix))
+            except FileNotFoundError:
+                pass  # trimmed concurrently by another worker
+
+
+def captures():
+    """Summaries of the stored captures, slowest first."""
+    directory = profile_dir()
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+    summaries = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name)) as handle:
+                summaries.append(json.load(handle))
+        except (FileNotFoundError, ValueError):
+            continue
+    return sorted(summaries, key=lambda summary: summary['duration_ms'], reverse=True)
+
+
+def profile(get_response, request, reason):
+    """Runs `get_response(request)` under cProfile and stores the capture, unless one is running."""
+    if not _capturing.acquire(blocking=False):
+        return get_response(request)
+    try:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(get_response, request)
+        seconds = time.perf_counter() - start
+    finally:
+        _capturing.release()
+    response['X-Profile-Id'] = save(profiler, request, response, seconds, reason)
+    return response
+
+
+async def aprofile(get_response, request, reason):
+    """
+    profile() for async requests. cProfile follows the event loop thread, so the capture
+    also contains whatever other requests ran while this one was awaiting.
+    """
+    if not _capturing.acquire(blocking=False):
+        return await get_response(request)
+    try:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await get_response(request)
+        finally:
+            profiler.disable()
+    finally:
+        _capturing.release()
+    seconds = time.perf_counter() - start
+    response['X-Profile-Id'] = await sync_to_async(save, thread_sensitive=False)(profiler, request, response, seconds, reason)
+    return response
+
+
+@staff_member_required
+def profiles_view(request):
+    """Admin page: the slowest stored captures and their top frames."""
+    limit = request.GET.get('limit', '')
+    return render(request, 'admin/profiles.html', {
+        'title': 'Request profiles',
+        'captures': captures()[:int(limit) if limit.isdigit() else LISTED_CAPTURES],
+        'ring_size': settings.PROFILE_RING_SIZE,
+    })
+
+
+@staff_member_required
+def profile_download_view(request, capture_id):
+    """The pstats file of one capture."""
+    path = os.path.join(profile_dir(), f'{os.path.basename(capture_id)}.prof')
+    if not os.path.exists(path):
+        raise Http404('No such profile.')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{capture_id}.prof')
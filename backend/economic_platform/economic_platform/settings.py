@@ -50,12 +50,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'economic_platform.middleware.MetricsMiddleware',
+    'economic_platform.middleware.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'economic_platform.middleware.DatasetConditionalGetMiddleware',
+    'economic_platform.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -155,4 +159,35 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-}
\ No newline at end of file
+}
+
+# Runtime state shared by the worker processes (dataset version tokens, fitted models, ...)
+VAR_DIR = BASE_DIR / 'var'
+
+# Response cache (analytics.caching). Local memory per worker, culled when full; entries
+# are keyed on the dataset version tokens, so imports invalidate them without a timeout.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'economic-platform-responses',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
+}
+
+# SQL instrumentation (economic_platform.middleware.QueryInstrumentationMiddleware): a
+# Server-Timing header on every response, and warnings on 'economic_platform.sql' when a
+# request runs more than SQL_QUERY_BUDGET queries or one query shape this many times.
+SQL_INSTRUMENTATION = True
+SQL_QUERY_BUDGET = 20
+SQL_N_PLUS_ONE_THRESHOLD = 5
+
+# Request profiling (economic_platform.profiling): staff trigger it with an X-Profile header
+# or ?profile=1; PROFILE_SAMPLE_RATE = N also profiles 1 in N requests (0 = off). Captures
+# go to PROFILE_DIR (default VAR_DIR/profiles), keeping the latest PROFILE_RING_SIZE.
+PROFILE_SAMPLE_RATE = 0
+PROFILE_RING_SIZE = 100
+
+# Request metrics (economic_platform.metrics), served at /metrics/ in the Prometheus text
+# format. Each worker writes its own file in METRICS_DIR (default VAR_DIR/metrics).
+METRICS_DIR = None
@@ -21,12 +21,17 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import metrics, profiling
+
 urlpatterns = [
+    path('admin/profiles/', profiling.profiles_view, name='admin_profiles'),
+    path('admin/profiles/<str:capture_id>.prof', profiling.profile_download_view, name='admin_profile_download'),
     path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
     path('api/analytics/', include('analytics.urls', namespace='analytics_api')),
     path('api/countries/', include('countries.urls')),
     path('api/tunisia/', include('tunisia.urls')), # Added Tunisia app URLs
+    path('metrics/', metrics.metrics_view, name='metrics'),
     path('', include('authentication.urls')),  # For frontend templates
 ]
 
@@ -0,0 +1,54 @@
+from analytics.ingestion import Column, Dataset
+from analytics.models import LaborMarketData as AnalyticsLaborMarketData
+from .models import TunisiaGovernorate, RealEstatePrices, LaborMarketData
+
+GOVERNORATES = Dataset(
+    TunisiaGovernorate,
+    columns=[
+        Column('name', 'name', 'str', required=True),
+        Column('arabic_name', 'arabic_name', 'str', default=''),
+        Column('latitude', 'latitude', required=True),
+        Column('longitude', 'longitude', required=True),
+        Column('population_2024', 'population_2024', 'int'),
+        Column('area_km2', 'area_km2'),
+        Column('unemployment_rate', 'unemployment_rate'),
+        Column('agricultural_land_percent', 'agricultural_land_percent'),
+        Column('population_density', 'population_density'),
+        Column('labor_force_size', 'labor_force_size', 'int'),
+        Column('gdp_contribution', 'gdp_contribution'),
+        Column('coastal_access', 'coastal_access', 'bool'),
+        Column('industrial_zones', 'industrial_zones', 'int'),
+        Column('tourist_attractions', 'tourist_attractions', 'int'),
+    ],
+    natural_key=('name',),
+)
+
+REAL_ESTATE_PRICES = Dataset(
+    RealEstatePrices,
+    columns=[
+        Column('governorate', 'governorate', 'str', required=True),
+        Column('year', 'year', 'int', required=True),
+        Column('residential_price_per_m2', 'residential_price_per_m2'),
+        Column('commercial_price_per_m2', 'commercial_price_per_m2'),
+        Column('land_price_per_m2', 'land_price_per_m2'),
+    ],
+    natural_key=('governorate', 'year'),
+    lookups={'governorate': 'Governorate'},
+)
+
+LABOR_MARKET_COLUMNS = [
+    Column('governorate', 'governorate', 'str', required=True),
+    Column('year', 'year', 'int', required=True),
+    Column('unemployment_rate', 'unemployment_rate'),
+    Column('youth_unemployment', 'youth_unemployment'),
+    Column('female_unemployment', 'female_unemployment'),
+    Column('labor_force_participation', 'labor_force_participation'),
+    Column('average_wage', 'average_wage'),
+    Column('job_creation_rate', 'job_creation_rate'),
+]
+
+# The analytics trend endpoints read analytics.LaborMarketData; tunisia.LaborMarketData is kept in sync
+LABOR_MARKET = [
+    Dataset(model, columns=LABOR_MARKET_COLUMNS, natural_key=('governorate', 'year'), lookups={'governorate': 'Governorate'})
+    for model in (AnalyticsLaborMarketData, LaborMarketData)
+]
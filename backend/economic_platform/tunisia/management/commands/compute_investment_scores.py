@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from tunisia.scoring import recompute_investment_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Computes InvestmentScore for every governorate and sector from the governorate, labor market, '
+        'real estate and tax incentive tables. Only scores that changed are written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite every score, changed or not.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk INSERT statement.')
+
+    def handle(self, *args, **options):
+        written = recompute_investment_scores(force=options['force'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Investment scores: {written} written.'))
@@ -1,161 +1,107 @@
-import csv
 import os
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from tunisia.models import TunisiaGovernorate, RealEstatePrices, LaborMarketData
+from django.db import transaction
+from analytics.ingestion import parse_file
+from tunisia.models import TunisiaGovernorate
+from tunisia.datasets import GOVERNORATES, REAL_ESTATE_PRICES, LABOR_MARKET
+from tunisia.scoring import recompute_investment_scores
 
-# Helper function to convert empty strings to None for numeric fields
-def to_int_or_none(value):
-    if value == '':
-        return None
-    try:
-        return int(value)
-    except ValueError:
-        return None # Or raise an error, or log it
+DEFAULT_FILES = {
+    'governorates': 'tunisia_gov_data.txt',
+    'real_estate': 'real_estate_data.txt',
+    'labor_market': 'labor_market_data.txt',
+}
 
-def to_float_or_none(value):
-    if value == '':
-        return None
-    try:
-        return float(value)
-    except ValueError:
-        return None # Or raise an error, or log it
+# Dataset(s) written from each file
+DATASETS = {
+    'governorates': [GOVERNORATES],
+    'real_estate': [REAL_ESTATE_PRICES],
+    'labor_market': LABOR_MARKET,
+}
 
-def to_bool(value):
-    return value == '1'
 
 class Command(BaseCommand):
-    help = 'Populates Tunisia-specific data from text files in the newdata directory'
+    help = (
+        'Populates Tunisia governorates, real estate prices and labor market data. '
+        'Files are parsed concurrently in a process pool and each dataset is bulk-upserted.'
+    )
 
-    def handle(self, *args, **options):
-        # Construct paths relative to the project's root directory
+    def add_arguments(self, parser):
         # settings.BASE_DIR is backend/economic_platform/
-        project_root = settings.BASE_DIR.parent.parent
-        gov_data_path = project_root / 'newdata' / 'tunisia_gov_data.txt'
-        real_estate_data_path = project_root / 'newdata' / 'real_estate_data.txt'
-        labor_market_data_path = project_root / 'newdata' / 'labor_market_data.txt'
+        default_dir = settings.BASE_DIR.parent.parent / 'newdata'
+        parser.add_argument('--data-dir', type=str, default=str(default_dir),
+                            help=f'Directory holding the data files (default: {default_dir}).')
+        parser.add_argument('--governorates-file', type=str, help='Override the governorate file path.')
+        parser.add_argument('--real-estate-file', type=str, help='Override the real estate file path.')
+        parser.add_argument('--labor-market-file', type=str, help='Override the labor market file path.')
+        parser.add_argument('--only', choices=sorted(DEFAULT_FILES), nargs='+',
+                            help='Restrict the run to some datasets (governorates must already exist for the others).')
+        parser.add_argument('--workers', type=int, default=len(DEFAULT_FILES),
+                            help='Parser processes; 1 parses in-process (default: one per dataset).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT statement.')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        datasets = options['only'] or list(DEFAULT_FILES)
+        paths = {
+            dataset: options.get(f'{dataset}_file') or os.path.join(options['data_dir'], DEFAULT_FILES[dataset])
+            for dataset in datasets
+        }
 
         self.stdout.write("Starting data population process...")
+        frames = self.parse_all(paths, options['workers'])
 
-        # Populate TunisiaGovernorate
-        self.stdout.write(f"Populating TunisiaGovernorate from {gov_data_path}...")
-        try:
-            with open(gov_data_path, mode='r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                count = 0
-                for row in reader:
-                    try:
-                        governorate, created = TunisiaGovernorate.objects.update_or_create(
-                            name=row['name'],
-                            defaults={
-                                'arabic_name': row.get('arabic_name', ''),
-                                'latitude': to_float_or_none(row.get('latitude')),
-                                'longitude': to_float_or_none(row.get('longitude')),
-                                'population_2024': to_int_or_none(row.get('population_2024')),
-                                'area_km2': to_float_or_none(row.get('area_km2')),
-                                'unemployment_rate': to_float_or_none(row.get('unemployment_rate')),
-                                'agricultural_land_percent': to_float_or_none(row.get('agricultural_land_percent')),
-                                'population_density': to_float_or_none(row.get('population_density')),
-                                'labor_force_size': to_int_or_none(row.get('labor_force_size')),
-                                'gdp_contribution': to_float_or_none(row.get('gdp_contribution')),
-                                'coastal_access': to_bool(row.get('coastal_access')),
-                                'industrial_zones': to_int_or_none(row.get('industrial_zones')),
-                                'tourist_attractions': to_int_or_none(row.get('tourist_attractions')),
-                            }
-                        )
-                        count += 1
-                        if created:
-                            self.stdout.write(self.style.SUCCESS(f"Created governorate: {governorate.name}"))
-                        else:
-                            self.stdout.write(f"Updated governorate: {governorate.name}")
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(f"Error processing row for {row.get('name', 'Unknown Governorate')}: {e} - Row: {row}"))
-                self.stdout.write(self.style.SUCCESS(f"Processed {count} governorate records."))
-        except FileNotFoundError:
-            self.stderr.write(self.style.ERROR(f"File not found: {gov_data_path}"))
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"An error occurred while populating TunisiaGovernorate: {e}"))
+        with transaction.atomic():
+            if 'governorates' in frames:
+                self.sync('governorates', frames['governorates'])
 
-        # Populate RealEstatePrices
-        self.stdout.write(f"Populating RealEstatePrices from {real_estate_data_path}...")
-        try:
-            with open(real_estate_data_path, mode='r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                count = 0
-                for row in reader:
-                    try:
-                        governorate_name = row.get('governorate')
-                        year = to_int_or_none(row.get('year'))
-                        if not governorate_name or year is None:
-                            self.stderr.write(self.style.WARNING(f"Skipping row due to missing governorate or year: {row}"))
-                            continue
-                        
-                        governorate = TunisiaGovernorate.objects.get(name=governorate_name)
-                        price_data, created = RealEstatePrices.objects.update_or_create(
-                            governorate=governorate,
-                            year=year,
-                            defaults={
-                                'residential_price_per_m2': to_float_or_none(row.get('residential_price_per_m2')),
-                                'commercial_price_per_m2': to_float_or_none(row.get('commercial_price_per_m2')),
-                                'land_price_per_m2': to_float_or_none(row.get('land_price_per_m2')),
-                            }
-                        )
-                        count += 1
-                        # if created:
-                        #     self.stdout.write(self.style.SUCCESS(f"Created real estate data for {governorate.name} - {year}"))
-                        # else:
-                        #     self.stdout.write(f"Updated real estate data for {governorate.name} - {year}")
-                    except TunisiaGovernorate.DoesNotExist:
-                        self.stderr.write(self.style.ERROR(f"Governorate '{governorate_name}' not found for real estate data. Row: {row}"))
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(f"Error processing real estate row for {governorate_name} - {year}: {e} - Row: {row}"))
-                self.stdout.write(self.style.SUCCESS(f"Processed {count} real estate price records."))
-        except FileNotFoundError:
-            self.stderr.write(self.style.ERROR(f"File not found: {real_estate_data_path}"))
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"An error occurred while populating RealEstatePrices: {e}"))
+            # One query for every governorate; replaces a get(name=...) per data row
+            lookups = {'governorate': dict(TunisiaGovernorate.objects.values_list('name', 'id'))}
+            for dataset in ('real_estate', 'labor_market'):
+                if dataset in frames:
+                    self.sync(dataset, frames[dataset], lookups)
 
+            if frames:
+                written = recompute_investment_scores(batch_size=self.batch_size)
+                self.stdout.write(self.style.SUCCESS(f"Investment scores: {written} written."))
 
-        # Populate LaborMarketData
-        self.stdout.write(f"Populating LaborMarketData from {labor_market_data_path}...")
-        try:
-            with open(labor_market_data_path, mode='r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                count = 0
-                for row in reader:
-                    try:
-                        governorate_name = row.get('governorate')
-                        year = to_int_or_none(row.get('year'))
-                        if not governorate_name or year is None:
-                            self.stderr.write(self.style.WARNING(f"Skipping row due to missing governorate or year: {row}"))
-                            continue
+        self.stdout.write(self.style.SUCCESS('Successfully completed data population process.'))
 
-                        governorate = TunisiaGovernorate.objects.get(name=governorate_name)
-                        labor_data, created = LaborMarketData.objects.update_or_create(
-                            governorate=governorate,
-                            year=year,
-                            defaults={
-                                'unemployment_rate': to_float_or_none(row.get('unemployment_rate')),
-                                'youth_unemployment': to_float_or_none(row.get('youth_unemployment')),
-                                'female_unemployment': to_float_or_none(row.get('female_unemployment')),
-                                'labor_force_participation': to_float_or_none(row.get('labor_force_participation')),
-                                'average_wage': to_float_or_none(row.get('average_wage')),
-                                'job_creation_rate': to_float_or_none(row.get('job_creation_rate')),
-                            }
-                        )
-                        count += 1
-                        # if created:
-                        #     self.stdout.write(self.style.SUCCESS(f"Created labor market data for {governorate.name} - {year}"))
-                        # else:
-                        #     self.stdout.write(f"Updated labor market data for {governorate.name} - {year}")
-                    except TunisiaGovernorate.DoesNotExist:
-                        self.stderr.write(self.style.ERROR(f"Governorate '{governorate_name}' not found for labor market data. Row: {row}"))
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(f"Error processing labor market row for {governorate_name} - {year}: {e} - Row: {row}"))
-                self.stdout.write(self.style.SUCCESS(f"Processed {count} labor market data records."))
+    def parse_all(self, paths, workers):
+        """Parses every file, concurrently when workers > 1. Returns {dataset: frame} for files that parsed."""
+        specs = {dataset: DATASETS[dataset][0].spec() for dataset in paths}
+        if workers > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                futures = {dataset: pool.submit(parse_file, path, specs[dataset]) for dataset, path in paths.items()}
+                results = {dataset: self.collect(paths[dataset], future.result) for dataset, future in futures.items()}
+        else:
+            results = {
+                dataset: self.collect(path, lambda: parse_file(path, specs[dataset]))
+                for dataset, path in paths.items()
+            }
+        return {dataset: frame for dataset, frame in results.items() if frame is not None}
+
+    def collect(self, path, get_result):
+        try:
+            frame = get_result()
         except FileNotFoundError:
-            self.stderr.write(self.style.ERROR(f"File not found: {labor_market_data_path}"))
+            self.stderr.write(self.style.ERROR(f"File not found: {path}"))
+            return None
         except Exception as e:
-            self.stderr.write(self.style.ERROR(f"An error occurred while populating LaborMarketData: {e}"))
+            self.stderr.write(self.style.ERROR(f"An error occurred while parsing {path}: {e}"))
+            return None
+        self.stdout.write(f"Parsed {len(frame)} rows from {path}.")
+        return frame
 
-        self.stdout.write(self.style.SUCCESS('Successfully completed data population process.'))
+    def sync(self, dataset, frame, lookups=None):
+        for target in DATASETS[dataset]:
+            result = target.sync(frame, lookups, batch_size=self.batch_size)
+            for message in result['messages']:
+                self.stderr.write(self.style.ERROR(message))
+            if result['skipped']:
+                self.stderr.write(self.style.WARNING(f"Skipped {result['skipped']} {target} rows with missing required values."))
+            self.stdout.write(self.style.SUCCESS(
+                f"{target}: {result['inserted']} created, {result['updated']} updated."
+            ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tunisia', '0002_labormarketdata'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investmentscore',
+            index=models.Index(fields=['sector', '-overall_score'], name='investment_sector_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labormarketdata',
+            index=models.Index(fields=['year', 'governorate'], name='tn_labor_year_gov_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='realestateprices',
+            index=models.Index(fields=['year', 'governorate'], name='real_estate_year_gov_idx'),
+        ),
+    ]
@@ -43,6 +43,10 @@ class InvestmentScore(models.Model):
 
     class Meta:
         unique_together = ['governorate', 'sector']
+        indexes = [
+            # Rankings within a sector
+            models.Index(fields=['sector', '-overall_score'], name='investment_sector_score_idx'),
+        ]
 
     def __str__(self):
         return f"{self.governorate.name} - {self.sector} ({self.overall_score})"
@@ -56,6 +60,10 @@ class RealEstatePrices(models.Model):
 
     class Meta:
         unique_together = ['governorate', 'year']
+        indexes = [
+            # Year ranges across governorates
+            models.Index(fields=['year', 'governorate'], name='real_estate_year_gov_idx'),
+        ]
 
     def __str__(self):
         return f"{self.governorate.name} - {self.year} Real Estate"
@@ -86,6 +94,10 @@ class LaborMarketData(models.Model):
 
     class Meta:
         unique_together = ['governorate', 'year']
+        indexes = [
+            # Year ranges across governorates
+            models.Index(fields=['year', 'governorate'], name='tn_labor_year_gov_idx'),
+        ]
 
     def __str__(self):
         return f"{self.governorate.name} - {self.year} Labor Data"
@@ -0,0 +1,95 @@
+"""
+In-memory investment score matrix for weighted rankings.
+
+Every InvestmentScore is loaded in one query into a governorate × sector × score array
+(the overall score and the four sub-scores), once per 'tunisia' dataset version. A
+ranking is then a weighted sum over the score axis, a mean over the requested sectors
+and an argpartition for the top k; no query and no serializer per request.
+"""
+import threading
+
+import numpy as np
+
+from analytics import versioning
+
+from .models import InvestmentScore
+from .scoring import SECTORS, SUB_SCORES
+
+SCORE_FIELDS = ('overall_score',) + SUB_SCORES
+
+# Short weight names accepted by the ranking API -> score field
+WEIGHT_NAMES = {
+    'overall': 'overall_score',
+    'labor': 'labor_score',
+    'infrastructure': 'infrastructure_score',
+    'tax_incentive': 'tax_incentive_score',
+    'market_access': 'market_access_score',
+}
+
+DEFAULT_TOP = 10
+
+
+class ScoreMatrix:
+    def __init__(self, version, rows):
+        """`rows`: (governorate id, governorate name, sector, *SCORE_FIELDS) tuples."""
+        self.version = version
+        rows = list(rows)
+        self.governorate_ids = sorted({row[0] for row in rows})
+        position = {governorate_id: g for g, governorate_id in enumerate(self.governorate_ids)}
+        self.names = [None] * len(self.governorate_ids)
+        self.sector_index = {sector: s for s, sector in enumerate(SECTORS)}
+        self.scores = np.full((len(self.governorate_ids), len(SECTORS), len(SCORE_FIELDS)), np.nan)
+        for governorate_id, name, sector, *scores in rows:
+            s = self.sector_index.get(sector)
+            if s is None:
+                continue
+            g = position[governorate_id]
+            self.names[g] = name
+            self.scores[g, s] = [np.nan if v is None else v for v in scores]
+
+    @classmethod
+    def load(cls, version):
+        rows = InvestmentScore.objects.values_list('governorate_id', 'governorate__name', 'sector', *SCORE_FIELDS)
+        return cls(version, rows)
+
+    def rank(self, sectors, weights, top=DEFAULT_TOP, min_score=None):
+        """
+        Top `top` governorates by the mean over `sectors` of the `weights`-weighted score
+        ({score field: weight}, normalized to sum 1). Governorates missing a requested
+        sector's score are left out. Returns [(governorate index, score, per-sector scores)].
+        """
+        sector_positions = [self.sector_index[sector] for sector in sectors]
+        weight_vector = np.array([weights.get(field, 0.0) for field in SCORE_FIELDS], dtype=float)
+        weight_vector /= weight_vector.sum()
+        used = weight_vector > 0
+
+        selected = self.scores[:, sector_positions][:, :, used]
+        per_sector = selected @ weight_vector[used]           # governorate × requested sector
+        combined = per_sector.mean(axis=1)
+        eligible = ~np.isnan(combined)
+        if min_score is not None:
+            eligible &= combined >= min_score
+
+        candidates = np.flatnonzero(eligible)
+        if top < len(candidates):
+            # argpartition picks the k best in linear time; only those are sorted
+            candidates = candidates[np.argpartition(-combined[candidates], top - 1)[:top]]
+        candidates = candidates[np.lexsort((candidates, -combined[candidates]))]
+        return [(g, float(combined[g]), per_sector[g]) for g in candidates]
+
+
+_matrix = None
+_lock = threading.Lock()
+
+
+def get_score_matrix():
+    """The matrix for the current 'tunisia' dataset version, reloaded when it changes."""
+    global _matrix
+    version = versioning.current(versioning.TUNISIA)
+    matrix = _matrix
+    if matrix is not None and matrix.version == version:
+        return matrix
+    with _lock:
+        if _matrix is None or _matrix.version != version:
+            _matrix = ScoreMatrix.load(version)
+        return _matrix
@@ -0,0 +1,203 @@
+"""
+Investment score engine.
+
+Every governorate's inputs (its own attributes, its latest labor-market and real-estate
+figures and, per sector, its best tax incentive) form a governorate × sector × feature
+array. Features are min-max normalized across governorates (flipped where lower is
+better, e.g. wages and land prices; missing values are neutral), and each sub-score is
+a weighted mean of them, for all governorates and sectors in one tensor product. The
+overall score weighs the sub-scores per sector. Scores are on a 0-100 scale.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+
+from analytics import versioning
+from analytics.governorates import latest_values
+from analytics.ingestion import upsert_rows
+
+from .models import InvestmentScore, LaborMarketData, RealEstatePrices, TaxIncentives, TunisiaGovernorate
+
+SECTORS = tuple(sector for sector, _ in InvestmentScore.SECTOR_CHOICES)
+SUB_SCORES = ('labor_score', 'infrastructure_score', 'tax_incentive_score', 'market_access_score')
+
+GOVERNORATE_FEATURES = (
+    'population_2024', 'agricultural_land_percent', 'population_density', 'labor_force_size',
+    'gdp_contribution', 'coastal_access', 'industrial_zones', 'tourist_attractions',
+)
+LABOR_FEATURES = (
+    'unemployment_rate', 'youth_unemployment', 'labor_force_participation', 'average_wage', 'job_creation_rate',
+)
+REAL_ESTATE_FEATURES = ('residential_price_per_m2', 'commercial_price_per_m2', 'land_price_per_m2')
+TAX_FEATURES = ('tax_reduction_percent', 'tax_duration_years')
+FEATURES = GOVERNORATE_FEATURES + LABOR_FEATURES + REAL_ESTATE_FEATURES + TAX_FEATURES
+
+# Features where a lower value is more attractive to an investor
+LOWER_IS_BETTER = frozenset({'average_wage', 'residential_price_per_m2', 'commercial_price_per_m2', 'land_price_per_m2'})
+
+# Sub-score -> {feature: weight}, shared by every sector
+FEATURE_WEIGHTS = {
+    'labor_score': {
+        'labor_force_size': 2, 'unemployment_rate': 1, 'youth_unemployment': 1,
+        'labor_force_participation': 1, 'average_wage': 2, 'job_creation_rate': 1,
+    },
+    'infrastructure_score': {
+        'industrial_zones': 2, 'population_density': 1, 'gdp_contribution': 1,
+        'commercial_price_per_m2': 1, 'land_price_per_m2': 1,
+    },
+    'tax_incentive_score': {'tax_reduction_percent': 2, 'tax_duration_years': 1},
+    'market_access_score': {'population_2024': 1, 'gdp_contribution': 1, 'coastal_access': 1, 'tourist_attractions': 1},
+}
+
+# Sector -> sub-score -> {feature: weight} replacing the shared weight
+SECTOR_FEATURE_WEIGHTS = {
+    'agriculture': {'infrastructure_score': {'agricultural_land_percent': 3, 'land_price_per_m2': 2, 'industrial_zones': 0}},
+    'tourism': {'market_access_score': {'tourist_attractions': 3, 'coastal_access': 2}},
+    'manufacturing': {'infrastructure_score': {'industrial_zones': 3, 'land_price_per_m2': 2}},
+    'technology': {
+        'labor_score': {'youth_unemployment': 2, 'labor_force_participation': 2},
+        'infrastructure_score': {'population_density': 2, 'commercial_price_per_m2': 2},
+    },
+    'services': {'market_access_score': {'population_2024': 2, 'gdp_contribution': 2}},
+}
+
+# Sector -> weight of each sub-score (SUB_SCORES order) in the overall score
+SECTOR_WEIGHTS = {
+    'agriculture': (0.3, 0.3, 0.2, 0.2),
+    'tourism': (0.2, 0.2, 0.2, 0.4),
+    'manufacturing': (0.3, 0.35, 0.2, 0.15),
+    'technology': (0.4, 0.25, 0.2, 0.15),
+    'services': (0.25, 0.2, 0.15, 0.4),
+}
+
+SUB_SCORE_LABELS = {
+    'labor_score': 'labor',
+    'infrastructure_score': 'infrastructure',
+    'tax_incentive_score': 'tax incentives',
+    'market_access_score': 'market access',
+}
+
+
+def weight_tensors():
+    """(sector × sub-score × feature weights, each row summing to 1; sector × sub-score overall weights)."""
+    weights = np.zeros((len(SECTORS), len(SUB_SCORES), len(FEATURES)))
+    feature_index = {feature: i for i, feature in enumerate(FEATURES)}
+    for s, sector in enumerate(SECTORS):
+        for k, sub_score in enumerate(SUB_SCORES):
+            sector_weights = {**FEATURE_WEIGHTS[sub_score], **SECTOR_FEATURE_WEIGHTS.get(sector, {}).get(sub_score, {})}
+            for feature, weight in sector_weights.items():
+                weights[s, k, feature_index[feature]] = weight
+    weights /= weights.sum(axis=2, keepdims=True)
+    overall = np.array([SECTOR_WEIGHTS[sector] for sector in SECTORS], dtype=float)
+    return weights, overall / overall.sum(axis=1, keepdims=True)
+
+
+def normalize(features):
+    """
+    Min-max scales each feature (last axis) to [0, 1] over all governorates, flipping
+    LOWER_IS_BETTER ones. Missing values and features that do not vary score 0.5.
+    """
+    flat = features.reshape(-1, features.shape[-1])
+    present = ~np.isnan(flat)
+    low = np.where(present, flat, np.inf).min(axis=0)
+    high = np.where(present, flat, -np.inf).max(axis=0)
+    spread = high - low
+    varies = present.any(axis=0) & (spread > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = np.where(varies, (features - low) / np.where(varies, spread, 1.0), 0.5)
+    flip = np.array([feature in LOWER_IS_BETTER for feature in FEATURES])
+    scaled = np.where(flip, 1.0 - scaled, scaled)
+    return np.where(np.isnan(scaled), 0.5, scaled)
+
+
+def compute_scores(features):
+    """governorate × sector × feature inputs -> (sub-scores [g, s, k], overall scores [g, s]), 0-100."""
+    weights, overall_weights = weight_tensors()
+    sub_scores = 100 * np.einsum('gsf,skf->gsk', normalize(features), weights)
+    return sub_scores, np.einsum('gsk,sk->gs', sub_scores, overall_weights)
+
+
+def load_features():
+    """(governorate ids, governorate × sector × feature array) from the database, in two queries."""
+    latest = {
+        **latest_values(LaborMarketData, LABOR_FEATURES, 'latest_'),
+        **latest_values(RealEstatePrices, REAL_ESTATE_FEATURES, 'latest_'),
+    }
+    governorates = list(
+        TunisiaGovernorate.objects.annotate(**latest).order_by('pk').values_list('pk', *GOVERNORATE_FEATURES, *latest)
+    )
+    ids = [row[0] for row in governorates]
+    shared = np.array([row[1:] for row in governorates], dtype=float).reshape(len(ids), len(FEATURES) - len(TAX_FEATURES))
+
+    # No incentive for a sector counts as a 0% reduction for 0 years, not as unknown
+    features = np.zeros((len(ids), len(SECTORS), len(FEATURES)))
+    features[:, :, :shared.shape[1]] = shared[:, None, :]
+
+    # Best incentive per (governorate, sector); sectors are free text in TaxIncentives
+    position = {i: g for g, i in enumerate(ids)}
+    sector_index = {sector: s for s, sector in enumerate(SECTORS)}
+    incentives = TaxIncentives.objects.values('governorate_id', 'sector').annotate(
+        reduction=Max('tax_reduction_percent'), duration=Max('duration_years'),
+    ).values_list('governorate_id', 'sector', 'reduction', 'duration')
+    for governorate_id, sector, reduction, duration in incentives:
+        s = sector_index.get(sector.strip().lower())
+        if s is not None and governorate_id in position:
+            features[position[governorate_id], s, -2:] = [
+                np.nan if reduction is None else reduction, np.nan if duration is None else duration,
+            ]
+    return ids, features
+
+
+def reasoning(sub_scores):
+    """One sentence per (governorate, sector) naming its strongest and weakest sub-score."""
+    strongest = sub_scores.argmax(axis=-1)
+    weakest = sub_scores.argmin(axis=-1)
+    labels = [SUB_SCORE_LABELS[k] for k in SUB_SCORES]
+    return [
+        [
+            f'Strongest factor: {labels[hi]} ({scores[hi]:.0f}/100); weakest: {labels[lo]} ({scores[lo]:.0f}/100).'
+            for scores, hi, lo in zip(row_scores, row_hi, row_lo)
+        ]
+        for row_scores, row_hi, row_lo in zip(sub_scores, strongest, weakest)
+    ]
+
+
+def recompute_investment_scores(force=False, batch_size=500):
+    """
+    Scores every governorate and sector and upserts InvestmentScore in one transaction.
+    Only rows whose scores differ from the stored ones are written (all of them with
+    `force`). Returns the number of rows written.
+
+    Every governorate is rescored, not only those whose inputs changed: features are
+    min-max normalized across all governorates, so one governorate's new figures can
+    move the others' scores. Skipping unchanged rows is what keeps reruns cheap.
+    """
+    ids, features = load_features()
+    if not ids:
+        return 0
+    sub_scores, overall = compute_scores(features)
+    sub_scores = np.round(sub_scores, 2)
+    overall = np.round(overall, 2)
+    reasons = reasoning(sub_scores)
+
+    stored = {} if force else {
+        (governorate_id, sector): values
+        for governorate_id, sector, *values in InvestmentScore.objects.values_list(
+            'governorate_id', 'sector', 'overall_score', *SUB_SCORES,
+        )
+    }
+    rows = []
+    for g, governorate_id in enumerate(ids):
+        for s, sector in enumerate(SECTORS):
+            values = [float(overall[g, s]), *map(float, sub_scores[g, s])]
+            if stored.get((governorate_id, sector)) != values:
+                rows.append([governorate_id, sector, *values, reasons[g][s]])
+
+    if rows:
+        with transaction.atomic():
+            upsert_rows(
+                InvestmentScore, ['governorate', 'sector', 'overall_score', *SUB_SCORES, 'reasoning'], rows,
+                unique_fields=('governorate', 'sector'), batch_size=batch_size,
+            )
+            versioning.bump(versioning.TUNISIA)
+    return len(rows)
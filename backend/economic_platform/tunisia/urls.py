@@ -3,5 +3,6 @@ from . import views # Import views generally
 
 urlpatterns = [
     path('investment-advisor/', views.InvestmentAdvisorAPIView.as_view(), name='api_investment_advisor'),
+    path('investment-ranking/', views.InvestmentRankingAPIView.as_view(), name='api_investment_ranking'),
     # Add other Tunisia-specific API endpoints here if any
 ]
@@ -1,10 +1,17 @@
+import math
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from analytics import versioning
+from analytics.caching import cached_response
 from .models import InvestmentScore
+from .ranking import DEFAULT_TOP, WEIGHT_NAMES, get_score_matrix
+from .scoring import SECTORS
 from .serializers import InvestmentOpportunitySerializer
 
 class InvestmentAdvisorAPIView(APIView):
+    @cached_response([versioning.TUNISIA])
     def get(self, request, *args, **kwargs):
         sector = request.query_params.get('sector')
         min_investment_score_str = request.query_params.get('min_investment_score')
@@ -15,7 +22,8 @@ class InvestmentAdvisorAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        queryset = InvestmentScore.objects.filter(sector__iexact=sector)
+        # Sectors are stored as their lower-case choice keys; an exact match can use the (sector, score) index
+        queryset = InvestmentScore.objects.filter(sector=sector.strip().lower())
 
         if min_investment_score_str:
             try:
@@ -27,6 +35,72 @@ class InvestmentAdvisorAPIView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-        queryset = queryset.order_by('-overall_score')
+        # The serializer nests each score's governorate; join it instead of one query per row
+        queryset = queryset.select_related('governorate').order_by('-overall_score')
         serializer = InvestmentOpportunitySerializer(queryset, many=True)
         return Response(serializer.data)
+
+
+class InvestmentRankingAPIView(APIView):
+    """
+    Top governorates across several sectors under custom weights, e.g.
+    ?sectors=tourism,technology&weights=labor:2,market_access:1&top=5
+    Weights are over overall, labor, infrastructure, tax_incentive and market_access
+    (default: overall only); sectors default to all of them.
+    """
+
+    def get(self, request, *args, **kwargs):
+        sectors = request.query_params.get('sectors')
+        sectors = [s.strip().lower() for s in sectors.split(',') if s.strip()] if sectors else list(SECTORS)
+        unknown = [s for s in sectors if s not in SECTORS]
+        if unknown or not sectors:
+            return Response(
+                {'error': f"Unknown sectors: {', '.join(unknown)}. Use any of: {', '.join(SECTORS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        weights = {}
+        for item in (request.query_params.get('weights') or 'overall:1').split(','):
+            name, _, value = item.partition(':')
+            field = WEIGHT_NAMES.get(name.strip().lower())
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = None
+            if field is None or weight is None or weight < 0 or not math.isfinite(weight):
+                return Response(
+                    {'error': f"Invalid weight '{item}'. Use name:number pairs with names from: {', '.join(WEIGHT_NAMES)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            weights[field] = weights.get(field, 0.0) + weight
+        if not sum(weights.values()) > 0:
+            return Response({'error': 'At least one weight must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not math.isfinite(sum(weights.values())):
+            # Normalizing would divide inf by inf
+            return Response({'error': 'Weights are too large.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            top = int(request.query_params.get('top') or DEFAULT_TOP)
+            min_score = request.query_params.get('min_score')
+            min_score = float(min_score) if min_score else None
+        except ValueError:
+            return Response({'error': 'top must be an integer and min_score a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        if top < 1:
+            return Response({'error': 'top must be at least 1.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        matrix = get_score_matrix()
+        results = [
+            {
+                'governorate_id': matrix.governorate_ids[g],
+                'governorate': matrix.names[g],
+                'score': round(score, 2),
+                'sector_scores': {sector: round(float(v), 2) for sector, v in zip(sectors, per_sector)},
+            }
+            for g, score, per_sector in matrix.rank(sectors, weights, top, min_score)
+        ]
+        total = sum(weights.values())
+        return Response({
+            'sectors': sectors,
+            'weights': {field: round(weight / total, 4) for field, weight in weights.items()},
+            'results': results,
+        })